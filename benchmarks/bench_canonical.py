@@ -0,0 +1,33 @@
+"""measures FilterSet.canonicalize and fingerprint against a plain parse
+
+run from the repository root: python -m benchmarks.bench_canonical
+"""
+import timeit
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+QUERIES = {
+    'short': 'age=gt:30&name=Bob',
+    'mixed': 'name=Ron Swanson&age=65&weight=lte:200.621&divorced=1&limit=10&offset=20',
+    'in-heavy': 'name=in:' + ','.join(f'Person {i}' for i in range(50)) + '&age=gte:18',
+}
+
+
+def main(number=20000):
+    filter_set = PersonFilterSet()
+    cached_set = PersonFilterSet(cache_size=1024)
+
+    for label, qs in QUERIES.items():
+        parse = timeit.timeit(lambda: filter_set.parse(qs), number=number)
+        canonical = timeit.timeit(lambda: filter_set.canonicalize(qs), number=number)
+        fingerprint = timeit.timeit(lambda: filter_set.fingerprint(qs), number=number)
+        cached = timeit.timeit(lambda: cached_set.fingerprint(qs), number=number)
+        print(f'{label:<10} parse {parse / number * 1e6:>8.2f} us'
+              f'  canonicalize {canonical / number * 1e6:>8.2f} us'
+              f'  fingerprint {fingerprint / number * 1e6:>8.2f} us'
+              f'  (parse cached {cached / number * 1e6:>8.2f} us)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""compares FilteredCollection queries with a linear scan as the collection grows
+
+run from the repository root: python -m benchmarks.bench_collection
+"""
+import time
+
+from collection import FilteredCollection
+from predicates import compile_predicate
+
+from benchmarks.bench_filterset import PersonFilterSet
+from benchmarks.bench_predicates import make_rows
+
+
+QUERIES = [
+    'name=Person 7&age=gt:40',
+    'age=gte:30&age=lt:32&weight=lt:90.5',
+    'name=in:Person 1,Person 2&divorced=true&limit=10',
+]
+
+
+def scan(filter_set, rows, qs):
+    parsed = filter_set.parse(qs)
+    predicate = compile_predicate(parsed, exclude=filter_set.control_fields)
+    limit = parsed.get('limit')
+    matched = [row for row in rows if predicate(row)]
+    return matched[:limit.value] if limit else matched
+
+
+def best_of(function, repeat=5):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), result
+
+
+def main():
+    filter_set = PersonFilterSet()
+
+    for count in (1000, 10000, 100000, 1000000):
+        rows = make_rows(count)
+        build, collection = best_of(lambda: FilteredCollection(filter_set, rows), repeat=1)
+        print(f'{count:>8} rows  (index build {build * 1e3:.0f} ms)')
+
+        for qs in QUERIES:
+            linear, expected = best_of(lambda: scan(filter_set, rows, qs))
+            indexed, result = best_of(lambda: collection.query(qs))
+            assert result == expected
+            print(f'    {qs:<50} scan {linear * 1e3:>9.2f} ms  indexed {indexed * 1e3:>8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
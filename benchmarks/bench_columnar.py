@@ -0,0 +1,71 @@
+"""compares vectorized evaluation of parsed filters over numpy columns with row-wise predicates
+
+requires numpy. run from the repository root: python -m benchmarks.bench_columnar
+row-wise evaluation is skipped above 10^6 rows, where building the row dicts alone takes
+several gigabytes.
+"""
+import time
+
+import numpy as np
+
+from columnar import evaluate
+from predicates import compile_predicate
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+QUERIES = [
+    'age=gt:30',
+    'age=gte:30&weight=lt:90.5&divorced=false',
+    'name=in:Person 1,Person 2,Person 3&age=lt:60',
+]
+
+
+def make_table(count, seed=0):
+    rng = np.random.default_rng(seed)
+    weight = rng.uniform(40, 150, count)
+    weight[rng.random(count) < 0.05] = np.nan
+    return {
+        'name': np.char.add('Person ', rng.integers(1, 50, count).astype(str)).astype(object),
+        'age': rng.integers(18, 90, count),
+        'weight': weight,
+        'divorced': rng.random(count) < 0.3,
+    }
+
+
+def as_rows(table):
+    fields = list(table)
+    columns = [table[field].tolist() for field in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def main(max_rowwise=10 ** 6):
+    filter_set = PersonFilterSet()
+
+    for exponent in range(4, 8):
+        count = 10 ** exponent
+        table = make_table(count)
+        rows = as_rows(table) if count <= max_rowwise else None
+        print(f'10^{exponent} rows')
+
+        for qs in QUERIES:
+            parsed = filter_set.parse(qs)
+            start = time.perf_counter()
+            matched = int(evaluate(parsed, table, filter_set).sum())
+            vectorized = time.perf_counter() - start
+            line = f'    {qs:<48} numpy {vectorized * 1e3:>9.2f} ms'
+
+            if rows is not None:
+                predicate = compile_predicate(parsed, exclude=filter_set.control_fields)
+                start = time.perf_counter()
+                expected = sum(1 for row in rows if predicate(row))
+                rowwise = time.perf_counter() - start
+                line += f'  row-wise {rowwise * 1e3:>9.2f} ms'
+                # NaN weights compare false in both; the counts agree
+                assert matched == expected, (matched, expected)
+
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
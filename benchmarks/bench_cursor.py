@@ -0,0 +1,69 @@
+"""compares OFFSET pagination against keyset cursors at increasing page depth in sqlite3
+
+run from the repository root: python -m benchmarks.bench_cursor
+"""
+import random
+import sqlite3
+import time
+
+from filters import IntegerFilter
+from filterset import CursorPaginationFilterSet, PaginationFilterSet
+from sql import SQLCompiler
+
+
+class PersonFilterSet(PaginationFilterSet):
+    age = IntegerFilter()
+
+
+class PersonCursorFilterSet(CursorPaginationFilterSet):
+    cursor_keys = ('age', 'id')
+    cursor_secret = 'benchmark'
+
+    age = IntegerFilter()
+
+
+def main(rows=200000, page_size=50, repeat=20):
+    rng = random.Random(0)
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE people (id INTEGER PRIMARY KEY, age INTEGER, name TEXT)')
+    connection.executemany('INSERT INTO people VALUES (?, ?, ?)', [
+        (i, rng.randint(18, 90), f'Person {i}') for i in range(rows)])
+    connection.execute('CREATE INDEX people_age_id ON people (age, id)')
+
+    offset_set = PersonFilterSet()
+    cursor_set = PersonCursorFilterSet()
+    compiler = SQLCompiler()
+    ordered = connection.execute('SELECT age, id FROM people ORDER BY age, id').fetchall()
+
+    print(f'{rows} rows, {page_size} per page')
+
+    for page in (1, 10, 100, 1000, 3000):
+        offset = page * page_size
+        sql, params = compiler.compile(offset_set, offset_set.parse(
+            f'limit={page_size}&offset={offset}'))
+        statement = f'SELECT id FROM people {sql.replace("LIMIT", "ORDER BY age, id LIMIT")}'
+
+        start = time.perf_counter()
+
+        for _ in range(repeat):
+            connection.execute(statement, params).fetchall()
+
+        offset_time = (time.perf_counter() - start) / repeat
+        age, id = ordered[offset - 1]
+        token = cursor_set.cursor({'age': age, 'id': id})
+        sql, params = compiler.compile(cursor_set, cursor_set.parse(
+            f'after={token}&limit={page_size}'))
+        statement = f'SELECT id FROM people {sql}'
+
+        start = time.perf_counter()
+
+        for _ in range(repeat):
+            connection.execute(statement, params).fetchall()
+
+        keyset_time = (time.perf_counter() - start) / repeat
+        print(f'  page {page:>5}  offset {offset_time * 1e3:>8.3f} ms'
+              f'  keyset {keyset_time * 1e3:>8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
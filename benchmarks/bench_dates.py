@@ -0,0 +1,64 @@
+"""compares DateTimeFilter with datetime.fromisoformat and general purpose date parsers, on
+repeated dashboard boundaries and on distinct values
+
+run from the repository root: python -m benchmarks.bench_dates
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from dates import parse_datetime
+from filters import DateTimeFilter
+
+try:
+    from dateutil.parser import isoparse
+except ImportError:
+    isoparse = None
+
+
+def make_values(count, distinct, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    pool = [(start + timedelta(hours=rng.randint(0, 24 * 365))).strftime('%Y-%m-%dT%H:%M:%SZ')
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def fromisoformat_utc(text):
+    # what a handler does by hand: python < 3.11 needs the Z spelled as an offset
+    return datetime.fromisoformat(text.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+def strptime_utc(text):
+    return datetime.strptime(text, '%Y-%m-%dT%H:%M:%S%z')
+
+
+def main(count=200000):
+    validate = DateTimeFilter().validate
+    parsers = {
+        'DateTimeFilter.validate': validate,
+        'parse_datetime, no memo': parse_datetime.__wrapped__,
+        'fromisoformat + astimezone': fromisoformat_utc,
+        'strptime': strptime_utc,
+    }
+
+    if isoparse is not None:
+        parsers['dateutil isoparse'] = isoparse
+
+    for label, distinct in (('dashboard boundaries', 50), ('distinct values', count)):
+        values = make_values(count, distinct)
+        print(f'{label}: {count} values, {distinct} distinct')
+
+        for name, parse in parsers.items():
+            parse_datetime.cache_clear()
+            start = time.perf_counter()
+
+            for value in values:
+                parse(value)
+
+            elapsed = time.perf_counter() - start
+            print(f'  {name:<28}{elapsed / count * 1e9:>10.0f} ns/value')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""measures DelimitedSetFilter and ProjectionFilterSet parsing of fields= lists
+
+run from the repository root: python -m benchmarks.bench_delimited
+"""
+import timeit
+
+from filters import DelimitedSetFilter, IntegerFilter
+from filterset import ProjectionFilterSet
+
+
+COLUMNS = tuple(f'column_{i}' for i in range(60))
+
+
+class WideProjectionFilterSet(ProjectionFilterSet):
+    allowed_fields = COLUMNS
+
+
+def main(number=20000):
+    projection = WideProjectionFilterSet()
+    ids = DelimitedSetFilter(filter_type=IntegerFilter)
+
+    for count in (3, 20, 60):
+        qs = 'fields=' + ','.join(COLUMNS[:count])
+        elapsed = timeit.timeit(lambda: projection.parse(qs), number=number)
+        print(f'{count:>3} columns  projection parse {elapsed / number * 1e6:>8.2f} us')
+
+    value = ','.join(str(i) for i in range(100))
+    elapsed = timeit.timeit(lambda: ids.parse(value), number=number)
+    print(f'100 integers  delimited parse {elapsed / number * 1e6:>8.2f} us')
+
+
+if __name__ == '__main__':
+    main()
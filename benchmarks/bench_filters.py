@@ -0,0 +1,93 @@
+"""compares each filter's compiled converter with the parse inheritance chain it replaced
+
+run from the repository root: python -m benchmarks.bench_filters
+"""
+import timeit
+
+from constants import FALSY_VALUES, NULL_VALUES, TRUTHY_VALUES
+from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter, WholeNumberFilter
+
+
+class LegacyFilter:
+    allow_null = True
+
+    def parse(self, value):
+        parsed = str(value).strip()
+
+        if parsed.lower() in NULL_VALUES:
+            return None
+
+        return parsed
+
+
+class LegacyBooleanFilter(LegacyFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+
+        if parsed is None:
+            return parsed
+        elif parsed.lower() in TRUTHY_VALUES:
+            return True
+        elif parsed.lower() in FALSY_VALUES:
+            return False
+
+        raise ValueError()
+
+
+class LegacyNumericFilter(LegacyFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+        return parsed
+
+
+class LegacyFloatFilter(LegacyNumericFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+        return parsed if parsed is None else float(parsed)
+
+
+class LegacyIntegerFilter(LegacyNumericFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+        return parsed if parsed is None else int(parsed)
+
+
+class LegacyWholeNumberFilter(LegacyNumericFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+
+        if parsed is None:
+            return parsed
+
+        parsed = int(parsed)
+
+        if parsed < 0:
+            raise ValueError()
+
+        return parsed
+
+
+CASES = [
+    (StringFilter, LegacyFilter, ['Ron Swanson', 'null', ' padded ']),
+    (BooleanFilter, LegacyBooleanFilter, ['true', 'FALSE', 'no', 'null']),
+    (FloatFilter, LegacyFloatFilter, ['1.5', '200.621', '-3', 'none']),
+    (IntegerFilter, LegacyIntegerFilter, ['1', '65', '-12', 'null']),
+    (WholeNumberFilter, LegacyWholeNumberFilter, ['0', '10', '250', 'None']),
+]
+
+
+def main(number=50000):
+    for cls, legacy_cls, values in CASES:
+        f, legacy = cls(), legacy_cls()
+        assert [f.parse(v) for v in values] == [legacy.parse(v) for v in values]
+
+        old = timeit.timeit(lambda: [legacy.parse(v) for v in values], number=number)
+        new = timeit.timeit(lambda: [f.parse(v) for v in values], number=number)
+        validate = timeit.timeit(lambda: [f.validate(v) for v in values], number=number)
+        per_value = number * len(values) / 1e9
+        print(f'{cls.__name__:<20} legacy parse {old / per_value:>6.0f} ns'
+              f'  parse {new / per_value:>6.0f} ns  validate {validate / per_value:>6.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""times FilterSet.parse, with and without the parse cache, against the parse it replaced,
+which scanned dir() for filters on every call
+
+run from the repository root: python -m benchmarks.bench_filterset
+"""
+import timeit
+
+from exceptions import FilterException
+from filters import BooleanFilter, Filter, FloatFilter, IntegerFilter, StringFilter
+from filterset import PaginationFilterSet
+from operators import ALL, EQUAL
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter(allow_null=False)
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+
+
+QUERIES = {
+    'short': 'age=gt:30',
+    'mixed': 'name=Ron Swanson&age=65&weight=200.621&divorced=1&limit=10&offset=20',
+}
+
+
+def scan_filters(filter_set):
+    """the lookup parse used to rebuild on every call"""
+    return [p for p in dir(filter_set) if isinstance(getattr(filter_set, p), Filter)]
+
+
+def legacy_parse(filter_set, qs):
+    """the parse loop before filters were compiled per class, in non-strict mode"""
+    filters = scan_filters(filter_set)
+    parsed = []
+
+    for part in qs.split('&'):
+        field, exp = part.split('=') if '=' in part else [part, '']
+
+        if ':' in exp:
+            operator, value = exp.split(':')
+        elif exp in ALL:
+            operator, value = exp, ''
+        else:
+            operator, value = EQUAL, exp
+
+        if field in filters:
+            f = getattr(filter_set, field)
+
+            if operator in f.operators:
+                try:
+                    value = f.parse(value)
+                except FilterException:
+                    continue
+
+                parsed.append({'field': field, 'operator': operator, 'value': value})
+
+    return parsed
+
+
+def main(number=20000):
+    filter_set = PersonFilterSet()
+
+    scan = timeit.timeit(lambda: scan_filters(filter_set), number=number)
+    print(f'{"dir() scan (removed)":<24}{scan / number * 1e6:>10.2f} us/call')
+
+    for label, qs in QUERIES.items():
+        assert legacy_parse(filter_set, qs) == filter_set.parse(qs).as_dicts()
+        legacy = timeit.timeit(lambda: legacy_parse(filter_set, qs), number=number)
+        elapsed = timeit.timeit(lambda: filter_set.parse(qs), number=number)
+        print(f'{"legacy parse " + label:<24}{legacy / number * 1e6:>10.2f} us/call')
+        print(f'{"parse " + label:<24}{elapsed / number * 1e6:>10.2f} us/call'
+              f'{legacy / elapsed:>8.1f}x')
+
+    cached_set = PersonFilterSet(cache_size=1024)
+
+    for label, qs in QUERIES.items():
+        elapsed = timeit.timeit(lambda: cached_set.parse(qs), number=number)
+        print(f'{"cached parse " + label:<24}{elapsed / number * 1e6:>10.2f} us/call')
+
+    print(cached_set.cache_info())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""measures building and probing in/nin values for large id lists
+
+run from the repository root: python -m benchmarks.bench_in
+"""
+import timeit
+
+from filters import IntegerFilter, StringFilter
+from utils import contains
+
+
+def handler_side(value):
+    """what handlers did with the unsplit string before in/nin were typed"""
+    return [int(v) for v in value.split(',')]
+
+
+def main(number=200):
+    probes = list(range(0, 20000, 7))
+
+    for count in (10, 100, 1000, 10000):
+        value = ','.join(str(i * 2) for i in range(count))
+        f = IntegerFilter()
+        packed = IntegerFilter(packed=True)
+
+        legacy = handler_side(value)
+        parsed, _ = f.validate_many(value)
+        packed_values, _ = packed.validate_many(value)
+
+        build_legacy = timeit.timeit(lambda: handler_side(value), number=number)
+        build_set = timeit.timeit(lambda: f.validate_many(value), number=number)
+        build_array = timeit.timeit(lambda: packed.validate_many(value), number=number)
+        probe_list = timeit.timeit(lambda: [p in legacy for p in probes], number=10)
+        probe_set = timeit.timeit(lambda: [p in parsed for p in probes], number=10)
+        probe_array = timeit.timeit(lambda: [contains(packed_values, p) for p in probes],
+                                    number=10)
+
+        print(f'{count:>6} ids  build: split+int {build_legacy / number * 1e6:>9.1f} us'
+              f'  frozenset {build_set / number * 1e6:>9.1f} us'
+              f'  array {build_array / number * 1e6:>9.1f} us'
+              f'  | {len(probes)} probes: list {probe_list / 10 * 1e3:>8.2f} ms'
+              f'  frozenset {probe_set / 10 * 1e3:>6.2f} ms'
+              f'  array {probe_array / 10 * 1e3:>6.2f} ms')
+
+    strings = StringFilter()
+    value = ','.join(f'sku-{i}' for i in range(1000))
+    elapsed = timeit.timeit(lambda: strings.validate_many(value), number=number)
+    print(f'  1000 strings  frozenset {elapsed / number * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""measures FilterSet.parse with instrumentation disabled and with each kind of sink
+
+run from the repository root: python -m benchmarks.bench_instrumentation
+"""
+import timeit
+
+from benchmarks.bench_filterset import PersonFilterSet
+from instrumentation import CallbackSink, MemorySink, Sink
+
+
+QUERIES = {
+    'short': 'age=gt:30',
+    'mixed': 'name=Ron Swanson&age=65&weight=200.621&divorced=1&limit=10&offset=20',
+    'tracking': 'age=65&utm_source=newsletter&utm_medium=email&utm_campaign=spring&gclid=abc123',
+}
+
+SINKS = {
+    'disabled': None,
+    'no-op Sink': Sink(),
+    'MemorySink': MemorySink(),
+    'CallbackSink': CallbackSink(lambda metric, value, tags: None),
+}
+
+
+def main(number=20000, repeat=15):
+    for label, qs in QUERIES.items():
+        print(label)
+        baseline = None
+
+        for name, sink in SINKS.items():
+            filter_set = PersonFilterSet(sink=sink)
+            elapsed = min(timeit.repeat(lambda: filter_set.parse(qs), number=number,
+                                        repeat=repeat)) / number
+            baseline = baseline or elapsed
+            print(f'  {name:<14}{elapsed * 1e6:>8.2f} us/call  {elapsed / baseline - 1:>+7.1%}')
+
+
+if __name__ == '__main__':
+    main()
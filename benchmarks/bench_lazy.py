@@ -0,0 +1,25 @@
+"""compares a full parse with parse_fields for pagination parameters at the front of the query
+
+run from the repository root: python -m benchmarks.bench_lazy
+"""
+import timeit
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+def main(number=5000):
+    filter_set = PersonFilterSet()
+
+    for count in (10, 100, 1000):
+        search = '&'.join(f'name=neq:term{i}' for i in range(count))
+        qs = f'limit=25&offset=50&{search}'
+
+        full = timeit.timeit(lambda: filter_set.parse(qs).get('limit'), number=number)
+        lazy = timeit.timeit(lambda: filter_set.parse_fields(qs, ('limit', 'offset')),
+                             number=number)
+        print(f'{count:>5} trailing clauses  parse {full / number * 1e6:>9.2f} us'
+              f'  parse_fields {lazy / number * 1e6:>9.2f} us')
+
+
+if __name__ == '__main__':
+    main()
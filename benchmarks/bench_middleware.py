@@ -0,0 +1,152 @@
+"""load tests a three layer request stack (auth, response cache, handler) where every layer
+needs the parsed query: each layer parsing it itself against WSGIMiddleware/ASGIMiddleware
+parsing once, in process and over a local wsgiref HTTP server
+
+run from the repository root: python -m benchmarks.bench_middleware
+"""
+import asyncio
+import random
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import quote
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from benchmarks.bench_filterset import PersonFilterSet
+from middleware import ASGIMiddleware, WSGIMiddleware, get_parsed
+
+
+def make_queries(count, seed=0):
+    rng = random.Random(seed)
+    return [f'name=Person {rng.randint(1, 500)}&age=gt:{rng.randint(18, 80)}'
+            f'&weight=lt:{rng.uniform(50, 150):.1f}&limit={rng.randint(1, 50)}'
+            f'&offset={rng.randint(0, 500)}&utm_source=mail' for _ in range(count)]
+
+
+def wsgi_layer(app, read):
+    def layer(environ, start_response):
+        # stands in for an auth or caching layer inspecting e.g. limit
+        read(environ).get('limit')
+        return app(environ, start_response)
+
+    return layer
+
+
+def wsgi_handler(read):
+    def handler(environ, start_response):
+        body = str(len(read(environ))).encode('ascii')
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [body]
+
+    return handler
+
+
+def wsgi_stacks(filter_set):
+    def parse(environ):
+        return filter_set.parse(environ['QUERY_STRING'])
+
+    def stack(read):
+        return wsgi_layer(wsgi_layer(wsgi_handler(read), read), read)
+
+    return {
+        'parse per layer': stack(parse),
+        'WSGIMiddleware': WSGIMiddleware(stack(get_parsed), {'/people': filter_set}),
+    }
+
+
+def asgi_stacks(filter_set):
+    def parse(scope):
+        return filter_set.parse(scope['query_string'])
+
+    def layer(app, read):
+        async def wrapped(scope, receive, send):
+            read(scope).get('limit')
+            await app(scope, receive, send)
+
+        return wrapped
+
+    def handler(read):
+        async def app(scope, receive, send):
+            body = str(len(read(scope))).encode('ascii')
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': body})
+
+        return app
+
+    def stack(read):
+        return layer(layer(handler(read), read), read)
+
+    return {
+        'parse per layer': stack(parse),
+        'ASGIMiddleware': ASGIMiddleware(stack(get_parsed), {'/people': filter_set}),
+    }
+
+
+def bench_wsgi(queries):
+    def start_response(status, headers):
+        pass
+
+    for name, app in wsgi_stacks(PersonFilterSet()).items():
+        start = time.perf_counter()
+
+        for qs in queries:
+            app({'PATH_INFO': '/people', 'QUERY_STRING': qs}, start_response)
+
+        elapsed = time.perf_counter() - start
+        print(f'  wsgi {name:<18}{len(queries) / elapsed:>12,.0f} req/s')
+
+
+def bench_asgi(queries):
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    async def run(app):
+        for qs in queries:
+            await app({'type': 'http', 'path': '/people', 'query_string': qs.encode('ascii')},
+                      receive, send)
+
+    for name, app in asgi_stacks(PersonFilterSet()).items():
+        start = time.perf_counter()
+        asyncio.run(run(app))
+        elapsed = time.perf_counter() - start
+        print(f'  asgi {name:<18}{len(queries) / elapsed:>12,.0f} req/s')
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_http(queries):
+    for name, app in wsgi_stacks(PersonFilterSet()).items():
+        server = make_server('127.0.0.1', 0, app, handler_class=QuietHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        start = time.perf_counter()
+
+        for qs in queries:
+            connection = HTTPConnection('127.0.0.1', port)
+            connection.request('GET', '/people?' + quote(qs, safe='&=:'))
+            connection.getresponse().read()
+            connection.close()
+
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+        print(f'  http {name:<18}{len(queries) / elapsed:>12,.0f} req/s')
+
+
+def main():
+    queries = make_queries(20000)
+    print(f'{len(queries)} distinct queries, 3 layers reading the parsed query')
+    bench_wsgi(queries)
+    bench_asgi(queries)
+    bench_http(queries[:2000])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""measures FilterSet.parse_many throughput at 1, 2, 4 and 8 worker processes
+
+run from the repository root: python -m benchmarks.bench_parse_many
+"""
+import random
+import time
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+
+    for _ in range(count):
+        corpus.append('&'.join([
+            f'name=Person {rng.randint(1, 1000)}',
+            f'age=gt:{rng.randint(18, 90)}',
+            f'weight=lte:{rng.uniform(40, 150):.2f}',
+            f'divorced={rng.choice(("true", "false", "maybe"))}',
+            f'limit={rng.randint(1, 100)}',
+            f'offset={rng.randint(0, 1000)}',
+            f'utm_source=campaign{rng.randint(1, 50)}',
+        ]))
+
+    return corpus
+
+
+def main(count=200000, chunksize=512):
+    corpus = make_corpus(count)
+    filter_set = PersonFilterSet(strict=True)
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        errors = sum(isinstance(r, Exception)
+                     for r in filter_set.parse_many(corpus, workers=workers, chunksize=chunksize))
+        elapsed = time.perf_counter() - start
+        print(f'{workers} workers  {count / elapsed:>12,.0f} queries/s  ({errors} errors)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""compares compiled predicates with interpreting parsed clauses for every row
+
+run from the repository root: python -m benchmarks.bench_predicates [rows]
+"""
+import operator
+import random
+import sys
+import time
+
+from predicates import compile_predicate
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+OPERATORS = {
+    'eq': operator.eq,
+    'neq': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': lambda a, b: a in b,
+    'nin': lambda a, b: a not in b,
+}
+
+QUERIES = [
+    'age=gt:30',
+    'age=gte:30&weight=lt:90.5&divorced=false',
+    'name=in:Person 1,Person 2,Person 3,Person 4&age=lt:60',
+]
+
+
+def interpret(parsed):
+    """the per-row loop handlers wrote by hand"""
+    clauses = [(f['field'], OPERATORS[f['operator']], f['value']) for f in parsed]
+
+    def predicate(row):
+        for field, op, value in clauses:
+            if not op(row[field], value):
+                return False
+
+        return True
+
+    return predicate
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [{'name': f'Person {rng.randint(1, 50)}', 'age': rng.randint(18, 90),
+             'weight': rng.uniform(40, 150), 'divorced': rng.random() < 0.3}
+            for _ in range(count)]
+
+
+def timed(predicate, rows):
+    start = time.perf_counter()
+    count = sum(1 for row in rows if predicate(row))
+    return time.perf_counter() - start, count
+
+
+def main(count=1000000):
+    rows = make_rows(count)
+    filter_set = PersonFilterSet()
+
+    for qs in QUERIES:
+        parsed = filter_set.parse(qs)
+        naive, expected = timed(interpret(parsed), rows)
+        compiled, matched = timed(compile_predicate(parsed), rows)
+        assert matched == expected
+        print(f'{qs:<56} naive {naive * 1e3:>8.1f} ms  compiled {compiled * 1e3:>8.1f} ms'
+              f'  ({matched} matches)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
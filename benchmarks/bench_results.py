@@ -0,0 +1,44 @@
+"""compares memory and build time of ParsedFilter records with the dicts parse used to return
+
+run from the repository root: python -m benchmarks.bench_results
+"""
+import timeit
+import tracemalloc
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+QS = 'name=Ron Swanson&age=gt:30&weight=lte:200.5&divorced=1&limit=10&offset=20'
+
+
+def as_dicts(result):
+    return [{'field': parsed.field, 'operator': parsed.operator, 'value': parsed.value}
+            for parsed in result]
+
+
+def measure(build, count):
+    tracemalloc.start()
+    kept = [build() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main(count=100000, number=20000):
+    filter_set = PersonFilterSet()
+    template = filter_set.parse(QS)
+
+    records = measure(lambda: filter_set.parse(QS), count)
+    legacy = measure(lambda: as_dicts(filter_set.parse(QS)), count)
+
+    print(f'{count} results of {len(template)} clauses')
+    print(f'{"ParseResult/ParsedFilter":<26}{records / count:>10.0f} bytes/result')
+    print(f'{"list of dicts":<26}{legacy / count:>10.0f} bytes/result')
+
+    elapsed = timeit.timeit(lambda: filter_set.parse(QS), number=number)
+    print(f'{"parse":<26}{elapsed / number * 1e6:>10.2f} us/call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""compares the single-pass scanners with the unquote + split chain they replaced
+
+run from the repository root: python -m benchmarks.bench_scanner
+"""
+import random
+import timeit
+from urllib.parse import unquote_plus
+
+from scanner import scan, scan_bytes
+
+
+def split_chain(qs):
+    """the former tokenizer, behind the urllib decode pass callers had to run first"""
+    tokens = []
+
+    for part in unquote_plus(qs).split('&'):
+        field, exp = part.split('=', 1) if '=' in part else [part, '']
+
+        if ':' in exp:
+            operator, value = exp.split(':', 1)
+        else:
+            operator, value = 'eq', exp
+
+        tokens.append((field, operator, value))
+
+    return tokens
+
+
+def make_query(count, escaped, seed=0):
+    """count clauses; when escaped, every third value carries '+' and '%XX' escapes"""
+    rng = random.Random(seed)
+    parts = []
+
+    for i in range(count):
+        value = ''.join(rng.choice('abcdefghij') for _ in range(rng.randint(3, 20)))
+        parts.append(f'field{i}={value}+%20x' if escaped and not i % 3 else f'field{i}=gte:{value}')
+
+    return '&'.join(parts)
+
+
+def main(number=2000):
+    for escaped in (False, True):
+        print('escaped corpus' if escaped else 'plain corpus')
+
+        for count in (5, 50, 500):
+            qs = make_query(count, escaped)
+            declared = {f'field{i}' for i in range(0, count, 10)}
+
+            chain = timeit.timeit(lambda: split_chain(qs), number=number)
+            single = timeit.timeit(lambda: list(scan(qs)), number=number)
+            skipping = timeit.timeit(lambda: list(scan(qs, declared)), number=number)
+
+            print(f'{count:>6} params  split chain {chain / number * 1e6:>9.2f} us'
+                  f'  scan {single / number * 1e6:>9.2f} us'
+                  f'  scan 10% declared {skipping / number * 1e6:>9.2f} us')
+
+    print('raw bytes with large tracking parameters')
+    tracking = '&'.join(f'utm_{i}=' + 'x' * 2000 for i in range(20))
+    raw = f'{tracking}&field1=gte:10&field2=abc'.encode()
+    fields = {'field1', 'field2'}
+    byte_fields = {b'field1': 'field1', b'field2': 'field2'}
+
+    decoded = timeit.timeit(lambda: list(scan(raw.decode(), fields)), number=number)
+    direct = timeit.timeit(lambda: list(scan_bytes(raw, byte_fields)), number=number)
+    print(f'{len(raw):>6} bytes   decode + scan {decoded / number * 1e6:>9.2f} us'
+          f'  scan_bytes {direct / number * 1e6:>9.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""compares the cold start of 500 filter sets defined as classes in a module, as JSON schemas
+built at boot and as a compiled schema artifact, each timed in a fresh interpreter
+
+the class-based module is timed with its bytecode cached, as deployed, and from source. the
+artifact is timed loading every filter set and opening it then looking up 10, as a worker
+serving a few routes would.
+
+run from the repository root: python -m benchmarks.bench_schema [--schemas 500]
+"""
+import argparse
+import json
+import os
+import py_compile
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from operators import ALL, EQUAL
+from schema import FILTER_TYPES, write_artifact
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   'src', 'rest-query-parser')
+
+# the filter types schemas pick from besides delimited
+SIMPLE_TYPES = ('boolean', 'integer', 'float', 'whole_number', 'string', 'date', 'datetime')
+
+SETUP = {
+    'classes (cached bytecode)': 'import endpoints',
+    'classes (from source)': 'import endpoints',
+    'json schemas': 'import schema',
+    'artifact, load all': 'import schema',
+    'artifact, 10 lookups': 'import schema',
+}
+
+WORK = {
+    'classes (cached bytecode)': 'filter_sets = endpoints.load()',
+    'classes (from source)': 'filter_sets = endpoints.load()',
+    'json schemas': 'filter_sets = schema.build_all(schema.read_schemas("schemas.json"))',
+    'artifact, load all': 'filter_sets = schema.Artifact("schemas.bin").load_all()',
+    'artifact, 10 lookups': ('artifact = schema.Artifact("schemas.bin"); '
+                             'filter_sets = [artifact[name] for name in list(artifact)[:10]]'),
+}
+
+# imports the library modules first, so only defining the filter sets is timed
+SCRIPT = '''
+import time
+import filterset, filters
+start = time.perf_counter()
+{setup}
+{work}
+print(time.perf_counter() - start)
+'''
+
+
+def make_schemas(count, seed=0):
+    rng = random.Random(seed)
+    schemas = []
+
+    for i in range(count):
+        fields = {}
+
+        for j in range(rng.randint(4, 12)):
+            kind = rng.choice(SIMPLE_TYPES + ('delimited',))
+            spec = {'type': kind}
+
+            if kind == 'delimited':
+                spec['choices'] = [f'choice{k}' for k in range(rng.randint(2, 8))]
+            elif rng.random() < 0.5:
+                operators = set(rng.sample(ALL, 3)) & set(FILTER_TYPES[kind].operators)
+                spec['operators'] = sorted(operators or {EQUAL})
+
+            if rng.random() < 0.3:
+                spec['allow_null'] = False
+
+            fields[f'field{j}'] = spec
+
+        schemas.append({'name': f'Endpoint{i}FilterSet', 'bases': ['sort', 'pagination'],
+                        'sortable_fields': sorted(fields)[:3], 'max_clauses': 50,
+                        'fields': fields})
+
+    return schemas
+
+
+def _argument(name, value):
+    return f'{name}={value!r}'
+
+
+def make_module(schemas):
+    """the class-based equivalent of the schemas, as a module defining one class per schema"""
+    lines = ['from filters import *', 'from filterset import PaginationFilterSet, SortFilterSet',
+             '', '']
+
+    for schema in schemas:
+        lines.append(f'class {schema["name"]}(SortFilterSet, PaginationFilterSet):')
+        lines.append(f'    sortable_fields = {tuple(schema["sortable_fields"])!r}')
+
+        for field, spec in schema['fields'].items():
+            spec = dict(spec)
+            cls = FILTER_TYPES[spec.pop('type')].__name__
+            arguments = ', '.join(_argument(name, value) for name, value in spec.items())
+            lines.append(f'    {field} = {cls}({arguments})')
+
+        lines.extend(['', ''])
+
+    lines.append('def load():')
+    lines.append('    return {')
+    lines.extend(f'        {schema["name"]!r}: {schema["name"]}(max_clauses=50),'
+                 for schema in schemas)
+    lines.append('    }')
+    return '\n'.join(lines) + '\n'
+
+
+def cold_start(directory, name, runs):
+    script = SCRIPT.format(setup=SETUP[name], work=WORK[name])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join((directory, SRC)),
+               PYTHONDONTWRITEBYTECODE='1')
+
+    if name == 'classes (from source)':
+        # points the interpreter at an empty bytecode cache
+        env['PYTHONPYCACHEPREFIX'] = os.path.join(directory, 'empty')
+
+    timings = []
+
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=directory, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        timings.append(float(output))
+
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_schema')
+    parser.add_argument('--schemas', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    schemas = make_schemas(args.schemas)
+
+    with tempfile.TemporaryDirectory() as directory:
+        module = os.path.join(directory, 'endpoints.py')
+
+        with open(module, 'w') as output:
+            output.write(make_module(schemas))
+
+        py_compile.compile(module)
+
+        with open(os.path.join(directory, 'schemas.json'), 'w') as output:
+            json.dump(schemas, output)
+
+        write_artifact(os.path.join(directory, 'schemas.bin'), schemas)
+
+        print(f'{args.schemas} filter sets, median of {args.runs} fresh interpreters')
+
+        for name in WORK:
+            print(f'    {name:<30} {cold_start(directory, name, args.runs) * 1e3:>8.1f} ms')
+
+        size = os.path.getsize(os.path.join(directory, 'schemas.bin'))
+        print(f'    artifact size {size / 1024:.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
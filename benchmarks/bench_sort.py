@@ -0,0 +1,48 @@
+"""compares heap based top-k selection in sorting.sort_rows with sorted()[:k]
+
+the mixed direction baseline is the stable one-sort-per-field full sort
+
+run from the repository root: python -m benchmarks.bench_sort
+"""
+import random
+import time
+
+from constants import ASCENDING, DESCENDING
+from sorting import sort_rows
+
+
+ORDERINGS = {
+    'age': (('age', ASCENDING),),
+    '-age,name': (('age', DESCENDING), ('name', ASCENDING)),
+}
+
+
+def best_of(function, repeat=3):
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    rng = random.Random(0)
+
+    for count in (10000, 100000, 1000000):
+        rows = [{'name': f'Person {rng.randint(1, 5000)}', 'age': rng.randint(18, 90)}
+                for _ in range(count)]
+        print(f'{count} rows')
+
+        for label, ordering in ORDERINGS.items():
+            for k in (10, 100, 1000):
+                full = best_of(lambda: sort_rows(rows, ordering)[:k])
+                top = best_of(lambda: sort_rows(rows, ordering, limit=k))
+                print(f'  sort={label:<10} k={k:<5} sorted()[:k] {full * 1e3:>9.2f} ms'
+                      f'  top-k {top * 1e3:>9.2f} ms  {full / top:>5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""measures SQL compile overhead and statement reuse over a sqlite3 table
+
+run from the repository root: python -m benchmarks.bench_sql
+"""
+import random
+import sqlite3
+import time
+
+from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter
+from filterset import PaginationFilterSet
+from sql import SQLCompiler
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter()
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+
+
+def make_queries(count, seed=0):
+    rng = random.Random(seed)
+    queries = []
+
+    for _ in range(count):
+        parts = [f'age=gt:{rng.randint(18, 80)}']
+
+        if rng.random() < 0.5:
+            parts.append(f'weight=lte:{rng.uniform(50, 150):.1f}')
+
+        if rng.random() < 0.5:
+            names = ','.join(f'Person {rng.randint(1, 500)}' for _ in range(rng.randint(1, 12)))
+            parts.append(f'name=in:{names}')
+
+        parts.append(f'limit={rng.randint(1, 50)}')
+        rng.shuffle(parts)
+        queries.append('&'.join(parts))
+
+    return queries
+
+
+def main(count=20000):
+    filter_set = PersonFilterSet()
+    rng = random.Random(1)
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE people (name TEXT, age INTEGER, weight REAL, divorced INT)')
+    connection.executemany('INSERT INTO people VALUES (?, ?, ?, ?)', [
+        (f'Person {rng.randint(1, 500)}', rng.randint(18, 90), rng.uniform(40, 150),
+         rng.random() < 0.3) for _ in range(20000)])
+    connection.execute('CREATE INDEX people_age ON people (age)')
+
+    parsed = [filter_set.parse(qs) for qs in make_queries(count)]
+    compiler = SQLCompiler()
+
+    start = time.perf_counter()
+    statements = [compiler.compile(filter_set, p) for p in parsed]
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+
+    for sql, params in statements:
+        connection.execute(f'SELECT name FROM people {sql}', params).fetchall()
+
+    execute_time = time.perf_counter() - start
+    info = compiler.cache_info()
+
+    print(f'{count} queries, {info.currsize} distinct statements')
+    print(f'compile  {compile_time / count * 1e6:>8.2f} us/query')
+    print(f'execute  {execute_time / count * 1e6:>8.2f} us/query')
+    print(f'statement reuse rate {info.hits / (info.hits + info.misses):.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""measures parse throughput of one FilterSet shared by 1 to 32 threads, without a parse cache,
+with one LRUCache lock and with the sharded cache FilterSet uses for large sizes
+
+on a GIL build threads take turns, so throughput stays flat at best; on a free-threaded build
+(python3.13t and later) it should grow with the number of cores.
+
+run from the repository root: python -m benchmarks.bench_threads
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+from benchmarks.bench_filterset import PersonFilterSet
+from cache import LRUCache
+
+
+def make_queries(count, distinct, seed=0):
+    rng = random.Random(seed)
+    pool = [f'name=Person {rng.randint(1, 500)}&age=gt:{rng.randint(18, 80)}'
+            f'&weight=lt:{rng.uniform(50, 150):.1f}&limit={rng.randint(1, 50)}'
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def filter_sets():
+    single = PersonFilterSet(cache_size=4096)
+    # swapped in behind the frozen instance purely to compare against a single lock
+    object.__setattr__(single, '_cache', LRUCache(4096))
+
+    return {
+        'no cache': PersonFilterSet(),
+        'single lock cache': single,
+        'sharded cache': PersonFilterSet(cache_size=4096),
+    }
+
+
+def throughput(filter_set, queries, threads):
+    chunk = len(queries) // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def work(part):
+        barrier.wait()
+
+        for qs in part:
+            filter_set.parse(qs)
+
+    workers = [threading.Thread(target=work, args=(queries[i * chunk:(i + 1) * chunk],))
+               for i in range(threads)]
+
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for worker in workers:
+        worker.join()
+
+    return chunk * threads / (time.perf_counter() - start)
+
+
+def main(count=64000):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'python {sys.version.split()[0]}, GIL {"enabled" if gil else "disabled"}, '
+          f'{os.cpu_count()} cpus, {count} parses per run')
+    queries = make_queries(count, 2000)
+
+    for name, filter_set in filter_sets().items():
+        print(name)
+
+        for qs in queries:
+            filter_set.parse(qs)
+
+        for threads in (1, 2, 4, 8, 16, 32):
+            rate = throughput(filter_set, queries, threads)
+            print(f'  {threads:>2} threads {rate:>12,.0f} parses/s')
+
+
+if __name__ == '__main__':
+    main()
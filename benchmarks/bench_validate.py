@@ -0,0 +1,38 @@
+"""compares passive parsing of garbage values through validate with catching parse exceptions
+
+run from the repository root: python -m benchmarks.bench_validate
+"""
+import timeit
+
+from exceptions import FilterException
+from filters import BooleanFilter, FloatFilter, IntegerFilter, WholeNumberFilter
+
+from benchmarks.bench_filterset import PersonFilterSet
+
+
+GARBAGE = ['notanumber', "1' OR '1'='1", '../../etc/passwd', '%00', '-', 'maybe']
+
+
+def catching(f, value):
+    try:
+        return f.parse(value)
+    except FilterException:
+        return None
+
+
+def main(number=20000):
+    for cls in (IntegerFilter, FloatFilter, BooleanFilter, WholeNumberFilter):
+        f = cls()
+        raising = timeit.timeit(lambda: [catching(f, v) for v in GARBAGE], number=number)
+        validating = timeit.timeit(lambda: [f.validate(v) for v in GARBAGE], number=number)
+        print(f'{cls.__name__:<20} parse+except {raising / number / len(GARBAGE) * 1e9:>8.0f} ns'
+              f'  validate {validating / number / len(GARBAGE) * 1e9:>8.0f} ns')
+
+    qs = '&'.join(f'{field}={value}' for field in ('age', 'weight', 'divorced')
+                  for value in GARBAGE)
+    elapsed = timeit.timeit(lambda: PersonFilterSet().parse(qs), number=number)
+    print(f'passive parse of {qs.count("&") + 1} garbage clauses {elapsed / number * 1e6:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""benchmark suite for the parse path: every filter type, strict and passive filter sets and a
+set of reproducible synthetic query corpora
+
+run from the repository root:
+
+    python -m benchmarks.suite run --output current.json [--quick] [--only parse:]
+    python -m benchmarks.suite compare baseline.json current.json [--threshold 0.1]
+
+run writes per benchmark latency (median and p95 of the per-call time over several samples),
+throughput and the peak memory allocated while parsing one pass of the corpus. compare exits
+with status 1 when a benchmark got slower, or allocates more, than threshold allows.
+"""
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from cursors import encode_cursor
+from exceptions import FilterException
+from filters import (BooleanFilter, CursorFilter, DateFilter, DateTimeFilter, DelimitedSetFilter,
+                     FloatFilter, IntegerFilter, SortFilter, StringFilter, WholeNumberFilter)
+from filterset import PaginationFilterSet, SortFilterSet
+from operators import ALL, IN, NOT_IN
+
+
+FORMAT_VERSION = 1
+
+SECRET = b'suite'
+
+
+class SuiteFilterSet(SortFilterSet, PaginationFilterSet):
+    sortable_fields = ('name', 'age', 'weight')
+
+    name = StringFilter(allow_null=False)
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+    children = WholeNumberFilter()
+    tags = DelimitedSetFilter(choices=[f'tag{i}' for i in range(50)])
+    after = CursorFilter(SECRET)
+
+
+def _name(rng):
+    return ''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(3, 12)))
+
+
+def _garbage(rng, size):
+    alphabet = string.ascii_letters + string.digits + '%&=:,+-._~!'
+    return ''.join(rng.choice(alphabet) for _ in range(size))
+
+
+# one generator per clause kind, valid values only
+CLAUSES = {
+    'name': lambda rng: f'name={_name(rng)}',
+    'age': lambda rng: f'age={rng.choice(("gt:", "lte:", ""))}{rng.randint(0, 99)}',
+    'weight': lambda rng: f'weight=lt:{rng.uniform(40, 150):.2f}',
+    'divorced': lambda rng: f'divorced={rng.choice(("true", "false", "null"))}',
+    'children': lambda rng: f'children={rng.randint(0, 6)}',
+    'tags': lambda rng: 'tags=' + ','.join(f'tag{rng.randint(0, 49)}'
+                                           for _ in range(rng.randint(1, 5))),
+    'sort': lambda rng: 'sort=' + ','.join(rng.sample(('-age', 'name', 'weight'), 2)),
+    'limit': lambda rng: f'limit={rng.randint(1, 100)}',
+    'offset': lambda rng: f'offset={rng.randint(0, 1000)}',
+    'after': lambda rng: f'after={encode_cursor([rng.randint(0, 10 ** 6)], SECRET)}',
+}
+
+
+def _short(rng):
+    return '&'.join(CLAUSES[field](rng) for field in rng.sample(('name', 'age', 'limit'), 2))
+
+
+def _long(rng):
+    fields = list(CLAUSES) + ['utm_source', 'utm_campaign', 'session']
+    parts = [CLAUSES[field](rng) if field in CLAUSES else f'{field}={_garbage(rng, 40)}'
+             for field in fields]
+    rng.shuffle(parts)
+    return '&'.join(parts)
+
+
+def _garbage_query(rng):
+    return _garbage(rng, rng.randint(20, 200))
+
+
+def _invalid(rng):
+    # declared fields with values or operators their filters reject
+    parts = [f'age={_name(rng)}', f'weight=gt:{_name(rng)}', 'divorced=maybe',
+             f'name={rng.choice(ALL[1:])}:x', 'tags=nope', 'sort=-password', 'after=forged']
+    return '&'.join(rng.sample(parts, 3))
+
+
+def _few_fields(rng):
+    return CLAUSES[rng.choice(('age', 'name'))](rng)
+
+
+def _many_fields(rng):
+    return '&'.join(CLAUSES[field](rng) for field in CLAUSES)
+
+
+def _in_heavy(rng):
+    ages = ','.join(str(rng.randint(0, 99)) for _ in range(rng.randint(20, 200)))
+    names = ','.join(_name(rng) for _ in range(rng.randint(20, 100)))
+    return f'age={IN}:{ages}&name={NOT_IN}:{names}&limit=10'
+
+
+SHAPES = {
+    'short': _short,
+    'long': _long,
+    'garbage': _garbage_query,
+    'invalid': _invalid,
+    'few_fields': _few_fields,
+    'many_fields': _many_fields,
+    'in_heavy': _in_heavy,
+}
+
+
+def corpus(shape, size=500, seed=0):
+    """a reproducible list of query strings of one shape"""
+    rng = random.Random(f'{shape}:{seed}')
+    return [SHAPES[shape](rng) for _ in range(size)]
+
+
+# valid and invalid raw values per filter; the invalid ones exercise the rejection path
+FILTER_VALUES = {
+    'BooleanFilter': (BooleanFilter(), ['true', 'no', 'NULL', ' 1 '], ['maybe', '2']),
+    'IntegerFilter': (IntegerFilter(), ['42', '-7', '1234567', 'null'], ['4x2', '1.5']),
+    'FloatFilter': (FloatFilter(), ['4.2', '-7', '1e3', 'null'], ['four', '1,5']),
+    'WholeNumberFilter': (WholeNumberFilter(), ['0', '42', '99999'], ['-1', 'x']),
+    'StringFilter': (StringFilter(), ['Ron Swanson', 'x', 'null'], []),
+    'DelimitedSetFilter': (SuiteFilterSet._filters['tags'], ['tag1,tag2', 'tag3', ''],
+                           ['tag1,nope']),
+    'SortFilter': (SortFilter(choices=('name', 'age')), ['-age,name', 'name'], ['-password']),
+    'CursorFilter': (CursorFilter(SECRET), [encode_cursor([1, 'x'], SECRET)], ['forged']),
+    'DateFilter': (DateFilter(), ['2024-01-31', '2024-01-31T12:00:00Z', '1706659200', 'null'],
+                   ['2024-13-01', 'yesterday']),
+    'DateTimeFilter': (DateTimeFilter(), ['2024-01-31T12:00:00Z', '2024-01-31T12:00:00.25+01:00',
+                                          '1706702400', 'Wed, 31 Jan 2024 12:00:00 GMT'],
+                       ['2024-01-31T25:00:00Z', 'soon']),
+}
+
+
+def _filter_call(f, values, strict):
+    if not strict:
+        validate = f.validate
+        return lambda: [validate(value) for value in values]
+
+    parse = f.parse
+
+    def call():
+        for value in values:
+            try:
+                parse(value)
+            except Exception:
+                pass
+
+    return call
+
+
+def _parse_call(filter_set, queries):
+    parse = filter_set.parse
+
+    def call():
+        for qs in queries:
+            try:
+                parse(qs)
+            except FilterException:
+                pass
+
+    return call
+
+
+def benchmarks(size):
+    """yields (name, callable, number of operations per call)"""
+    passive = SuiteFilterSet()
+    strict = SuiteFilterSet(strict=True)
+
+    for shape in SHAPES:
+        queries = corpus(shape, size)
+        encoded = [qs.encode('ascii') for qs in queries]
+
+        for mode, filter_set in (('passive', passive), ('strict', strict)):
+            yield f'parse:{shape}:{mode}', _parse_call(filter_set, queries), len(queries)
+
+        yield f'parse:{shape}:bytes', _parse_call(passive, encoded), len(encoded)
+
+    for name, (f, valid, invalid) in FILTER_VALUES.items():
+        values = (valid + invalid) * 20
+
+        for mode in ('passive', 'strict'):
+            yield f'filter:{name}:{mode}', _filter_call(f, values, mode == 'strict'), len(values)
+
+
+def measure(call, operations, samples=7, min_time=0.05):
+    """times call over several samples, returning per operation statistics"""
+    call()
+    repeat = 1
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+
+    if elapsed < min_time:
+        repeat = int(min_time / max(elapsed, 1e-9)) + 1
+
+    timings = []
+
+    for _ in range(samples):
+        start = time.perf_counter()
+
+        for _ in range(repeat):
+            call()
+
+        timings.append((time.perf_counter() - start) / (repeat * operations))
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ns': median * 1e9,
+        'p95_ns': timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e9,
+        'ops_per_sec': 1 / median,
+        'peak_bytes': peak,
+    }
+
+
+def run(args):
+    size = 50 if args.quick else args.size
+    samples = 3 if args.quick else args.samples
+    results = {}
+
+    for name, call, operations in benchmarks(size):
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+
+        results[name] = stats = measure(call, operations, samples)
+        print(f'{name:<40} {stats["median_ns"] / 1e3:>9.2f} us'
+              f'  p95 {stats["p95_ns"] / 1e3:>9.2f} us  {stats["ops_per_sec"]:>12,.0f} op/s'
+              f'  peak {stats["peak_bytes"] / 1024:>8.1f} KiB')
+
+    report = {
+        'version': FORMAT_VERSION,
+        'meta': {
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'corpus_size': size,
+            'samples': samples,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    return 0
+
+
+def compare(baseline, current, threshold=0.1, memory_threshold=0.25):
+    """(name, metric, baseline, current, relative change) for each regression past a threshold"""
+    regressions = []
+
+    for name, stats in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+
+        if base is None:
+            continue
+
+        for metric, limit in (('median_ns', threshold), ('peak_bytes', memory_threshold)):
+            before, after = base[metric], stats[metric]
+
+            if before and (after - before) / before > limit:
+                regressions.append((name, metric, before, after, (after - before) / before))
+
+    return regressions
+
+
+def _load(path):
+    with open(path) as source:
+        report = json.load(source)
+
+    if report.get('version') != FORMAT_VERSION:
+        raise SystemExit(f'{path}: unsupported results version {report.get("version")}')
+
+    return report
+
+
+def run_compare(args):
+    baseline, current = _load(args.baseline), _load(args.current)
+    regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+
+    for name in sorted(set(current['results']) - set(baseline['results'])):
+        print(f'new       {name}')
+
+    for name, metric, before, after, change in regressions:
+        print(f'REGRESSED {name:<40} {metric:<10} {before:>14,.1f} -> {after:>14,.1f} '
+              f'({change:+.1%})')
+
+    if not regressions:
+        print('no regressions')
+
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help='run the suite')
+    run_parser.add_argument('--output', help='write results to this JSON file')
+    run_parser.add_argument('--size', type=int, default=500, help='queries per corpus')
+    run_parser.add_argument('--samples', type=int, default=7)
+    run_parser.add_argument('--quick', action='store_true', help='small corpora, few samples')
+    run_parser.add_argument('--only', action='append', metavar='PREFIX',
+                            help='run benchmarks whose name starts with PREFIX, repeatable')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='allowed relative latency increase')
+    compare_parser.add_argument('--memory-threshold', type=float, default=0.25,
+                                help='allowed relative peak memory increase')
+    compare_parser.set_defaults(handler=run_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
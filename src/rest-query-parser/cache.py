@@ -0,0 +1,128 @@
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """bounded mapping that evicts the least recently used entry once maxsize is reached
+
+    safe to share between threads: every operation holds the cache's own lock.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive integer')
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            data = self._data
+            data[key] = value
+            data.move_to_end(key)
+
+            if len(data) > self.maxsize:
+                data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize,
+                             len(self._data))
+
+
+class ShardedLRUCache:
+    """an LRUCache split by key hash into independently locked shards, so threads looking up
+    different keys rarely wait on each other
+
+    each shard evicts its own least recently used entry, which approximates one LRU order over
+    maxsize entries. info adds up the shards.
+    """
+
+    def __init__(self, maxsize=128, shards=16):
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive integer')
+
+        shards = max(1, min(shards, maxsize))
+        self.maxsize = maxsize
+        # shard sizes differ by at most one and add up to maxsize
+        self._shards = tuple(LRUCache(maxsize // shards + (i < maxsize % shards))
+                             for i in range(shards))
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def __len__(self):
+        return sum(map(len, self._shards))
+
+    def __contains__(self, key):
+        return key in self._shard(key)
+
+    def get(self, key, default=None):
+        return self._shard(key).get(key, default)
+
+    def put(self, key, value):
+        self._shard(key).put(key, value)
+
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
+
+    def info(self):
+        infos = [shard.info() for shard in self._shards]
+        return CacheInfo(sum(i.hits for i in infos), sum(i.misses for i in infos),
+                         sum(i.evictions for i in infos), self.maxsize,
+                         sum(i.currsize for i in infos))
+
+
+def make_cache(maxsize, shard_size=64):
+    """an LRUCache for small sizes, where exact LRU order matters more than contention, and a
+    ShardedLRUCache of roughly shard_size entries per shard, up to 16 shards, otherwise
+    """
+    shards = min(16, maxsize // shard_size)
+
+    if shards < 2:
+        return LRUCache(maxsize)
+
+    return ShardedLRUCache(maxsize, shards)
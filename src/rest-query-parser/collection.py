@@ -0,0 +1,304 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from operator import itemgetter
+
+from constants import ASCENDING, DESCENDING
+from filters import NumericFilter, TemporalFilter
+from filterset import CursorPaginationFilterSet
+from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
+                       LESS_THAN, LESS_THAN_OR_EQUAL)
+from predicates import compile_predicate
+from sorting import sort_rows
+
+
+HASHED = frozenset((EQUAL, NOT_EQUAL, IN, NOT_IN))
+
+RANGES = frozenset((GREATER_THAN, GREATER_THAN_OR_EQUAL, LESS_THAN, LESS_THAN_OR_EQUAL))
+
+
+class SortedIndex:
+    """row ids ordered by a numeric or temporal field, answering range clauses with bisect"""
+
+    def __init__(self):
+        self.keys = []
+        self.ids = []
+
+    def add(self, value, row_id):
+        if value is None:
+            # nulls never satisfy a range clause
+            return
+
+        position = self.position(value)
+        self.keys.insert(position, value)
+        self.ids.insert(position, row_id)
+
+    def position(self, value):
+        """where add would insert value; raises TypeError for a value not comparable to the keys"""
+        return bisect_right(self.keys, value)
+
+    def merged(self, pairs):
+        """the (keys, ids) lists holding (value, row id) pairs too, sorted once, leaving the
+        index itself unchanged until they are assigned back
+        """
+        merged = list(zip(self.keys, self.ids))
+        merged.extend(pair for pair in pairs if pair[0] is not None)
+        merged.sort(key=itemgetter(0))
+        return [value for value, _ in merged], [row_id for _, row_id in merged]
+
+    def add_many(self, pairs):
+        """adds (value, row id) pairs with one sort instead of an insertion per pair"""
+        self.keys, self.ids = self.merged(pairs)
+
+    def remove(self, value, row_id):
+        if value is None:
+            return
+
+        position = self.ids.index(row_id, bisect_left(self.keys, value),
+                                  bisect_right(self.keys, value))
+        del self.keys[position], self.ids[position]
+
+    def bounds(self, operator, value):
+        """the (start, stop) slice of ids satisfying one range clause"""
+        if value is None:
+            return 0, 0
+        elif operator == GREATER_THAN:
+            return bisect_right(self.keys, value), len(self.ids)
+        elif operator == GREATER_THAN_OR_EQUAL:
+            return bisect_left(self.keys, value), len(self.ids)
+        elif operator == LESS_THAN:
+            return 0, bisect_left(self.keys, value)
+
+        return 0, bisect_right(self.keys, value)
+
+    def select(self, operator, value):
+        start, stop = self.bounds(operator, value)
+        return self.ids[start:stop]
+
+
+class FilteredCollection:
+    """an in-memory list of records answering FilterSet queries from indexes
+
+    hash indexes are kept for fields whose filter allows eq/neq/in/nin and sorted indexes for
+    numeric and temporal fields allowing range operators. a query intersects the row ids
+    selected by its indexed eq, in and range clauses and tests only those rows against the
+    remaining clauses.
+    limit and offset, when the filter set declares them, are applied while iterating, after
+    ordering the matches by sort when it is a SortFilterSet. a CursorPaginationFilterSet pages
+    by its after/before cursors instead, in cursor key order.
+    records are mappings, or objects read by attribute when attribute is true.
+    """
+
+    def __init__(self, filter_set, records=(), attribute=False):
+        if isinstance(filter_set, type):
+            filter_set = filter_set()
+
+        self.filter_set = filter_set
+        self.attribute = attribute
+        self._records = {}
+        self._next_id = 0
+        self._hashed = {}
+        self._sorted = {}
+
+        for field, f in filter_set._filters.items():
+            if field in filter_set.control_fields:
+                continue
+
+            if HASHED.intersection(f.operators):
+                self._hashed[field] = {}
+
+            if isinstance(f, (NumericFilter, TemporalFilter)) and RANGES.intersection(f.operators):
+                self._sorted[field] = SortedIndex()
+
+        self.extend(records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def _value(self, record, field):
+        if self.attribute:
+            return getattr(record, field, None)
+
+        return record.get(field)
+
+    def _group(self, records, ids):
+        # the row ids to add to each hash index by value; hashing every value up front raises
+        # TypeError for an unhashable one before the collection is changed
+        groups = {field: {} for field in self._hashed}
+
+        for row_id, record in zip(ids, records):
+            for field, group in groups.items():
+                group.setdefault(self._value(record, field), []).append(row_id)
+
+        return groups
+
+    def _commit(self, records, ids, groups):
+        self._records.update(zip(ids, records))
+        self._next_id = ids.stop
+
+        for field, group in groups.items():
+            index = self._hashed[field]
+
+            for value, row_ids in group.items():
+                index.setdefault(value, set()).update(row_ids)
+
+    def insert(self, record):
+        """adds a record, updating every index, and returns its row id
+
+        a value that cannot be indexed, unhashable or not comparable to the values of the
+        other records, raises TypeError and leaves the collection unchanged.
+        """
+        ids = range(self._next_id, self._next_id + 1)
+        groups = self._group((record,), ids)
+        positions = {}
+
+        for field, index in self._sorted.items():
+            value = self._value(record, field)
+
+            if value is not None:
+                positions[field] = (index.position(value), value)
+
+        self._commit((record,), ids, groups)
+
+        for field, (position, value) in positions.items():
+            index = self._sorted[field]
+            index.keys.insert(position, value)
+            index.ids.insert(position, ids[0])
+
+        return ids[0]
+
+    def extend(self, records):
+        """adds many records, sorting each range index once rather than per record
+
+        like insert, either every record is added or, on TypeError, none is.
+        """
+        records = list(records)
+        ids = range(self._next_id, self._next_id + len(records))
+        groups = self._group(records, ids)
+        merged = {field: index.merged((self._value(record, field), row_id)
+                                      for row_id, record in zip(ids, records))
+                  for field, index in self._sorted.items()}
+
+        self._commit(records, ids, groups)
+
+        for field, (keys, row_ids) in merged.items():
+            index = self._sorted[field]
+            index.keys, index.ids = keys, row_ids
+
+        return ids
+
+    def delete(self, row_id):
+        """removes the record with the given row id from the collection and its indexes"""
+        record = self._records.pop(row_id)
+
+        for field, index in self._hashed.items():
+            value = self._value(record, field)
+            ids = index[value]
+            ids.discard(row_id)
+
+            if not ids:
+                del index[value]
+
+        for field, index in self._sorted.items():
+            index.remove(self._value(record, field), row_id)
+
+        return record
+
+    def query(self, parsed):
+        """returns the matching records, in insertion order unless sorted, for a parse result or
+        query string
+        """
+        if not isinstance(parsed, tuple):
+            parsed = self.filter_set.parse(parsed)
+
+        return list(self.iter_query(parsed))
+
+    def iter_query(self, parsed):
+        control = self.filter_set.control_fields
+        controls = {}
+        selections = []
+        residual = []
+        ranges = {}
+
+        for clause in parsed:
+            field, operator, value = clause.values()
+
+            if field in control:
+                # limit, offset, sort and cursors
+                controls[field] = value
+                continue
+
+            if operator in RANGES and field in self._sorted:
+                # range clauses on one field narrow a single slice of its sorted index
+                start, stop = self._sorted[field].bounds(operator, value)
+                lower, upper = ranges.get(field, (start, stop))
+                ranges[field] = (max(start, lower), min(stop, upper))
+                continue
+
+            selection = self._select(field, operator, value)
+
+            if selection is None:
+                residual.append(clause)
+            else:
+                selections.append(selection)
+
+        for field, (start, stop) in ranges.items():
+            selections.append(self._sorted[field].ids[start:stop])
+
+        rows = self._candidates(selections)
+
+        if residual:
+            # read fields like the indexes do, a record lacking one holds None
+            predicate = compile_predicate(residual, attribute=self.attribute, missing=True)
+            rows = filter(predicate, rows)
+
+        limit, offset, ordering = (controls.get('limit'), controls.get('offset'),
+                                   controls.get('sort'))
+
+        if isinstance(self.filter_set, CursorPaginationFilterSet):
+            return self._keyset_page(rows, parsed, controls, limit)
+
+        if ordering:
+            return iter(sort_rows(rows, ordering, limit, offset, self.attribute))
+
+        return islice(rows, offset or 0, None if limit is None else (offset or 0) + limit)
+
+    def _keyset_page(self, rows, parsed, controls, limit):
+        """the page of a cursor paginated filter set: the first limit rows past its cursors in
+        cursor key order, or for a before cursor alone the last limit rows before it
+        """
+        filter_set = self.filter_set
+        rows = filter(filter_set.keyset_predicate(parsed, self.attribute), rows)
+        backwards = 'before' in controls and 'after' not in controls
+        direction = DESCENDING if backwards else ASCENDING
+        page = sort_rows(rows, [(key, direction) for key in filter_set.cursor_keys], limit,
+                         attribute=self.attribute)
+        return iter(page[::-1] if backwards else page)
+
+    def _select(self, field, operator, value):
+        """row ids satisfying an eq or in clause from a hash index, or None without one"""
+        if operator == EQUAL and field in self._hashed:
+            return self._hashed[field].get(value, ())
+        elif operator == IN and field in self._hashed:
+            index = self._hashed[field]
+            return set().union(*(index.get(v, ()) for v in value))
+
+        return None
+
+    def _candidates(self, selections):
+        if not selections:
+            return iter(self._records.values())
+
+        selections = sorted(selections, key=len)
+        ids = set(selections[0])
+
+        for selection in selections[1:]:
+            if not ids:
+                break
+
+            ids.intersection_update(selection)
+
+        records = self._records
+        return (records[row_id] for row_id in sorted(ids))
@@ -0,0 +1,101 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
+                       LESS_THAN, LESS_THAN_OR_EQUAL)
+
+
+COMPARISONS = {
+    EQUAL: 'equal',
+    NOT_EQUAL: 'not_equal',
+    GREATER_THAN: 'greater',
+    GREATER_THAN_OR_EQUAL: 'greater_equal',
+    LESS_THAN: 'less',
+    LESS_THAN_OR_EQUAL: 'less_equal',
+}
+
+
+def evaluate(parsed, table, filter_set=None):
+    """returns a numpy boolean mask of the rows of a columnar table matching every clause
+
+    table maps field names to equally long numpy arrays (or sequences). nulls are NaN in float
+    columns and None in object columns; they are found from the column dtype, as a filter
+    disallowing null only keeps clients from sending it, not the data from holding it. given
+    the filter set that produced parsed, its control fields are skipped.
+    """
+    if np is None:
+        raise ImportError('columnar evaluation requires numpy')
+
+    columns = {}
+    mask = None
+
+    for field, operator, value in (clause.values() for clause in parsed):
+        if filter_set is not None and field in filter_set.control_fields:
+            continue
+
+        entry = columns.get(field)
+
+        if entry is None:
+            column = np.asarray(table[field])
+            entry = columns[field] = (column, _null_mask(column))
+
+        clause = _clause_mask(*entry, operator, value)
+        mask = clause if mask is None else np.logical_and(mask, clause, out=mask)
+
+    if mask is None:
+        length = len(next(iter(table.values()))) if table else 0
+        mask = np.ones(length, dtype=bool)
+
+    return mask
+
+
+def _null_mask(column):
+    """True where the column holds null, or None when the column cannot hold null"""
+    if column.dtype.kind == 'f':
+        return np.isnan(column)
+    elif column.dtype.kind == 'O':
+        return np.equal(column, None)
+
+    return None
+
+
+def _clause_mask(column, nulls, operator, value):
+    if operator in (IN, NOT_IN):
+        mask = _in_mask(column, value, nulls)
+        return np.logical_not(mask, out=mask) if operator == NOT_IN else mask
+
+    if value is None:
+        if operator not in (EQUAL, NOT_EQUAL):
+            # ordering against null matches nothing
+            return np.zeros(len(column), dtype=bool)
+
+        mask = nulls.copy() if nulls is not None else np.zeros(len(column), dtype=bool)
+        return np.logical_not(mask, out=mask) if operator == NOT_EQUAL else mask
+
+    compare = getattr(np, COMPARISONS[operator])
+
+    if nulls is None or column.dtype.kind == 'f':
+        # NaN already compares false, except for not_equal where null != value holds
+        return compare(column, value)
+
+    mask = np.zeros(len(column), dtype=bool) if operator != NOT_EQUAL else nulls.copy()
+    present = ~nulls
+    mask[present] = compare(column[present], value)
+    return mask
+
+
+def _in_mask(column, values, nulls):
+    values = list(values)
+    has_null = None in values
+
+    if has_null:
+        values = [v for v in values if v is not None]
+
+    mask = np.isin(column, values) if values else np.zeros(len(column), dtype=bool)
+
+    if has_null and nulls is not None:
+        mask |= nulls
+
+    return mask
@@ -5,3 +5,7 @@ TRUTHY_VALUES = ('1', 'true', 'yes')
 FALSY_VALUES = ('0', 'false', 'no')
 
 NULL_VALUES = ('none', 'null')
+
+ASCENDING = 'asc'
+
+DESCENDING = 'desc'
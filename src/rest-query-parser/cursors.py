@@ -0,0 +1,64 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from datetime import date, datetime
+
+
+# tags of the sort key values json has no type for, as {tag: isoformat} objects
+_DATETIME = '$dt'
+_DATE = '$d'
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {_DATETIME: value.isoformat()}
+    elif isinstance(value, date):
+        return {_DATE: value.isoformat()}
+
+    raise TypeError(f'cannot put {type(value).__name__} values into a cursor')
+
+
+def _tagged(value):
+    if value.keys() == {_DATETIME}:
+        return datetime.fromisoformat(value[_DATETIME])
+    elif value.keys() == {_DATE}:
+        return date.fromisoformat(value[_DATE])
+
+    return value
+
+
+def _sign(payload, secret, digest_size):
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:digest_size]
+
+
+def encode_cursor(values, secret, digest_size=8):
+    """packs json-serializable sort key values, dates and datetimes included, into an opaque,
+    signed, url safe token
+    """
+    payload = json.dumps(list(values), separators=(',', ':'), default=_default).encode('utf-8')
+    token = base64.urlsafe_b64encode(_sign(payload, secret, digest_size) + payload)
+    return token.rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token, secret, digest_size=8):
+    """returns the tuple of values packed by encode_cursor, or None if the token was tampered
+    with or is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+    signature, payload = raw[:digest_size], raw[digest_size:]
+
+    if not hmac.compare_digest(signature, _sign(payload, secret, digest_size)):
+        return None
+
+    try:
+        values = json.loads(payload, object_hook=_tagged)
+    except (TypeError, ValueError):
+        return None
+
+    return tuple(values) if isinstance(values, list) else None
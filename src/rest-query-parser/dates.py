@@ -0,0 +1,112 @@
+import re
+import sys
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+UTC = timezone.utc
+
+# fromisoformat takes a 'Z' suffix and any number of fraction digits from python 3.11 on
+_ISO_ZULU = sys.version_info >= (3, 11)
+
+# the fraction of seconds following HH:MM:SS
+_FRACTION = re.compile(r'[.,](\d+)')
+
+
+def _is_epoch(text):
+    return text.lstrip('-').replace('.', '', 1).isdigit()
+
+
+def _to_utc(parsed):
+    if parsed.tzinfo is None:
+        # naive values are taken to be in UTC already
+        return parsed.replace(tzinfo=UTC)
+    elif parsed.tzinfo is UTC:
+        return parsed
+
+    return parsed.astimezone(UTC)
+
+
+def _legacy_iso(text):
+    # before python 3.11 fromisoformat takes neither a 'Z' suffix nor fractions of other than 3
+    # or 6 digits, so those are rewritten into the +00:00 offset and microseconds
+    if text[-1:] in ('Z', 'z'):
+        text = text[:-1] + '+00:00'
+
+    fraction = _FRACTION.match(text, 19)
+
+    if fraction is not None:
+        digits = fraction.group(1)[:6].ljust(6, '0')
+        text = f'{text[:19]}.{digits}{text[fraction.end():]}'
+
+    return text
+
+
+def _fromisoformat(text):
+    if not _ISO_ZULU:
+        text = _legacy_iso(text)
+
+    try:
+        return _to_utc(datetime.fromisoformat(text))
+    except ValueError:
+        return None
+
+
+def _parse_iso(text):
+    if len(text) > 19 and text[-6] == ' ':
+        # an unescaped '+' of a positive offset arrives as a space once the query is decoded
+        text = f'{text[:-6]}+{text[-5:]}'
+
+    return _fromisoformat(text)
+
+
+def _parse_epoch(text):
+    try:
+        return datetime.fromtimestamp(float(text), UTC)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(text):
+    """parses an ISO-8601 datetime or date, epoch seconds or an RFC 2822 date into an aware UTC
+    datetime, or None if text is none of them
+
+    values made of digits only, with an optional sign and fraction, are epoch seconds. values
+    in the fixed YYYY-MM-DD layout go straight to the C level datetime.fromisoformat; recent
+    literals are memoized since dashboards keep sending the same range boundaries.
+    """
+    if text[4:5] == '-':
+        parsed = _parse_iso(text)
+
+        if parsed is not None:
+            return parsed
+    elif _is_epoch(text):
+        return _parse_epoch(text)
+
+    # lower case separators are valid ISO-8601 but rejected by fromisoformat
+    parsed = _fromisoformat(text.upper())
+
+    if parsed is not None:
+        return parsed
+
+    try:
+        return _to_utc(parsedate_to_datetime(text))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    """parses YYYY-MM-DD, or anything parse_datetime accepts taken as its UTC date, into a date,
+    or None
+    """
+    if len(text) == 10:
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            pass
+
+    parsed = parse_datetime(text)
+    return parsed.date() if parsed is not None else None
@@ -31,3 +31,56 @@ class InvalidWholeNumberException(FilterException):
 class InvalidOperatorException(FilterException):
     """raised when input is not an expected operator"""
     pass
+
+
+class MultipleFilterException(FilterException):
+    """raised by a filter set collecting errors; errors holds (field, exception) pairs"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class TooManyValuesException(FilterException):
+    """raised when a list of values is longer than allowed"""
+    pass
+
+
+class InvalidChoiceException(FilterException):
+    """raised when input is not one of the allowed choices"""
+    pass
+
+
+class InvalidCursorException(FilterException):
+    """raised when input is not a valid, untampered pagination cursor"""
+    pass
+
+
+class QueryTooLongException(FilterException):
+    """raised when a query string is longer than the filter set accepts"""
+    pass
+
+
+class TooManyClausesException(FilterException):
+    """raised when a query, or one of its fields, has more clauses than allowed"""
+    pass
+
+
+class NumberTooLongException(FilterException):
+    """raised when a numeric literal is longer than allowed"""
+    pass
+
+
+class InvalidDateException(FilterException):
+    """raised when input is not an expected date value"""
+    pass
+
+
+class InvalidDateTimeException(FilterException):
+    """raised when input is not an expected datetime value"""
+    pass
+
+
+class FrozenInstanceException(AttributeError):
+    """raised when an attribute of a filter or filter set is set after construction"""
+    pass
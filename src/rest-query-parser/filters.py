@@ -1,122 +1,409 @@
-from constants import FALSY_VALUES, TRUTHY_VALUES, NULL_VALUES
-from exceptions import (NullNotAllowedException, InvalidBooleanException, InvalidIntegerException,
-                        InvalidFloatException, InvalidWholeNumberException)
+from array import array
+
+from constants import ASCENDING, DESCENDING, FALSY_VALUES, TRUTHY_VALUES, NULL_VALUES
+from cursors import decode_cursor, encode_cursor
+from dates import parse_date, parse_datetime
+from exceptions import (FilterException, NullNotAllowedException, InvalidBooleanException,
+                        InvalidIntegerException, InvalidFloatException,
+                        InvalidWholeNumberException, InvalidDateException,
+                        InvalidDateTimeException, InvalidChoiceException, InvalidCursorException,
+                        TooManyValuesException)
 from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
                        LESS_THAN, LESS_THAN_OR_EQUAL)
-from utils import coalesce
+from utils import Frozen, SortedValues, coalesce, format_value, quote_text
 
 
-class Filter:
-    def __init__(self, operators=None, allow_null=True):
+# digit strings up to this length always convert with int(), see IntegerFilter.convert
+SHORT_DIGITS = 18
+
+
+class Filter(Frozen):
+    # optional one-argument callable converting a list item for in/nin, raising ValueError
+    bulk = None
+    # whether a plain value is itself a comma separated list, as for DelimitedSetFilter
+    delimited = False
+
+    def __init__(self, operators=None, allow_null=True, max_values=None):
         self.allow_null = allow_null
-        self.operators = coalesce(operators, self.operators)
+        self.operators = tuple(coalesce(operators, self.operators))
+        # cap on the number of comma separated values accepted by in/nin
+        self.max_values = max_values
+        self._install()
+        # subclasses set their own attributes before calling this, nothing changes afterwards
+        self._freeze()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_convert'], state['validate'], state['validate_many']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._install()
+
+    def _install(self):
+        # the compiled converters are derived state, rebuilt rather than pickled
+        convert = self._compile()
+        self.__dict__['_convert'] = convert
+        self.__dict__['validate'] = convert if self._builtin_parse() else self._compile_parse()
+        self.__dict__['validate_many'] = self._compile_many()
+
+    def _builtin_parse(self):
+        # subclasses used to customise parsing by overriding parse, which FilterSet keeps honouring
+        return type(self).parse is Filter.parse
 
     def parse(self, value):
-        parsed = str(value).strip()
-
-        if parsed.lower() in NULL_VALUES:
-            if not self.allow_null:
-                raise NullNotAllowedException()
+        parsed, error = self._convert(value)
 
-            return None
+        if error is not None:
+            raise error()
 
         return parsed
 
+    def validate(self, value):
+        """parses without raising: returns (parsed, None), or (None, exception class) if invalid
 
-class BooleanFilter(Filter):
-    operators = (EQUAL, NOT_EQUAL)
+        replaced per instance by the converter built in _compile, or by one calling parse when
+        a subclass overrides it
+        """
+        return self._compile()(value)
 
-    def parse(self, value):
-        parsed = super().parse(value)
+    def validate_many(self, value):
+        """validate for in/nin: splits the value on ',' and returns the parsed values as a
+        deduplicated container, see pack
 
-        if parsed is None:
-            return parsed
+        replaced per instance by the converter built in _compile_many
+        """
+        return self._compile_many()(value)
+
+    def pack(self, values):
+        """builds the container returned by validate_many from a list of parsed values"""
+        return frozenset(values), None
+
+    def render(self, value):
+        """renders a parsed value back into query string form, as used by canonicalize"""
+        return format_value(value)
+
+    def literals(self):
+        """maps lower-cased literals such as 'null' to their (parsed, error) outcome"""
+        null = (None, None) if self.allow_null else (None, NullNotAllowedException)
+        return {literal: null for literal in NULL_VALUES}
+
+    def convert(self, text):
+        """converts a stripped value that is not one of the literals"""
+        return text, None
+
+    def _compile(self):
+        """builds the converter: strip once, resolve literals with one lookup, then convert"""
+        literals = self.literals()
+        longest = max(map(len, literals), default=0)
+        convert = self.convert
+
+        def validate(value):
+            text = value.strip() if value.__class__ is str else str(value).strip()
+
+            # no literal is longer than a few characters, so most values skip lower()
+            if len(text) <= longest:
+                outcome = literals.get(text.lower())
+
+                if outcome is not None:
+                    return outcome
+
+            return convert(text)
+
+        return validate
+
+    def _compile_parse(self):
+        """builds validate from an overridden parse, turning its FilterExceptions into errors"""
+        parse = self.parse
+
+        def validate(value):
+            try:
+                return parse(value), None
+            except FilterException as ex:
+                return None, type(ex)
+
+        return validate
+
+    def _compile_many(self):
+        validate = self.validate
+        pack = self.pack
+        max_values = self.max_values
+        # the bulk conversion would bypass an overridden parse
+        bulk = self.bulk if self._builtin_parse() else None
+
+        def validate_many(value):
+            items = (value if value.__class__ is str else str(value)).split(',')
+
+            if max_values is not None and len(items) > max_values:
+                return None, TooManyValuesException
+
+            if bulk is not None:
+                # convert the whole list in one C level pass, falling back to validating
+                # item by item for lists holding nulls or invalid values
+                try:
+                    return pack(list(map(bulk, items)))
+                except ValueError:
+                    pass
+
+            values = []
 
-        elif parsed.lower() in TRUTHY_VALUES:
-            return True
-        elif parsed.lower() in FALSY_VALUES:
-            return False
+            for item in items:
+                parsed, error = validate(item)
 
-        raise InvalidBooleanException()
+                if error is not None:
+                    return None, error
+
+                values.append(parsed)
+
+            return pack(values)
+
+        return validate_many
+
+
+class BooleanFilter(Filter):
+    operators = (EQUAL, NOT_EQUAL, IN, NOT_IN)
+
+    def literals(self):
+        literals = super().literals()
+        literals.update((literal, (True, None)) for literal in TRUTHY_VALUES)
+        literals.update((literal, (False, None)) for literal in FALSY_VALUES)
+        return literals
+
+    def convert(self, text):
+        return None, InvalidBooleanException
 
 
 class NumericFilter(Filter):
     operators = (EQUAL, NOT_EQUAL, GREATER_THAN, GREATER_THAN_OR_EQUAL, LESS_THAN,
-                 LESS_THAN_OR_EQUAL)
+                 LESS_THAN_OR_EQUAL, IN, NOT_IN)
 
-    def parse(self, value):
-        parsed = super().parse(value)
-        return parsed
+    typecode = None
+    invalid = None
 
+    def __init__(self, *args, packed=False, **kwargs):
+        # packed: in/nin values come back as SortedValues over a sorted, deduplicated array
+        # instead of a frozenset
+        self.packed = packed
+        super().__init__(*args, **kwargs)
 
-class FloatFilter(NumericFilter):
-    def parse(self, value):
-        parsed = super().parse(value)
+    def pack(self, values):
+        if not self.packed:
+            return frozenset(values), None
 
-        if parsed is None:
-            return parsed
+        try:
+            return SortedValues(array(self.typecode, sorted(set(values)))), None
+        except (TypeError, OverflowError):
+            # nulls and out of range integers have no place in a typed array
+            return None, self.invalid
 
+
+class FloatFilter(NumericFilter):
+    typecode = 'd'
+    invalid = InvalidFloatException
+    bulk = float
+
+    def convert(self, text):
         try:
-            parsed = float(parsed)
+            return float(text), None
         except ValueError:
-            raise InvalidFloatException()
-
-        return parsed
+            return None, InvalidFloatException
 
 
 class IntegerFilter(NumericFilter):
-    def parse(self, value):
-        parsed = super().parse(value)
+    typecode = 'q'
+    invalid = InvalidIntegerException
+    bulk = int
 
-        if parsed is None:
-            return parsed
+    def convert(self, text):
+        # short runs of plain ascii digits cannot fail int(), so skip setting up the exception
+        # handler; longer ones can exceed the interpreter's integer string conversion limit
+        if len(text) <= SHORT_DIGITS and text.isdigit() and text.isascii():
+            return int(text), None
 
         try:
-            parsed = int(parsed)
+            return int(text), None
         except ValueError:
-            raise InvalidIntegerException()
-
-        return parsed
+            return None, InvalidIntegerException
 
 
 class StringFilter(Filter):
     operators = (EQUAL, NOT_EQUAL, IN, NOT_IN)
 
 
+def whole_number(text):
+    parsed = int(text)
+
+    if parsed < 0:
+        raise ValueError(text)
+
+    return parsed
+
+
 class WholeNumberFilter(NumericFilter):
-    def parse(self, value):
-        parsed = super().parse(value)
+    typecode = 'q'
+    invalid = InvalidWholeNumberException
+    bulk = staticmethod(whole_number)
 
-        if parsed is None:
-            return parsed
+    def convert(self, text):
+        if len(text) <= SHORT_DIGITS and text.isdigit() and text.isascii():
+            return int(text), None
 
         try:
-            parsed = int(parsed)
+            parsed = int(text)
         except ValueError:
-            raise InvalidWholeNumberException()
+            return None, InvalidWholeNumberException
 
         if parsed < 0:
-            raise InvalidWholeNumberException()
+            return None, InvalidWholeNumberException
 
-        return parsed
+        return parsed, None
+
+
+class TemporalFilter(Filter):
+    """base of the date and datetime filters, ordered values taking every comparison operator"""
+    operators = (EQUAL, NOT_EQUAL, GREATER_THAN, GREATER_THAN_OR_EQUAL, LESS_THAN,
+                 LESS_THAN_OR_EQUAL, IN, NOT_IN)
+
+
+class DateFilter(TemporalFilter):
+    """parses YYYY-MM-DD, a datetime or epoch seconds into the date it falls on in UTC"""
+
+    def convert(self, text):
+        parsed = parse_date(text)
+
+        if parsed is None:
+            return None, InvalidDateException
+
+        return parsed, None
+
+
+class DateTimeFilter(TemporalFilter):
+    """parses an ISO-8601 datetime, epoch seconds or an RFC 2822 date into an aware datetime
+    normalized to UTC; naive values are taken to be UTC
+    """
+
+    def convert(self, text):
+        parsed = parse_datetime(text)
+
+        if parsed is None:
+            return None, InvalidDateTimeException
+
+        return parsed, None
 
 
 class DelimitedSetFilter(Filter):
+    """parses a comma separated list into a tuple of distinct values, in first seen order"""
     operators = (EQUAL, NOT_EQUAL)
+    delimited = True
 
-    def __init__(self, *args, **kwargs):
-        self.filter_type = kwargs.get('filter_type', StringFilter)
+    def __init__(self, filter_type=StringFilter, choices=None, **kwargs):
+        # one element filter is built up front and reused for every value
+        element = filter_type() if isinstance(filter_type, type) else filter_type
 
-    def parse(self, value):
-        parsed = super().parse(value)
+        if not isinstance(element, Filter):
+            raise TypeError(f'filter_type must be a Filter class or instance, not {element!r}')
 
-        if parsed is None:
-            return [parsed]
+        self.element = element
+        self.choices = frozenset(choices) if choices is not None else None
+        super().__init__(**kwargs)
 
-        parsed = parsed.split(',')
-        f = self.filter_type()
+    def convert(self, text):
+        if not text:
+            return (), None
 
-        parsed = [f.parse(value) for value in parsed]
-        print(parsed)
+        items = text.split(',')
 
-        return parsed
+        if self.max_values is not None and len(items) > self.max_values:
+            return None, TooManyValuesException
+
+        validate = self.element.validate
+        values = {}
+
+        for item in items:
+            parsed, error = validate(item)
+
+            if error is not None:
+                return None, error
+
+            values[parsed] = None
+
+        if self.choices is not None and not self.choices.issuperset(values):
+            return None, InvalidChoiceException
+
+        return tuple(values), None
+
+
+class SortFilter(Filter):
+    """parses sort=-age,name into a tuple of (field, direction) pairs
+
+    a leading minus sorts a field in descending order. fields outside choices, when given, and
+    empty names fail with InvalidChoiceException; a repeated field keeps its first direction.
+    """
+    operators = (EQUAL,)
+    delimited = True
+
+    def __init__(self, choices=None, **kwargs):
+        self.choices = frozenset(choices) if choices is not None else None
+        kwargs.setdefault('allow_null', False)
+        super().__init__(**kwargs)
+
+    def convert(self, text):
+        if not text:
+            return (), None
+
+        items = text.split(',')
+
+        if self.max_values is not None and len(items) > self.max_values:
+            return None, TooManyValuesException
+
+        choices = self.choices
+        ordering = {}
+
+        for item in items:
+            item = item.strip()
+
+            if item[:1] == '-':
+                field, direction = item[1:], DESCENDING
+            else:
+                field, direction = item, ASCENDING
+
+            if not field or (choices is not None and field not in choices):
+                return None, InvalidChoiceException
+
+            ordering.setdefault(field, direction)
+
+        return tuple(ordering.items()), None
+
+    def render(self, value):
+        if value is None:
+            return 'null'
+
+        return ','.join(quote_text(field) if direction == ASCENDING else f'-{quote_text(field)}'
+                        for field, direction in value)
+
+
+class CursorFilter(Filter):
+    """parses a signed cursor token from encode_cursor into its tuple of sort key values"""
+    operators = (EQUAL,)
+
+    def __init__(self, secret, size=None, **kwargs):
+        self.secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        # number of sort key values a cursor must carry
+        self.size = size
+        kwargs.setdefault('allow_null', False)
+        super().__init__(**kwargs)
+
+    def convert(self, text):
+        values = decode_cursor(text, self.secret)
+
+        if values is None or (self.size is not None and len(values) != self.size):
+            return None, InvalidCursorException
+
+        return values, None
+
+    def render(self, value):
+        if value is None:
+            return 'null'
+
+        return encode_cursor(value, self.secret)
@@ -1,60 +1,568 @@
-from exceptions import FilterException, InvalidOperatorException
-from filters import Filter, WholeNumberFilter
+import hashlib
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+from types import MappingProxyType
+
+from cache import make_cache
+from exceptions import (FilterException, InvalidOperatorException, MultipleFilterException,
+                        NumberTooLongException, QueryTooLongException, TooManyClausesException,
+                        TooManyValuesException)
+from cursors import encode_cursor
+from filters import (CursorFilter, DelimitedSetFilter, Filter, NumericFilter, SortFilter,
+                     StringFilter, WholeNumberFilter)
 from operators import (ALL, EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
-                       LESS_THAN, LESS_THAN_OR_EQUAL)
+                       LESS_THAN, LESS_THAN_OR_EQUAL, MULTI_VALUE)
+from results import ParsedFilter, ParseResult
+from scanner import scan, scan_bytes
+from utils import Frozen, quote_text
+
+
+# the class attributes FilterSet._compile fills in
+_TABLES = ('_filters', 'control_fields', '_operators', '_byte_fields', '_fields', '_numeric_fields')
+
+
+class FilterSet(Frozen):
+    # fields steering the query, like limit and offset, rather than filtering rows; combined
+    # across base classes
+    control_fields = frozenset()
 
+    # maps fields to the SQL column expressions they filter; None maps each declared field to
+    # the quoted column of the same name
+    columns = None
 
-class FilterSet:
-    def __init__(self, strict=False):
+    # compiled once per class by __init_subclass__, read-only afterwards
+    _filters = MappingProxyType({})
+    _operators = MappingProxyType({})
+    _byte_fields = MappingProxyType({})
+    _fields = MappingProxyType({})
+    _numeric_fields = frozenset()
+
+    def __init__(self, strict=False, cache_size=None, collect_errors=False, max_length=None,
+                 max_clauses=None, max_field_clauses=None, max_values=None,
+                 max_number_length=None, sink=None):
         self.strict = strict
+        # strict mode variant raising one MultipleFilterException for every invalid clause
+        self.collect_errors = collect_errors
+        self._cache = make_cache(cache_size) if cache_size else None
+        # input limits bounding the work an adversarial query can cause, see _bound and _check;
+        # max_length counts the UTF-8 bytes of a query given as str
+        self.max_length = max_length
+        self.max_clauses = max_clauses
+        self.max_field_clauses = max_field_clauses
+        self.max_values = max_values
+        self.max_number_length = max_number_length
+        # an instrumentation.Sink receiving clause, rejection and timing events; None keeps
+        # parsing free of any instrumentation cost
+        self.sink = sink
+        # a filter set is shared by every thread serving its route; its configuration is fixed
+        # from here on and the parse cache does its own locking
+        self._freeze()
+
+    def __init_subclass__(cls, compiled=None, **kwargs):
+        # compiled: the tables of tables() computed earlier, e.g. loaded from a schema artifact
+        super().__init_subclass__(**kwargs)
+        cls._install(compiled if compiled is not None else cls._compile())
+
+    @classmethod
+    def tables(cls):
+        """the compiled lookup tables of the class as plain, picklable containers"""
+        tables = {name: getattr(cls, name) for name in _TABLES}
+        return {name: value if isinstance(value, frozenset) else dict(value)
+                for name, value in tables.items()}
+
+    @classmethod
+    def _install(cls, tables):
+        for name in _TABLES:
+            value = tables[name]
+            setattr(cls, name, value if isinstance(value, frozenset) else MappingProxyType(value))
+
+    @classmethod
+    def _compile(cls):
+        """collects the declared filters of the class and its bases into lookup tables"""
+        filters = {}
+
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Filter):
+                    filters[sys.intern(name)] = value
+                elif name in filters:
+                    # a subclass shadowed an inherited filter with a plain attribute
+                    del filters[name]
+
+        # per field: the interned name, its filter and its operators mapped to the shared
+        # operator constants, so parsed records reference one string object per name
+        canonical = {operator: operator for operator in ALL}
+
+        return {
+            '_filters': filters,
+            'control_fields': frozenset().union(*(vars(klass).get('control_fields', ())
+                                                  for klass in cls.__mro__)),
+            '_operators': {name: frozenset(f.operators) for name, f in filters.items()},
+            '_byte_fields': {name.encode('utf-8'): name for name in filters},
+            '_fields': {
+                name: (name, f, {canonical.get(o, o): canonical.get(o, o) for o in f.operators})
+                for name, f in filters.items()
+            },
+            '_numeric_fields': frozenset(name for name, f in filters.items() if _numeric(f)),
+        }
+
+    def __getstate__(self):
+        # a copy (e.g. in a parse_many worker) starts with an empty cache of the same size
+        state = self.__dict__.copy()
+
+        if self._cache is not None:
+            state['_cache'] = make_cache(self._cache.maxsize)
+
+        # sinks wrap process local state such as client connections
+        state['sink'] = None
+        return state
+
+    def cache_info(self):
+        """hit/miss/eviction counters of the parse cache, or None when caching is disabled"""
+        return self._cache.info() if self._cache is not None else None
+
+    def canonicalize(self, qs):
+        """renders the accepted clauses of a query as a stable canonical query string
+
+        undeclared fields and clauses ignored in passive mode are dropped, implicit eq is
+        written out and clauses and in/nin values are sorted, so equivalent queries such as
+        'age=gt:30&name=Bob' and 'name=eq:Bob&age=gt:30' canonicalize identically.
+        """
+        filters = self._filters
+        clauses = {f'{quote_text(field)}={operator}:{filters[field].render(value)}'
+                   for field, operator, value in (parsed.values() for parsed in self.parse(qs))}
+        return '&'.join(sorted(clauses))
+
+    def fingerprint(self, qs):
+        """a fixed size hex digest of the canonical query, e.g. for result cache keys"""
+        return hashlib.blake2b(self.canonicalize(qs).encode('utf-8'), digest_size=16).hexdigest()
 
     def parse(self, qs):
-        parts = qs.split('&')
-        filters = [p for p in dir(self) if isinstance(getattr(self, p), Filter)]
+        """parses a query string given as str, or as bytes, bytearray or memoryview as handed over
+        by WSGI/ASGI servers; raw input is only decoded for clauses of declared fields
+        """
+        sink = self.sink
+
+        if sink is None:
+            return self._cached_parse(qs)
+
+        start = perf_counter()
+
+        try:
+            return self._cached_parse(qs)
+        finally:
+            sink.parsed(perf_counter() - start)
+
+    def _cached_parse(self, qs):
+        cache = self._cache
+
+        if cache is None or (self.max_length is not None and _size(qs) > self.max_length):
+            # over-long queries are not worth a cache slot
+            return self._parse(qs)
+
+        key = (qs if isinstance(qs, (str, bytes)) else bytes(qs), self.strict, self.collect_errors)
+        cached = cache.get(key)
+
+        if cached is None:
+            try:
+                cached = self._parse(qs)
+            except FilterException as ex:
+                cached = _CachedException(type(ex), ex.args)
+
+            cache.put(key, cached)
+        elif self.sink is not None:
+            self.sink.cache_hit()
+
+        if cached.__class__ is _CachedException:
+            # a fresh exception each time, with its own copy of the errors a
+            # MultipleFilterException carries
+            raise cached.type(*(list(arg) if isinstance(arg, list) else arg
+                                for arg in cached.args))
+
+        return cached
+
+    def parse_many(self, queries, workers=1, chunksize=64):
+        """parses an iterable of query strings, yielding results lazily in input order
+
+        a query that fails in strict mode yields its FilterException in place of a result
+        instead of aborting the batch. with workers > 1 the queries are fanned out to a process
+        pool; the filter set is sent to each worker once and queries travel in chunks.
+        """
+        if workers <= 1:
+            for qs in queries:
+                yield self._parse_or_exception(qs)
+
+            return
+
+        with Pool(workers, initializer=_init_worker, initargs=(self,)) as pool:
+            for item in pool.imap(_parse_in_worker, queries, chunksize):
+                if isinstance(item, FilterException):
+                    yield item
+                else:
+                    yield ParseResult(map(ParsedFilter.from_tuple, item))
+
+    def _parse_or_exception(self, qs):
+        try:
+            return self.parse(qs)
+        except FilterException as ex:
+            return ex
+
+    def iter_parse(self, qs):
+        """lazily yields a ParsedFilter for each accepted clause as the scanner reaches it"""
+        return self._iter_parse(qs, self._fields, self._byte_fields, sink=self.sink)
+
+    def parse_fields(self, qs, fields):
+        """parses only the clauses of the given fields, e.g. {'limit', 'offset'}
+
+        scanning stops as soon as a clause has been accepted for every requested field, so
+        later clauses for those fields are not seen. undeclared names are ignored.
+        """
+        wanted = {name: self._fields[name] for name in fields if name in self._fields}
+        byte_fields = {key: name for key, name in self._byte_fields.items() if name in wanted}
+        remaining = set(wanted)
         parsed = []
 
-        for part in parts:
-            ignore = False
+        if remaining:
+            for clause in self._iter_parse(qs, wanted, byte_fields):
+                parsed.append(clause)
+                remaining.discard(clause.field)
+
+                if not remaining:
+                    break
 
-            field, exp = part.split('=') if '=' in part else [part, '']
+        return ParseResult(parsed)
 
-            if ':' in exp:
-                operator, value = exp.split(':')
-            elif exp in ALL:
-                operator = exp
-                value = ''
+    def _parse(self, qs):
+        if not (self.strict and self.collect_errors):
+            return ParseResult(self._iter_parse(qs, self._fields, self._byte_fields,
+                                                sink=self.sink))
+
+        errors = []
+        parsed = ParseResult(self._iter_parse(qs, self._fields, self._byte_fields, errors,
+                                              self.sink))
+
+        if errors:
+            raise MultipleFilterException(errors)
+
+        return parsed
+
+    def _iter_parse(self, qs, fields, byte_fields, errors=None, sink=None):
+        # filters report invalid values through validate rather than by raising, so rejected
+        # clauses cost no exception unless one is raised here in strict mode
+        qs = self._bound(qs, sink)
+        # a sink also counts undeclared fields, so then every clause has to be scanned
+        clauses = (scan(qs, fields if sink is None else None) if isinstance(qs, str)
+                   else scan_bytes(qs, byte_fields if sink is None else _ALL_BYTE_FIELDS))
+        limits = (self.max_field_clauses, self.max_values, self.max_number_length)
+        checked = limits != (None, None, None)
+        counts = {}
+
+        for field, operator, value in clauses:
+            entry = fields.get(field)
+
+            if entry is None:
+                # only scanned for a sink
+                sink.unknown(field)
+                continue
+
+            field, f, operators = entry
+            operator = operators.get(operator)
+
+            if operator is None:
+                error = InvalidOperatorException
             else:
-                operator = EQUAL
-                value = exp
-
-            if field in filters:
-                f = getattr(self, field)
-
-                if operator in f.operators:
-                    try:
-                        value = f.parse(value)
-                    except FilterException as ex:
-                        if self.strict:
-                            raise ex
-                        else:
-                            ignore = True
-
-                    if not ignore:
-                        parsed.append({
-                            'field': field,
-                            'operator': operator,
-                            'value': value
-                        })
-                elif self.strict:
-                    raise InvalidOperatorException()
+                error = self._check(field, f, operator, value, counts) if checked else None
+
+                if error is None:
+                    validate = f.validate_many if operator in MULTI_VALUE else f.validate
+                    value, error = validate(value)
+
+                if error is None:
+                    if sink is not None:
+                        sink.accepted(field, f)
+
+                    yield ParsedFilter(field, operator, value)
+                    continue
+
+            if sink is not None:
+                sink.rejected(field, f, error)
+
+            if errors is not None:
+                errors.append((field, error()))
+            elif self.strict:
+                raise error()
+
+    def _bound(self, qs, sink=None):
+        """applies max_length and max_clauses to the raw query before it is scanned
+
+        strict mode rejects the whole query; passive mode drops the clauses past the limits,
+        keeping only complete ones. both checks are single C level passes over the input.
+        """
+        max_length = self.max_length
+        max_clauses = self.max_clauses
+
+        if max_length is None and max_clauses is None:
+            return qs
+
+        if not isinstance(qs, (str, bytes)):
+            qs = bytes(qs)
+
+        separator = '&' if isinstance(qs, str) else b'&'
+
+        if max_length is not None and _size(qs) > max_length:
+            if sink is not None:
+                sink.rejected(None, None, QueryTooLongException)
+
+            if self.strict:
+                raise QueryTooLongException()
+
+            qs = _truncate(qs, max_length)
+
+        if max_clauses is not None and qs.count(separator) >= max_clauses:
+            if sink is not None:
+                sink.rejected(None, None, TooManyClausesException)
+
+            if self.strict:
+                raise TooManyClausesException()
+
+            cut = -1
+
+            for _ in range(max_clauses):
+                cut = qs.find(separator, cut + 1)
+
+            qs = qs[:cut] if cut >= 0 else qs[:0]
+
+        return qs
+
+    def _check(self, field, f, operator, value, counts):
+        """the limit exception class a clause breaks, or None, checked before it is converted"""
+        if self.max_field_clauses is not None:
+            count = counts[field] = counts.get(field, 0) + 1
 
+            if count > self.max_field_clauses:
+                return TooManyClausesException
+
+        multiple = operator in MULTI_VALUE or f.delimited
+        max_values = self.max_values
+
+        if multiple and max_values is not None and value.count(',') >= max_values:
+            return TooManyValuesException
+
+        max_number_length = self.max_number_length
+
+        too_long = max_number_length is not None and len(value) > max_number_length
+
+        if too_long and field in self._numeric_fields:
+            if not multiple or any(len(item) > max_number_length for item in value.split(',')):
+                return NumberTooLongException
+
+        return None
+
+
+def _numeric(f):
+    """whether f parses numbers, alone or as the items of a delimited set"""
+    if isinstance(f, DelimitedSetFilter):
+        f = f.element
+
+    return isinstance(f, NumericFilter)
+
+
+class _AllByteFields:
+    """the byte_fields mapping an instrumented parse scans with, letting every name through"""
+    __slots__ = ()
+
+    def get(self, key):
+        return key.decode('utf-8', 'replace')
+
+
+_ALL_BYTE_FIELDS = _AllByteFields()
+
+
+class _CachedException:
+    """a strict mode failure remembered by the parse cache, re-raised as a fresh instance"""
+    __slots__ = ('type', 'args')
+
+    def __init__(self, type, args):
+        self.type = type
+        self.args = args
+
+
+def _size(qs):
+    # the length of a query in bytes, encoding only str queries holding non-ascii characters
+    if isinstance(qs, str) and not qs.isascii():
+        return len(qs.encode('utf-8', 'surrogatepass'))
+
+    return len(qs)
+
+
+def _truncate(qs, max_length):
+    # the complete clauses within the first max_length bytes of a query
+    if not isinstance(qs, str):
+        return qs[:max(qs.rfind(b'&', 0, max_length + 1), 0)]
+    elif qs.isascii():
+        return qs[:max(qs.rfind('&', 0, max_length + 1), 0)]
+
+    # cut the encoded query, '&' never being part of a multi-byte character
+    encoded = qs.encode('utf-8', 'surrogatepass')
+    return encoded[:max(encoded.rfind(b'&', 0, max_length + 1), 0)].decode('utf-8', 'surrogatepass')
+
+
+_worker_filter_set = None
+
+
+def _init_worker(filter_set):
+    global _worker_filter_set
+    _worker_filter_set = filter_set
+
+
+def _parse_in_worker(qs):
+    # plain tuples pickle several times faster than the record types rebuilt by parse_many
+    parsed = _worker_filter_set._parse_or_exception(qs)
+
+    if isinstance(parsed, FilterException):
         return parsed
 
+    return tuple(clause.values() for clause in parsed)
+
 
 class PaginationFilterSet(FilterSet):
+    control_fields = frozenset(('limit', 'offset'))
+
     limit = WholeNumberFilter(allow_null=False, operators=[EQUAL])
     offset = WholeNumberFilter(allow_null=False, operators=[EQUAL])
 
 
-#class ProjectionFilterSet(FilterSet):
-#    fields = DelimitedSetFilter(StringFilter)
+class CursorPaginationFilterSet(FilterSet):
+    """keyset pagination: limit plus after/before cursors holding the sort key values of the
+    row a page starts after or ends before
+
+    subclasses set cursor_keys, the fields rows are ordered by (ascending, unique together and
+    never null; json values, dates or datetimes), and cursor_secret, the key cursors are signed
+    with. a cursor that was tampered with fails to parse with InvalidCursorException.
+    """
+    control_fields = frozenset(('limit', 'after', 'before'))
+    cursor_keys = ('id',)
+    cursor_secret = None
+    limit = WholeNumberFilter(allow_null=False, operators=[EQUAL])
+
+    def __init_subclass__(cls, **kwargs):
+        if cls.cursor_secret is not None:
+            for name in ('after', 'before'):
+                if name not in vars(cls):
+                    setattr(cls, name, CursorFilter(cls.cursor_secret, size=len(cls.cursor_keys)))
+
+        super().__init_subclass__(**kwargs)
+
+        if 'after' not in cls._filters or 'before' not in cls._filters:
+            raise ValueError(f'{cls.__name__} needs a cursor_secret to sign its cursors with')
+
+    def cursor(self, row, attribute=False):
+        """the cursor token of a row, a mapping or an object read by attribute"""
+        if attribute:
+            values = [getattr(row, key) for key in self.cursor_keys]
+        else:
+            values = [row[key] for key in self.cursor_keys]
+
+        return encode_cursor(values, self._filters['after'].secret)
+
+    def next_cursor(self, rows, attribute=False):
+        """the after= cursor of the page following rows, or None for an empty page"""
+        return self.cursor(rows[-1], attribute) if rows else None
+
+    def previous_cursor(self, rows, attribute=False):
+        """the before= cursor of the page preceding rows, or None for an empty page"""
+        return self.cursor(rows[0], attribute) if rows else None
+
+    def keyset(self, parsed):
+        """the keyset range conditions of a parse result as (operator, values) pairs
+
+        after gives (gt, values) and before (lt, values), both compared against the tuple of
+        cursor key values of a row. a before page is the last limit rows below its cursor, so
+        fetch it in descending key order and reverse it.
+        """
+        conditions = []
+
+        for clause in parsed:
+            if clause.field == 'after':
+                conditions.append((GREATER_THAN, clause.value))
+            elif clause.field == 'before':
+                conditions.append((LESS_THAN, clause.value))
+
+        return conditions
+
+    def keyset_predicate(self, parsed, attribute=False):
+        """a row predicate applying the keyset conditions of a parse result"""
+        conditions = self.keyset(parsed)
+        keys = self.cursor_keys
+
+        def predicate(row):
+            if attribute:
+                values = tuple(getattr(row, key) for key in keys)
+            else:
+                values = tuple(row[key] for key in keys)
+
+            for operator, bound in conditions:
+                if not (values > bound if operator == GREATER_THAN else values < bound):
+                    return False
+
+            return True
+
+        return predicate
+
+
+class ProjectionFilterSet(FilterSet):
+    """parses fields=a,b into the tuple of columns to select
+
+    subclasses list the selectable columns in allowed_fields and any other name is rejected, so
+    clients cannot select columns nobody meant to expose. a subclass declaring a fields filter
+    of its own chooses for itself.
+    """
+    control_fields = frozenset(('fields',))
+    allowed_fields = ()
+    fields = DelimitedSetFilter(filter_type=StringFilter, allow_null=False, operators=[EQUAL],
+                                choices=())
+
+    def __init_subclass__(cls, **kwargs):
+        if 'fields' not in vars(cls):
+            cls.fields = DelimitedSetFilter(filter_type=StringFilter, allow_null=False,
+                                            operators=[EQUAL], choices=cls.allowed_fields)
+
+        super().__init_subclass__(**kwargs)
+
+    def selected_fields(self, parsed):
+        """the requested columns, or every allowed column when fields= was not given"""
+        clause = parsed.get('fields')
+
+        if clause is None:
+            return tuple(self.allowed_fields)
+
+        return clause.value
+
+
+class SortFilterSet(FilterSet):
+    """parses sort=-age,name into the (field, direction) pairs to order rows by
+
+    subclasses list the sortable fields in sortable_fields and any other name is rejected, so
+    clients cannot order by fields rows may not have. a subclass declaring a sort filter of its
+    own chooses for itself. combine with PaginationFilterSet to take limit and offset, see
+    sorting.execute
+    """
+    control_fields = frozenset(('sort',))
+    sortable_fields = ()
+    sort = SortFilter(choices=())
+
+    def __init_subclass__(cls, **kwargs):
+        if 'sort' not in vars(cls):
+            cls.sort = SortFilter(choices=cls.sortable_fields)
+
+        super().__init_subclass__(**kwargs)
+
+    def ordering(self, parsed):
+        """the requested (field, direction) pairs, empty when sort= was not given"""
+        clause = parsed.get('sort')
+
+        if clause is None:
+            return ()
+
+        return clause.value
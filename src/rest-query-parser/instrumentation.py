@@ -0,0 +1,255 @@
+from bisect import bisect_left
+from collections import Counter
+from threading import Lock, local
+
+
+# upper bounds, in seconds, of the default parse duration histogram buckets
+DURATION_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 1e-1)
+
+# the name MemorySink counts undeclared fields under once it tracks max_unknown_fields names
+OTHER_FIELDS = '__other__'
+
+
+class Sink:
+    """receives the events of a FilterSet created with sink=...; every method is a no-op here
+
+    filter is the Filter instance a clause was parsed with. query level rejections, from the
+    max_length and max_clauses limits, are reported with field and filter None. clause events
+    come from actually parsing a query: one answered from the parse cache reports cache_hit
+    instead, so with a cache the clause counts cover distinct recent queries, not requests.
+    parsed is reported for every call. unknown field names are client input, so keep
+    whatever is derived from them bounded.
+    """
+
+    def accepted(self, field, filter):
+        pass
+
+    def rejected(self, field, filter, error):
+        pass
+
+    def unknown(self, field):
+        pass
+
+    def parsed(self, duration):
+        pass
+
+    def cache_hit(self):
+        pass
+
+
+class Histogram:
+    """counts observations into buckets by upper bound, with one overflow bucket at the end"""
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        """adds the observations of a histogram with the same buckets"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {'buckets': dict(zip(bounds, self.counts)), 'count': self.count,
+                'sum': self.total}
+
+
+class _Aggregate:
+    """the counters one thread records into; its lock is only contended while snapshotting"""
+
+    def __init__(self, buckets):
+        self.lock = Lock()
+        self.fields = Counter()
+        self.filter_types = Counter()
+        self.rejections = Counter()
+        self.unknown_fields = Counter()
+        self.cache_hits = 0
+        self.durations = Histogram(buckets)
+
+
+class MemorySink(Sink):
+    """aggregates events into counters and a duration histogram, e.g. for tests or a debug page
+
+    fields and filter_types count every clause of a declared field, rejections count by
+    exception class name and unknown_fields count the clauses of undeclared fields. the names
+    of undeclared fields come from clients, so only the first max_unknown_fields distinct ones
+    are tracked and the clauses of any other count under OTHER_FIELDS. each thread records
+    into counters of its own, which the properties below add up on read, so threads sharing
+    a filter set do not contend on the sink.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS, max_unknown_fields=100):
+        self.buckets = buckets
+        self.max_unknown_fields = max_unknown_fields
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._local = local()
+            self._aggregates = []
+            self._unknown_names = set()
+
+    def _aggregate(self):
+        try:
+            return self._local.aggregate
+        except AttributeError:
+            aggregate = _Aggregate(self.buckets)
+
+            with self._lock:
+                self._aggregates.append(aggregate)
+                self._local.aggregate = aggregate
+
+            return aggregate
+
+    def _merged(self, name):
+        total = Counter()
+
+        with self._lock:
+            aggregates = list(self._aggregates)
+
+        for aggregate in aggregates:
+            with aggregate.lock:
+                total.update(getattr(aggregate, name))
+
+        return total
+
+    @property
+    def fields(self):
+        return self._merged('fields')
+
+    @property
+    def filter_types(self):
+        return self._merged('filter_types')
+
+    @property
+    def rejections(self):
+        return self._merged('rejections')
+
+    @property
+    def unknown_fields(self):
+        return self._merged('unknown_fields')
+
+    @property
+    def cache_hits(self):
+        with self._lock:
+            aggregates = list(self._aggregates)
+
+        return sum(aggregate.cache_hits for aggregate in aggregates)
+
+    @property
+    def durations(self):
+        total = Histogram(self.buckets)
+
+        with self._lock:
+            aggregates = list(self._aggregates)
+
+        for aggregate in aggregates:
+            with aggregate.lock:
+                total.merge(aggregate.durations)
+
+        return total
+
+    def accepted(self, field, filter):
+        aggregate = self._aggregate()
+
+        with aggregate.lock:
+            aggregate.fields[field] += 1
+            aggregate.filter_types[type(filter).__name__] += 1
+
+    def rejected(self, field, filter, error):
+        aggregate = self._aggregate()
+
+        with aggregate.lock:
+            if field is not None:
+                aggregate.fields[field] += 1
+                aggregate.filter_types[type(filter).__name__] += 1
+
+            aggregate.rejections[error.__name__] += 1
+
+    def unknown(self, field):
+        names = self._unknown_names
+
+        if field not in names:
+            with self._lock:
+                names = self._unknown_names
+
+                if field not in names and len(names) < self.max_unknown_fields:
+                    names.add(field)
+
+                if field not in names:
+                    field = OTHER_FIELDS
+
+        aggregate = self._aggregate()
+
+        with aggregate.lock:
+            aggregate.unknown_fields[field] += 1
+
+    def cache_hit(self):
+        aggregate = self._aggregate()
+
+        with aggregate.lock:
+            aggregate.cache_hits += 1
+
+    def parsed(self, duration):
+        aggregate = self._aggregate()
+
+        with aggregate.lock:
+            aggregate.durations.observe(duration)
+
+    def snapshot(self):
+        """the aggregated counters as plain, JSON serializable dicts"""
+        return {
+            'fields': dict(self.fields),
+            'filter_types': dict(self.filter_types),
+            'rejections': dict(self.rejections),
+            'unknown_fields': dict(self.unknown_fields),
+            'cache_hits': self.cache_hits,
+            'durations': self.durations.as_dict(),
+        }
+
+
+class CallbackSink(Sink):
+    """forwards each event as callback(metric, value, tags), a shape statsd or Prometheus
+    client adapters map onto counters and timers directly
+
+    metrics are <prefix>.clauses (tags field, filter, outcome and, if rejected, error),
+    <prefix>.unknown_fields, <prefix>.cache_hits and <prefix>.duration in seconds. undeclared
+    field names are client input and never become tags, which would make label cardinality
+    unbounded. the callback runs on whichever thread parses, so it has to be thread-safe
+    itself.
+    """
+
+    def __init__(self, callback, prefix='filterset'):
+        self.callback = callback
+        self.clauses = f'{prefix}.clauses'
+        self.unknown_fields = f'{prefix}.unknown_fields'
+        self.cache_hits = f'{prefix}.cache_hits'
+        self.duration = f'{prefix}.duration'
+
+    def accepted(self, field, filter):
+        self.callback(self.clauses, 1, {'field': field, 'filter': type(filter).__name__,
+                                        'outcome': 'accepted'})
+
+    def rejected(self, field, filter, error):
+        self.callback(self.clauses, 1, {'field': field,
+                                        'filter': None if filter is None else type(filter).__name__,
+                                        'outcome': 'rejected', 'error': error.__name__})
+
+    def unknown(self, field):
+        self.callback(self.unknown_fields, 1, {})
+
+    def parsed(self, duration):
+        self.callback(self.duration, duration, {})
+
+    def cache_hit(self):
+        self.callback(self.cache_hits, 1, {})
@@ -0,0 +1,127 @@
+import json
+
+from exceptions import FilterException, MultipleFilterException
+
+
+# environ / scope keys the middleware stores the parse result and its filter set under
+PARSED_KEY = 'rest_query_parser.parsed'
+FILTER_SET_KEY = 'rest_query_parser.filter_set'
+
+
+class Router:
+    """maps request paths to filter sets
+
+    routes maps a path to a FilterSet instance, or a FilterSet class which is instantiated
+    with its defaults. a path ending in '*' matches every path starting with the part before
+    it; exact paths win over prefixes and longer prefixes over shorter ones.
+    """
+
+    def __init__(self, routes):
+        self.exact = {}
+        self.prefixes = []
+
+        for path, filter_set in dict(routes).items():
+            if isinstance(filter_set, type):
+                filter_set = filter_set()
+
+            if path.endswith('*'):
+                self.prefixes.append((path[:-1], filter_set))
+            else:
+                self.exact[path] = filter_set
+
+        self.prefixes.sort(key=lambda route: len(route[0]), reverse=True)
+
+    def resolve(self, path):
+        """the filter set of a path, or None when no route matches"""
+        filter_set = self.exact.get(path)
+
+        if filter_set is None:
+            for prefix, candidate in self.prefixes:
+                if path.startswith(prefix):
+                    return candidate
+
+        return filter_set
+
+
+def get_parsed(environ):
+    """the ParseResult the middleware stored in a WSGI environ or ASGI scope, or None"""
+    return environ.get(PARSED_KEY)
+
+
+def error_body(ex):
+    """the JSON body of the 400 response for a strict mode FilterException"""
+    error = {'error': type(ex).__name__}
+
+    if isinstance(ex, MultipleFilterException):
+        error['errors'] = [{'field': field, 'error': type(item).__name__}
+                           for field, item in ex.errors]
+
+    return json.dumps(error).encode('utf-8')
+
+
+class WSGIMiddleware:
+    """parses QUERY_STRING once with the filter set routed for PATH_INFO and stores the result
+    under PARSED_KEY, so every later layer reads it instead of parsing again
+
+    a strict filter set rejecting the query answers 400 with a JSON body and never calls the
+    wrapped app. unrouted paths pass through untouched.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.router = routes if isinstance(routes, Router) else Router(routes)
+
+    def __call__(self, environ, start_response):
+        filter_set = self.router.resolve(environ.get('PATH_INFO', ''))
+
+        if filter_set is None:
+            return self.app(environ, start_response)
+
+        # PEP 3333 hands the query over as latin-1 decoded str; parsing the original bytes
+        # decodes percent escapes as utf-8 like every other entry point
+        qs = environ.get('QUERY_STRING', '').encode('latin-1')
+
+        try:
+            parsed = filter_set.parse(qs)
+        except FilterException as ex:
+            body = error_body(ex)
+            start_response('400 Bad Request', [('Content-Type', 'application/json'),
+                                               ('Content-Length', str(len(body)))])
+            return [body]
+
+        environ[PARSED_KEY] = parsed
+        environ[FILTER_SET_KEY] = filter_set
+        return self.app(environ, start_response)
+
+
+class ASGIMiddleware:
+    """the ASGI counterpart of WSGIMiddleware, parsing scope['query_string'] of http requests
+
+    the result is stored in a copy of the scope handed to the wrapped app; other scope types,
+    such as websocket and lifespan, pass through untouched.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.router = routes if isinstance(routes, Router) else Router(routes)
+
+    async def __call__(self, scope, receive, send):
+        filter_set = self.router.resolve(scope['path']) if scope['type'] == 'http' else None
+
+        if filter_set is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            parsed = filter_set.parse(scope.get('query_string', b''))
+        except FilterException as ex:
+            body = error_body(ex)
+            await send({'type': 'http.response.start', 'status': 400,
+                        'headers': [(b'content-type', b'application/json'),
+                                    (b'content-length', str(len(body)).encode('ascii'))]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        scope = dict(scope)
+        scope[PARSED_KEY] = parsed
+        scope[FILTER_SET_KEY] = filter_set
+        return await self.app(scope, receive, send)
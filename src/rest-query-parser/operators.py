@@ -17,3 +17,9 @@ ALL = (
     NOT_EQUAL,
     NOT_IN
 )
+
+# operators whose value is a comma separated list, parsed into a container of values
+MULTI_VALUE = (
+    IN,
+    NOT_IN
+)
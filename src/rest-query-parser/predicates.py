@@ -0,0 +1,111 @@
+from keyword import iskeyword
+
+from cache import make_cache
+from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
+                       LESS_THAN, LESS_THAN_OR_EQUAL)
+from utils import SortedValues
+
+
+COMPARISONS = {
+    EQUAL: '==',
+    NOT_EQUAL: '!=',
+    GREATER_THAN: '>',
+    GREATER_THAN_OR_EQUAL: '>=',
+    LESS_THAN: '<',
+    LESS_THAN_OR_EQUAL: '<=',
+    IN: 'in',
+    NOT_IN: 'not in',
+}
+
+# relative cost of evaluating a clause; cheaper clauses are tested first, ties by field name
+# so that reordered queries share a shape
+COSTS = {
+    EQUAL: 0,
+    NOT_EQUAL: 0,
+    GREATER_THAN: 1,
+    GREATER_THAN_OR_EQUAL: 1,
+    LESS_THAN: 1,
+    LESS_THAN_OR_EQUAL: 1,
+    IN: 2,
+    NOT_IN: 2,
+}
+
+# compiled predicate factories keyed by query shape, shared by every caller
+_factories = make_cache(256)
+
+
+def compile_predicate(parsed, attribute=False, exclude=(), missing=False):
+    """turns a parse result into one callable testing whether a row matches every clause
+
+    rows are mappings, or objects read by attribute when attribute is true. with missing, a
+    row lacking a field reads it as None instead of raising. clauses for the fields in
+    exclude, such as limit and offset, are left out. the generated code depends only
+    on the shape of the query, its fields, operators and null values, so it is compiled once
+    per shape and the values of each query are bound to it.
+    """
+    clauses = sorted((clause for clause in parsed if clause.field not in exclude),
+                     key=lambda clause: (COSTS[clause.operator], clause.field))
+    shape = tuple((clause.field, clause.operator, clause.value is None) for clause in clauses)
+    key = (shape, attribute, missing)
+    factory = _factories.get(key)
+
+    if factory is None:
+        factory = _compile_factory(shape, attribute, missing)
+        _factories.put(key, factory)
+
+    return factory(*(_bind(clause.operator, clause.value) for clause in clauses))
+
+
+def cache_info():
+    """hit/miss/eviction counters of the predicate factory cache"""
+    return _factories.info()
+
+
+def _bind(operator, value):
+    # packed values are searched in their sorted array instead of hashing every value
+    if operator not in (IN, NOT_IN) or isinstance(value, (set, frozenset, SortedValues)):
+        return value
+
+    return frozenset(value)
+
+
+def _access(field, attribute, missing):
+    if not attribute:
+        return f'row.get({field!r})' if missing else f'row[{field!r}]'
+    elif missing:
+        return f'getattr(row, {field!r}, None)'
+    elif field.isidentifier() and field.isascii() and not iskeyword(field):
+        # non-ascii names would be NFKC normalized by the compiler, keywords do not compile
+        return f'row.{field}'
+
+    return f'getattr(row, {field!r})'
+
+
+def _term(index, field, operator, null, attribute, missing):
+    access = _access(field, attribute, missing)
+
+    if null and operator == EQUAL:
+        return f'{access} is None'
+    elif null and operator == NOT_EQUAL:
+        return f'{access} is not None'
+    elif null and operator not in (IN, NOT_IN):
+        # ordering against null matches nothing
+        return 'False'
+    elif operator in (EQUAL, NOT_EQUAL, IN, NOT_IN):
+        return f'{access} {COMPARISONS[operator]} v{index}'
+
+    # rows holding null never satisfy an ordering comparison
+    return f'({access} is not None and {access} {COMPARISONS[operator]} v{index})'
+
+
+def _compile_factory(shape, attribute, missing):
+    terms = [_term(i, field, operator, null, attribute, missing)
+             for i, (field, operator, null) in enumerate(shape)]
+    arguments = ', '.join(f'v{i}' for i in range(len(shape)))
+    source = (f'def factory({arguments}):\n'
+              f'    def predicate(row):\n'
+              f'        return {" and ".join(terms) or "True"}\n'
+              f'    return predicate\n')
+    namespace = {}
+    exec(compile(source, '<predicate>', 'exec'), namespace)
+    return namespace['factory']
@@ -0,0 +1,142 @@
+from collections.abc import Mapping
+
+
+class ParsedFilter(Mapping):
+    """an accepted clause: an immutable record of its field, operator and value
+
+    a read-only Mapping of the keys field, operator and value, like the dicts parse used to
+    return: parsed['value'], 'value' in parsed, iteration over the keys, keys(), values() and
+    items() all behave as on those dicts. read the parts by attribute, parsed.field; values()
+    gives them as a (field, operator, value) tuple and as_dict() as a real dict, e.g. for json.
+    """
+    __slots__ = ('_field', '_operator', '_value')
+
+    _keys = ('field', 'operator', 'value')
+
+    def __init__(self, field, operator, value):
+        self._field = field
+        self._operator = operator
+        self._value = value
+
+    field = property(lambda self: self._field)
+    operator = property(lambda self: self._operator)
+    value = property(lambda self: self._value)
+
+    def __getitem__(self, key):
+        if key == 'field':
+            return self._field
+        elif key == 'operator':
+            return self._operator
+        elif key == 'value':
+            return self._value
+
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return 3
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __eq__(self, other):
+        if isinstance(other, ParsedFilter):
+            return self.values() == other.values()
+        elif isinstance(other, Mapping):
+            return self.as_dict() == dict(other)
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return 'ParsedFilter(field={!r}, operator={!r}, value={!r})'.format(*self.values())
+
+    def __reduce__(self):
+        return ParsedFilter, self.values()
+
+    @classmethod
+    def from_tuple(cls, record):
+        """builds a record from a plain (field, operator, value) tuple"""
+        return cls(*record)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._keys else default
+
+    def keys(self):
+        return self._keys
+
+    def values(self):
+        return self._field, self._operator, self._value
+
+    def items(self):
+        return tuple(zip(self._keys, self.values()))
+
+    def as_dict(self):
+        return dict(zip(self._keys, self.values()))
+
+
+class ParseResult(tuple):
+    """the immutable sequence of ParsedFilter records returned by FilterSet.parse
+
+    compares equal to the list of dicts parse used to return. lookups by field go through an
+    index of the records built on the first one; attributes cannot be set, so a cached result
+    stays the same for every caller.
+    """
+
+    def __repr__(self):
+        return f'ParseResult({list(self)!r})'
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'cannot set {name!r} on an immutable ParseResult')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'cannot delete {name!r} from an immutable ParseResult')
+
+    def __reduce__(self):
+        return ParseResult, (tuple(self),)
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def _index(self):
+        # built at most once per result; concurrent first lookups build equal indexes
+        index = self.__dict__.get('_by_field')
+
+        if index is None:
+            index = {}
+
+            for parsed in self:
+                index.setdefault(parsed.field, []).append(parsed)
+
+            index = {field: tuple(records) for field, records in index.items()}
+            self.__dict__['_by_field'] = index
+
+        return index
+
+    def get(self, field, default=None):
+        """returns the first clause parsed for field"""
+        records = self._index().get(field)
+        return default if records is None else records[0]
+
+    def get_all(self, field):
+        """returns every clause parsed for field, in query order"""
+        return self._index().get(field, ())
+
+    def fields(self):
+        return frozenset(self._index())
+
+    def as_dicts(self):
+        """the list-of-dicts form parse returned before ParsedFilter existed"""
+        return [parsed.as_dict() for parsed in self]
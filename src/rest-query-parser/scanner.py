@@ -0,0 +1,135 @@
+from urllib.parse import unquote, unquote_to_bytes
+
+from operators import ALL, EQUAL
+
+
+OPERATORS = frozenset(ALL)
+
+BYTE_OPERATORS = {operator.encode('ascii'): operator for operator in ALL}
+
+# the operator separator as clients percent-encoding every reserved character send it
+ENCODED_COLONS = frozenset(('%3A', '%3a'))
+ENCODED_BYTE_COLONS = frozenset((b'%3A', b'%3a'))
+
+# byte membership tests against ints are a plain memchr, far cheaper than subsequence tests
+PERCENT = ord('%')
+PLUS = ord('+')
+
+
+def decode(token):
+    """percent-decodes a token, leaving tokens without escapes untouched"""
+    if '+' in token:
+        token = token.replace('+', ' ')
+
+    if '%' in token:
+        return unquote(token)
+
+    return token
+
+
+def decode_bytes(token):
+    """percent-decodes a bytes token to str, replacing invalid utf-8 like urllib does"""
+    if PLUS in token:
+        token = token.replace(b'+', b' ')
+
+    if PERCENT in token:
+        token = unquote_to_bytes(token)
+
+    return token.decode('utf-8', 'replace')
+
+
+def split_expression(exp):
+    """splits an undecoded expression such as 'gte:10' into (operator, value) on its first ':'
+
+    a known operator followed by a percent-encoded ':', as urlencode writes it, splits too
+    """
+    operator, colon, value = exp.partition(':')
+
+    if '%' in operator:
+        index = operator.index('%')
+
+        if exp[index:index + 3] in ENCODED_COLONS and exp[:index] in OPERATORS:
+            return exp[:index], decode(exp[index + 3:])
+
+    if colon:
+        return operator, decode(value)
+    elif exp in OPERATORS:
+        return exp, ''
+
+    return EQUAL, decode(exp)
+
+
+def scan(qs, fields=None):
+    """yields (field, operator, value) for each clause of a query string in one left-to-right pass
+
+    every clause is split on its first '=' and first ':' only, then the field and value are
+    percent-decoded, so escaped separators are kept as data. when fields is given, clauses for
+    any other field are skipped before their expression is split or decoded.
+    """
+    for part in qs.split('&'):
+        if not part:
+            continue
+
+        field, _, exp = part.partition('=')
+
+        if '%' in field or '+' in field:
+            field = decode(field)
+
+        if fields is None or field in fields:
+            operator, value = split_expression(exp)
+            yield field, operator, value
+
+
+def scan_bytes(data, fields):
+    """the bytes counterpart of scan, for query strings taken straight from WSGI/ASGI
+
+    fields maps encoded field names to their str names. only the name of each clause is
+    sliced out of the buffer; the expression of an undeclared clause is never copied or
+    decoded, which keeps large tracking parameters cheap.
+    """
+    if data.__class__ is not bytes:
+        data = bytes(data)
+
+    find = data.find
+    length = len(data)
+    start = 0
+
+    while start < length:
+        end = find(b'&', start)
+
+        if end == -1:
+            end = length
+
+        if end > start:
+            eq = find(b'=', start, end)
+            key = data[start:end] if eq == -1 else data[start:eq]
+
+            if PERCENT in key or PLUS in key:
+                key = unquote_to_bytes(key.replace(b'+', b' '))
+
+            field = fields.get(key)
+
+            if field is not None:
+                operator, value = split_bytes_expression(b'' if eq == -1 else data[eq + 1:end])
+                yield field, operator, value
+
+        start = end + 1
+
+
+def split_bytes_expression(exp):
+    """the bytes counterpart of split_expression, returning str operator and value"""
+    operator, colon, value = exp.partition(b':')
+
+    if PERCENT in operator:
+        index = operator.index(b'%')
+
+        if exp[index:index + 3] in ENCODED_BYTE_COLONS and exp[:index] in BYTE_OPERATORS:
+            return BYTE_OPERATORS[exp[:index]], decode_bytes(exp[index + 3:])
+
+    if colon:
+        operator = BYTE_OPERATORS.get(operator) or operator.decode('utf-8', 'replace')
+        return operator, decode_bytes(value)
+    elif exp in BYTE_OPERATORS:
+        return BYTE_OPERATORS[exp], ''
+
+    return EQUAL, decode_bytes(exp)
@@ -0,0 +1,373 @@
+"""declarative filter sets: plain dict / JSON schemas built into FilterSet classes, and a compiled
+on-disk artifact workers load them from without building a class per endpoint at boot
+
+a schema names the filter set, its optional bases and its fields, plus class options and
+constructor arguments at the top level:
+
+    {
+        "name": "PersonFilterSet",
+        "bases": ["sort", "pagination"],
+        "sortable_fields": ["name", "age"],
+        "strict": true,
+        "max_clauses": 50,
+        "fields": {
+            "name": {"type": "string", "allow_null": false},
+            "age": {"type": "integer", "operators": ["eq", "gt", "lt"], "max_values": 20},
+            "tags": {"type": "delimited", "element": "string", "choices": ["a", "b"]}
+        }
+    }
+"""
+import hashlib
+import io
+import json
+import mmap
+import pickle
+import struct
+import sys
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+from keyword import iskeyword
+
+from filters import (BooleanFilter, CursorFilter, DateFilter, DateTimeFilter, DelimitedSetFilter,
+                     Filter, FloatFilter, IntegerFilter, SortFilter, StringFilter,
+                     WholeNumberFilter)
+from filterset import (_TABLES, CursorPaginationFilterSet, FilterSet, PaginationFilterSet,
+                       ProjectionFilterSet, SortFilterSet)
+from operators import ALL
+
+
+FILTER_TYPES = {
+    'boolean': BooleanFilter,
+    'integer': IntegerFilter,
+    'float': FloatFilter,
+    'whole_number': WholeNumberFilter,
+    'string': StringFilter,
+    'date': DateFilter,
+    'datetime': DateTimeFilter,
+    'delimited': DelimitedSetFilter,
+    'sort': SortFilter,
+    'cursor': CursorFilter,
+}
+
+BASES = {
+    'pagination': PaginationFilterSet,
+    'cursor_pagination': CursorPaginationFilterSet,
+    'projection': ProjectionFilterSet,
+    'sort': SortFilterSet,
+}
+
+# top level schema keys set as class attributes, and those passed to the FilterSet constructor
+CLASS_OPTIONS = ('sortable_fields', 'allowed_fields', 'cursor_keys', 'cursor_secret', 'columns')
+INSTANCE_OPTIONS = ('strict', 'cache_size', 'collect_errors', 'max_length', 'max_clauses',
+                    'max_field_clauses', 'max_values', 'max_number_length')
+
+# version of the artifact file layout
+ARTIFACT_VERSION = 2
+
+_MAGIC = b'RQPSCHEM'
+# magic, artifact version, python major and minor version, library fingerprint, pickle protocol,
+# length of the pickled index
+_HEADER = struct.Struct('<8sHBB16sHI')
+
+
+def _bases(schema):
+    names = schema.get('bases', ())
+
+    if isinstance(names, str):
+        names = (names,)
+
+    try:
+        return tuple(names), tuple(BASES[name] for name in names) or (FilterSet,)
+    except KeyError as ex:
+        raise ValueError(f'{schema["name"]}: unknown base {ex.args[0]!r}') from None
+
+
+def _check_operators(schema, field, operators):
+    if isinstance(operators, (str, bytes)) or not isinstance(operators, Iterable):
+        raise ValueError(f'{schema["name"]}.{field}: operators must be a list')
+
+    unknown = [operator for operator in operators if operator not in ALL]
+
+    if unknown:
+        raise ValueError(f'{schema["name"]}.{field}: unknown operators {unknown}')
+
+
+def _filter(schema, field, spec):
+    if not isinstance(spec, Mapping):
+        raise ValueError(f'{schema["name"]}.{field}: a field spec must be a mapping')
+
+    spec = dict(spec)
+
+    try:
+        filter_type = FILTER_TYPES[spec.pop('type')]
+    except KeyError:
+        raise ValueError(f'{schema["name"]}.{field}: missing or unknown filter type') from None
+
+    if 'operators' in spec:
+        _check_operators(schema, field, spec['operators'])
+
+    if 'filter_type' in spec:
+        raise ValueError(f'{schema["name"]}.{field}: name the element type of a set in element')
+
+    if 'element' in spec:
+        element = spec.pop('element')
+
+        if element not in FILTER_TYPES:
+            raise ValueError(f'{schema["name"]}.{field}: unknown element type {element!r}')
+
+        spec['filter_type'] = FILTER_TYPES[element]
+
+    try:
+        return filter_type(**spec)
+    except TypeError as ex:
+        raise ValueError(f'{schema["name"]}.{field}: {ex}') from None
+
+
+def _reserved(bases, field):
+    # whether a field would shadow a method or setting of the filter set
+    return any(field in vars(klass) and not isinstance(vars(klass)[field], Filter)
+               for base in bases for klass in base.__mro__)
+
+
+def build_class(schema):
+    """builds the FilterSet subclass a schema describes"""
+    if 'name' not in schema:
+        raise ValueError('a schema needs a name')
+
+    unknown = set(schema) - {'name', 'bases', 'fields'} - set(CLASS_OPTIONS) - set(INSTANCE_OPTIONS)
+
+    if unknown:
+        raise ValueError(f'{schema["name"]}: unknown schema keys {sorted(unknown)}')
+
+    if not isinstance(schema.get('fields', {}), Mapping):
+        raise ValueError(f'{schema["name"]}: fields must map field names to specs')
+
+    _, bases = _bases(schema)
+    namespace = {}
+
+    for option in CLASS_OPTIONS:
+        if option in schema:
+            value = schema[option]
+
+            if option == 'columns':
+                value = dict(value)
+            elif option != 'cursor_secret':
+                value = tuple(value)
+
+            namespace[option] = value
+
+    for field, spec in schema.get('fields', {}).items():
+        if field.startswith('_') or iskeyword(field) or _reserved(bases, field):
+            raise ValueError(f'{schema["name"]}: {field!r} cannot be used as a field name')
+
+        namespace[field] = _filter(schema, field, spec)
+
+    return type(schema['name'], bases, namespace)
+
+
+def build(schema):
+    """builds the FilterSet instance a schema describes, constructor options included"""
+    options = {option: schema[option] for option in INSTANCE_OPTIONS if option in schema}
+    return build_class(schema)(**options)
+
+
+def read_schemas(path):
+    """reads a JSON file holding one schema or a list of them"""
+    with open(path) as source:
+        schemas = json.load(source)
+
+    return [schemas] if isinstance(schemas, dict) else schemas
+
+
+def build_all(schemas):
+    """maps the name of each schema to its FilterSet instance"""
+    filter_sets = {}
+
+    for schema in schemas:
+        if schema.get('name') in filter_sets:
+            raise ValueError(f'{schema["name"]}: duplicate schema name')
+
+        filter_sets[schema.get('name')] = build(schema)
+
+    return filter_sets
+
+
+def _digest_code(digest, code):
+    digest.update(code.co_name.encode('utf-8'))
+    digest.update(code.co_code)
+
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            _digest_code(digest, const)
+        else:
+            _digest_value(digest, const)
+
+
+def _digest_value(digest, value):
+    # functions, including static and class methods, by their bytecode; plain settings such as
+    # operators by value, with sets sorted as their order varies between processes
+    code = getattr(getattr(value, '__func__', value), '__code__', None)
+
+    if code is not None:
+        _digest_code(digest, code)
+    elif isinstance(value, (frozenset, set)):
+        digest.update(repr(sorted(map(repr, value))).encode('utf-8'))
+    elif isinstance(value, (str, bytes, int, float, tuple, type(None))):
+        digest.update(repr(value).encode('utf-8'))
+
+
+@lru_cache(maxsize=None)
+def fingerprint():
+    """a digest of the filter and filter set classes artifacts are pickled from and of the
+    lookup tables they carry; an artifact only loads into the library that wrote it
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(_TABLES).encode('utf-8'))
+    classes = [Filter, FilterSet, *FILTER_TYPES.values(), *BASES.values()]
+
+    for cls in dict.fromkeys(klass for cls in classes for klass in cls.__mro__):
+        digest.update(cls.__qualname__.encode('utf-8'))
+
+        for name, value in sorted(vars(cls).items()):
+            digest.update(name.encode('utf-8'))
+            _digest_value(digest, value)
+
+    return digest.digest()
+
+
+# the filters the base classes declare, such as limit and offset, are shared by every filter set
+# built on them; artifacts store references to them instead of copies
+_SHARED = {id(value): (base, name) for base, cls in BASES.items()
+           for name, value in vars(cls).items() if isinstance(value, Filter)}
+
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _SHARED.get(id(obj))
+
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        base, name = pid
+        return vars(BASES[base])[name]
+
+
+def _record(schema):
+    # everything a worker needs to recreate the class without compiling it: its bases, the
+    # attributes it was built with, including filters added by the base classes, and its tables
+    cls = build_class(schema)
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in _TABLES and not name.startswith('__')}
+    options = {option: schema[option] for option in INSTANCE_OPTIONS if option in schema}
+    return schema['name'], _bases(schema)[0], namespace, cls.tables(), options
+
+
+def write_artifact(path, schemas, protocol=pickle.HIGHEST_PROTOCOL):
+    """compiles schemas into an artifact file for Artifact to load
+
+    each filter set is pickled on its own behind an index of their offsets, so loading one
+    never touches the bytes of the others.
+    """
+    records = []
+    index = {}
+    offset = 0
+
+    for schema in schemas:
+        if schema.get('name') in index:
+            raise ValueError(f'{schema["name"]}: duplicate schema name')
+
+        buffer = io.BytesIO()
+        _Pickler(buffer, protocol).dump(_record(schema))
+        record = buffer.getvalue()
+        index[schema['name']] = (offset, len(record))
+        records.append(record)
+        offset += len(record)
+
+    index = pickle.dumps(index, protocol)
+
+    with open(path, 'wb') as output:
+        output.write(_HEADER.pack(_MAGIC, ARTIFACT_VERSION, *sys.version_info[:2], fingerprint(),
+                                  protocol, len(index)))
+        output.write(index)
+        output.writelines(records)
+
+
+class Artifact:
+    """read-only mapping of schema names to the FilterSet instances of an artifact file
+
+    the file is memory mapped and a filter set is only unpickled, into a class of its own, the
+    first time it is looked up; opening reads nothing but the index. a pre-forking server can
+    either open the artifact in every worker, the mapped pages being shared through the page
+    cache, or load everything in the master before forking. artifacts are pickles: only open
+    files written by write_artifact from a trusted source.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, major, minor, digest, _, size = _HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+
+        if magic != _MAGIC or version != ARTIFACT_VERSION:
+            self._map.close()
+            raise ValueError(f'{path}: not a schema artifact of version {ARTIFACT_VERSION}')
+
+        if (major, minor) != sys.version_info[:2] or digest != fingerprint():
+            # its tables are installed as they are, so they must come from this very library
+            self._map.close()
+            raise ValueError(f'{path}: written by Python {major}.{minor} or another version '
+                             f'of this library, rebuild it with write_artifact')
+
+        start = _HEADER.size
+        self._index = pickle.loads(self._map[start:start + size])
+        self._start = start + size
+        self._loaded = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """unmaps the file; filter sets loaded so far stay usable"""
+        self._map.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def __getitem__(self, name):
+        filter_set = self._loaded.get(name)
+
+        if filter_set is None:
+            offset, size = self._index[name]
+            start = self._start + offset
+
+            record = _Unpickler(io.BytesIO(self._map[start:start + size])).load()
+            name, bases, namespace, tables, options = record
+
+            cls = type(name, tuple(BASES[base] for base in bases) or (FilterSet,), namespace,
+                       compiled=tables)
+            # concurrent first lookups may both build it, the first one stored wins
+            filter_set = self._loaded.setdefault(name, cls(**options))
+
+        return filter_set
+
+    def get(self, name, default=None):
+        return self[name] if name in self._index else default
+
+    def load_all(self):
+        """loads every filter set, e.g. in a master process before it forks its workers"""
+        return {name: self[name] for name in self._index}
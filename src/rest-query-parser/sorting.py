@@ -0,0 +1,104 @@
+from heapq import nlargest, nsmallest
+from operator import attrgetter, itemgetter
+
+from constants import DESCENDING
+
+
+def _getter(fields, attribute, nulls):
+    """a key reading fields; with nulls each value becomes (value is None, value) so None
+    sorts after every value, i.e. last ascending and first descending
+    """
+    get = (attrgetter if attribute else itemgetter)(*fields)
+
+    if not nulls:
+        return get
+
+    if len(fields) == 1:
+        return lambda row: (get(row) is None, get(row))
+
+    return lambda row: tuple((value is None, value) for value in get(row))
+
+
+def _sort(rows, ordering, attribute, nulls):
+    """a full stable sort; mixed directions run one sort per field, least significant first"""
+    directions = {direction for _, direction in ordering}
+
+    if len(directions) == 1:
+        key = _getter([field for field, _ in ordering], attribute, nulls)
+        return sorted(rows, key=key, reverse=DESCENDING in directions)
+
+    rows = list(rows)
+
+    for field, direction in reversed(ordering):
+        rows.sort(key=_getter([field], attribute, nulls), reverse=direction == DESCENDING)
+
+    return rows
+
+
+def _select(rows, ordering, limit, offset, attribute, nulls):
+    count = offset + limit if limit is not None else None
+
+    if count == 0:
+        return []
+    elif count is None or count * 16 >= len(rows):
+        # a full sort is cheaper than a heap holding a large share of the rows
+        return _sort(rows, ordering, attribute, nulls)[offset:count]
+
+    directions = {direction for _, direction in ordering}
+
+    if len(directions) == 1:
+        key = _getter([field for field, _ in ordering], attribute, nulls)
+        select = nlargest if DESCENDING in directions else nsmallest
+        return select(count, rows, key=key)[offset:]
+
+    # mixed directions: the heap only ranks the leading field, which bounds the rows that can
+    # make the page; those candidates, ties included, are then fully sorted
+    field, direction = ordering[0]
+    key = _getter([field], attribute, nulls)
+
+    if direction == DESCENDING:
+        boundary = key(nlargest(count, rows, key=key)[-1])
+        candidates = [row for row in rows if key(row) >= boundary]
+    else:
+        boundary = key(nsmallest(count, rows, key=key)[-1])
+        candidates = [row for row in rows if key(row) <= boundary]
+
+    return _sort(candidates, ordering, attribute, nulls)[offset:count]
+
+
+def sort_rows(rows, ordering, limit=None, offset=None, attribute=False):
+    """orders rows, mappings or objects read by attribute, by (field, direction) pairs and
+    returns the offset:offset + limit slice as a list
+
+    with a limit that is small next to the number of rows, only the first offset + limit rows
+    are kept on a heap, O(n log k), instead of sorting everything. ties keep their input order.
+    """
+    if not isinstance(rows, (list, tuple)):
+        rows = list(rows)
+
+    offset = offset or 0
+
+    if not ordering:
+        return list(rows[offset:None if limit is None else offset + limit])
+
+    try:
+        return _select(rows, ordering, limit, offset, attribute, False)
+    except TypeError:
+        # None compared against a value, retry with the slower null aware key
+        return _select(rows, ordering, limit, offset, attribute, True)
+
+
+def execute(parsed, rows, attribute=False):
+    """applies the sort, limit and offset clauses of a parse result to in-memory rows
+
+    meant for filter sets combining SortFilterSet with PaginationFilterSet; a missing clause
+    leaves rows unsorted or unsliced.
+    """
+    values = {}
+
+    for clause in parsed:
+        if clause.field in ('sort', 'limit', 'offset'):
+            values[clause.field] = clause.value
+
+    return sort_rows(rows, values.get('sort', ()), values.get('limit'), values.get('offset'),
+                     attribute)
@@ -0,0 +1,213 @@
+from cache import make_cache
+from constants import DESCENDING
+from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
+                       LESS_THAN, LESS_THAN_OR_EQUAL)
+
+
+COMPARISONS = {
+    EQUAL: '=',
+    NOT_EQUAL: '<>',
+    GREATER_THAN: '>',
+    GREATER_THAN_OR_EQUAL: '>=',
+    LESS_THAN: '<',
+    LESS_THAN_OR_EQUAL: '<=',
+}
+
+PLACEHOLDERS = {
+    'qmark': '?',
+    'format': '%s',
+}
+
+# LIMIT values meaning no limit, for queries with an offset only: sqlite and mysql need a LIMIT
+# before OFFSET, and mysql rejects negative ones. postgresql takes OFFSET alone, or LIMIT ALL
+UNLIMITED = {
+    'sqlite': '-1',
+    'mysql': '18446744073709551615',
+    'postgresql': 'ALL',
+}
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def arity_bucket(count):
+    """rounds an in/nin list length up to a power of two so that lists share statements"""
+    bucket = 1
+
+    while bucket < count:
+        bucket *= 2
+
+    return bucket
+
+
+class SQLCompiler:
+    """compiles parse results into parameterized SQL: a 'WHERE ... ORDER BY ... LIMIT ? OFFSET ?'
+    tail
+
+    clauses are only translated for fields of the filter set, through its columns mapping.
+    the SQL text is memoized by query shape, the sorted (field, operator, in/nin arity bucket,
+    null) tuples, so queries differing only in values reuse one statement and driver side
+    prepared statement caches stay warm. in/nin lists are padded to their bucket by repeating
+    their last value. comparisons follow SQL semantics, so rows holding NULL only match
+    eq:null, neq:null and null members of in lists.
+    """
+
+    def __init__(self, paramstyle='qmark', unlimited=UNLIMITED['sqlite'], cache_size=256):
+        self.placeholder = PLACEHOLDERS[paramstyle]
+        # LIMIT value emitted when only an offset is given, see UNLIMITED; None leaves the
+        # LIMIT out, which only backends accepting a bare OFFSET, such as postgresql, allow
+        self.unlimited = unlimited
+        self._statements = make_cache(cache_size)
+
+    def cache_info(self):
+        """hit/miss/eviction counters of the statement cache; hits are reused statements"""
+        return self._statements.info()
+
+    def compile(self, filter_set, parsed):
+        """returns (sql, params) for a parse result of filter_set
+
+        the sort of a SortFilterSet becomes the ORDER BY, through the columns mapping. the
+        after/before cursors of a CursorPaginationFilterSet become row value comparisons on its
+        cursor keys. its statements always order by the cursor keys, descending for a
+        before-only page.
+        """
+        control = filter_set.control_fields
+        clauses = []
+        keyset = []
+        # limit, offset and sort
+        controls = {}
+
+        for field, operator, value in (clause.values() for clause in parsed):
+            if field not in control:
+                clauses.append(_normalize(field, operator, value))
+            elif field in ('after', 'before'):
+                keyset.append((field, value))
+            else:
+                controls[field] = value
+
+        ordering = controls.get('sort', ())
+        limit = controls.get('limit')
+        offset = controls.get('offset')
+
+        clauses.sort(key=lambda clause: clause[0])
+        keyset.sort(key=lambda condition: condition[0])
+        shape = (tuple(shape for shape, _ in clauses), tuple(field for field, _ in keyset),
+                 ordering, limit is not None, offset is not None)
+        key = (type(filter_set), shape)
+        sql = self._statements.get(key)
+
+        if sql is None:
+            sql = self._render(filter_set, shape)
+            self._statements.put(key, sql)
+
+        params = [param for _, values in clauses for param in values]
+
+        for _, values in keyset:
+            params.extend(values)
+
+        if limit is not None:
+            params.append(limit)
+
+        if offset is not None:
+            params.append(offset)
+
+        return sql, params
+
+    def _render(self, filter_set, shape):
+        clauses, keyset, ordering, has_limit, has_offset = shape
+        conditions = [self._condition(_column(filter_set, field), operator, arity, null)
+                      for field, operator, arity, null in clauses]
+        # pages of a cursor paginated filter set are always in cursor key order, the first page
+        # included, or the cursors taken from them would skip or repeat rows
+        keys = [_column(filter_set, key) for key in getattr(filter_set, 'cursor_keys', ())]
+        parts = []
+
+        if keyset:
+            row = keys[0] if len(keys) == 1 else '(' + ', '.join(keys) + ')'
+            values = ', '.join([self.placeholder] * len(keys))
+            values = values if len(keys) == 1 else f'({values})'
+            conditions.extend(f'{row} {">" if field == "after" else "<"} {values}'
+                              for field in keyset)
+
+        if conditions:
+            parts.append('WHERE ' + ' AND '.join(conditions))
+
+        if keys:
+            direction = ' DESC' if keyset == ('before',) else ''
+            parts.append('ORDER BY ' + ', '.join(key + direction for key in keys))
+        elif ordering:
+            parts.append('ORDER BY ' + ', '.join(
+                _column(filter_set, field) + (' DESC' if direction == DESCENDING else '')
+                for field, direction in ordering))
+
+        if has_limit:
+            parts.append(f'LIMIT {self.placeholder}')
+        elif has_offset and self.unlimited is not None:
+            parts.append(f'LIMIT {self.unlimited}')
+
+        if has_offset:
+            parts.append(f'OFFSET {self.placeholder}')
+
+        return ' '.join(parts)
+
+    def _condition(self, column, operator, arity, null):
+        if operator in (IN, NOT_IN):
+            return self._membership(column, operator, arity, null)
+        elif null and operator == EQUAL:
+            return f'{column} IS NULL'
+        elif null and operator == NOT_EQUAL:
+            return f'{column} IS NOT NULL'
+        elif null:
+            # ordering against null matches nothing
+            return '1 = 0'
+
+        return f'{column} {COMPARISONS[operator]} {self.placeholder}'
+
+    def _membership(self, column, operator, arity, null):
+        if not arity:
+            return f'{column} IS NULL' if operator == IN else f'{column} IS NOT NULL'
+
+        placeholders = ', '.join([self.placeholder] * arity)
+
+        if operator == IN:
+            condition = f'{column} IN ({placeholders})'
+            return f'({condition} OR {column} IS NULL)' if null else condition
+
+        condition = f'{column} NOT IN ({placeholders})'
+        return f'({condition} AND {column} IS NOT NULL)' if null else condition
+
+
+def _column(filter_set, field):
+    if filter_set.columns is None:
+        if field not in filter_set._filters and field not in getattr(filter_set, 'cursor_keys', ()):
+            raise ValueError(f'{field!r} is not a field of {type(filter_set).__name__}')
+
+        return quote(field)
+
+    try:
+        return filter_set.columns[field]
+    except KeyError:
+        raise ValueError(f'no column mapped for field {field!r}') from None
+
+
+def _normalize(field, operator, value):
+    """((field, operator, arity bucket, null), params) for one clause"""
+    if operator in (IN, NOT_IN):
+        values = [v for v in value if v is not None]
+        null = len(values) < len(value)
+        arity = arity_bucket(len(values)) if values else 0
+        values.extend(values[-1:] * (arity - len(values)))
+        return (field, operator, arity, null), values
+    elif value is None:
+        return (field, operator, 0, True), []
+
+    return (field, operator, 0, False), [value]
+
+
+_default = SQLCompiler()
+
+
+def compile_sql(filter_set, parsed):
+    """compiles with a shared qmark style SQLCompiler, see SQLCompiler.compile"""
+    return _default.compile(filter_set, parsed)
@@ -1,4 +1,33 @@
+from array import array
+from bisect import bisect_left
+from datetime import date
+from functools import lru_cache
+from urllib.parse import quote
+
 from constants import EMPTY_VALUES
+from exceptions import FrozenInstanceException
+
+
+class Frozen:
+    """refuses attribute assignment and deletion once _freeze ran at the end of construction,
+    so instances can be shared between threads without any locking
+    """
+    _frozen = False
+
+    def _freeze(self):
+        object.__setattr__(self, '_frozen', True)
+
+    def __setattr__(self, name, value):
+        if self._frozen:
+            raise FrozenInstanceException(f'{type(self).__name__} is frozen, cannot set {name}')
+
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if self._frozen:
+            raise FrozenInstanceException(f'{type(self).__name__} is frozen, cannot delete {name}')
+
+        object.__delattr__(self, name)
 
 
 def coalesce(*args):
@@ -7,3 +36,96 @@ def coalesce(*args):
             return arg
 
     return None
+
+
+@lru_cache(maxsize=4096)
+def quote_text(text):
+    """percent-encodes text for a query string value, memoizing the frequent ones"""
+    return quote(text, safe='')
+
+
+def format_value(value):
+    """renders a parsed value back into query string form, percent-encoding text
+
+    sets and arrays of in/nin values are rendered sorted, tuples in their own order.
+    """
+    if value is None:
+        return 'null'
+    elif value is True:
+        return 'true'
+    elif value is False:
+        return 'false'
+    elif isinstance(value, (int, float)):
+        return repr(value)
+    elif isinstance(value, str):
+        return quote_text(value)
+    elif isinstance(value, date):
+        return quote_text(value.isoformat())
+    elif isinstance(value, tuple):
+        return ','.join(map(format_value, value))
+
+    return ','.join(sorted(map(format_value, value)))
+
+
+def contains(values, value):
+    """membership test for in/nin values: a binary search in the sorted, deduplicated arrays
+    returned by packed filters, a plain in test for sets and anything else
+    """
+    if values.__class__ is SortedValues:
+        values = values._values
+    elif values.__class__ is not array:
+        return value in values
+
+    try:
+        index = bisect_left(values, value)
+    except TypeError:
+        # nulls and other values an array cannot hold are never members
+        return False
+
+    return index < len(values) and values[index] == value
+
+
+class SortedValues:
+    """the in/nin values of a packed filter: a read-only sequence over a sorted, deduplicated
+    typed array, probed with contains instead of a linear scan
+
+    it owns the array, so parse results holding it stay immutable, cached ones included.
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values', values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'SortedValues is read-only, cannot set {name}')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'SortedValues is read-only, cannot delete {name}')
+
+    def __contains__(self, value):
+        return contains(self._values, value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        # slices of an array are copies, so they cannot reach the owned array either
+        return self._values[index]
+
+    def __eq__(self, other):
+        if other.__class__ is SortedValues:
+            return self._values == other._values
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self._values))
+
+    def __repr__(self):
+        return f'SortedValues({self._values!r})'
+
+    def __reduce__(self):
+        return SortedValues, (self._values,)
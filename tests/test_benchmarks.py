@@ -0,0 +1,40 @@
+import json
+
+from benchmarks.suite import FORMAT_VERSION, compare, main
+
+
+def report(**results):
+    return {'version': FORMAT_VERSION, 'meta': {}, 'results': results}
+
+
+def stats(median_ns, peak_bytes=1000):
+    return {'median_ns': median_ns, 'p95_ns': median_ns, 'ops_per_sec': 1e9 / median_ns,
+            'peak_bytes': peak_bytes}
+
+
+BASELINE = report(**{'parse:short:passive': stats(1000), 'parse:long:passive': stats(5000),
+                     'filter:IntegerFilter:strict': stats(200, 0)})
+
+
+def test_compare_should_flag_latency_and_memory_past_thresholds():
+    current = report(**{'parse:short:passive': stats(1200), 'parse:long:passive': stats(5400, 1300),
+                        'filter:IntegerFilter:strict': stats(150, 500),
+                        'parse:new:passive': stats(9999)})
+
+    assert compare(BASELINE, current) == [
+        ('parse:long:passive', 'peak_bytes', 1000, 1300, 0.3),
+        ('parse:short:passive', 'median_ns', 1000, 1200, 0.2),
+    ]
+    assert compare(BASELINE, current, threshold=0.25, memory_threshold=0.5) == []
+
+
+def test_compare_command_should_exit_non_zero_on_regression(tmp_path, capsys):
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    baseline.write_text(json.dumps(BASELINE))
+    current.write_text(json.dumps(BASELINE))
+    assert main(['compare', str(baseline), str(current)]) == 0
+    assert 'no regressions' in capsys.readouterr().out
+
+    current.write_text(json.dumps(report(**{'parse:short:passive': stats(2000)})))
+    assert main(['compare', str(baseline), str(current)]) == 1
+    assert 'REGRESSED parse:short:passive' in capsys.readouterr().out
@@ -0,0 +1,101 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import LRUCache, ShardedLRUCache, make_cache
+from predicates import _factories
+from sql import SQLCompiler
+
+
+def test_lru_cache_should_count_hits_and_misses():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.info() == (1, 1, 0, 2, 1)
+
+
+def test_lru_cache_should_evict_least_recently_used_entry():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert cache.info().evictions == 1
+    assert len(cache) == 2
+
+
+def test_lru_cache_should_reset_on_clear():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 2, 0)
+
+
+def test_lru_cache_should_reject_non_positive_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_lru_cache_should_pickle_without_its_lock():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.get('a') == 1
+    copy.put('b', 2)
+
+
+def test_sharded_cache_should_split_maxsize_between_shards():
+    cache = ShardedLRUCache(100, shards=8)
+    assert sum(shard.maxsize for shard in cache._shards) == 100
+    assert ShardedLRUCache(3, shards=8).info().maxsize == 3
+    assert len(ShardedLRUCache(3, shards=8)._shards) == 3
+
+
+def test_sharded_cache_should_count_across_shards():
+    cache = ShardedLRUCache(64, shards=4)
+
+    for i in range(10):
+        cache.put(i, str(i))
+
+    assert all(cache.get(i) == str(i) for i in range(10))
+    assert cache.get('missing') is None
+    assert 3 in cache
+    assert len(cache) == 10
+    assert cache.info() == (10, 1, 0, 64, 10)
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 64, 0)
+
+
+def test_make_cache_should_shard_only_large_caches():
+    assert isinstance(make_cache(8), LRUCache)
+    assert isinstance(make_cache(4096), ShardedLRUCache)
+    assert len(make_cache(4096)._shards) == 16
+
+
+def test_shared_caches_should_be_sharded():
+    assert isinstance(_factories, ShardedLRUCache)
+    assert isinstance(SQLCompiler()._statements, ShardedLRUCache)
+    assert isinstance(SQLCompiler(cache_size=16)._statements, LRUCache)
+
+
+@pytest.mark.parametrize('cache', [LRUCache(50), ShardedLRUCache(50, shards=4)])
+def test_cache_counters_should_stay_exact_under_threads(cache):
+    def work(offset):
+        for i in range(2000):
+            key = (offset + i) % 100
+
+            if cache.get(key) is None:
+                cache.put(key, key)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(work, range(8)))
+
+    info = cache.info()
+    assert info.hits + info.misses == 8 * 2000
+    assert info.currsize <= 50
@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from collection import FilteredCollection, SortedIndex
+from filters import BooleanFilter, DateTimeFilter, FloatFilter, IntegerFilter, StringFilter
+from filterset import CursorPaginationFilterSet, PaginationFilterSet
+from operators import GREATER_THAN, GREATER_THAN_OR_EQUAL, LESS_THAN, LESS_THAN_OR_EQUAL
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter()
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+
+
+PEOPLE = [
+    {'name': 'Ron', 'age': 65, 'weight': 200.5, 'divorced': True},
+    {'name': 'Leslie', 'age': 40, 'weight': 120.0, 'divorced': False},
+    {'name': 'April', 'age': None, 'weight': 110.0, 'divorced': False},
+    {'name': 'Tom', 'age': 30, 'weight': 150.0, 'divorced': True},
+    {'name': 'Ann', 'age': 40, 'weight': 130.0, 'divorced': False},
+]
+
+
+def names(records):
+    return [record['name'] for record in records]
+
+
+@pytest.fixture
+def people():
+    return FilteredCollection(PersonFilterSet, PEOPLE)
+
+
+def test_should_index_fields_by_operator_support(people):
+    assert set(people._hashed) == {'name', 'age', 'weight', 'divorced'}
+    assert set(people._sorted) == {'age', 'weight'}
+
+
+def test_should_answer_equality_and_in_from_hash_indexes(people):
+    assert names(people.query('age=40')) == ['Leslie', 'Ann']
+    assert names(people.query('name=in:Tom,Ron,Nobody')) == ['Ron', 'Tom']
+    assert names(people.query('age=null')) == ['April']
+
+
+def test_should_answer_ranges_from_sorted_indexes(people):
+    assert names(people.query('age=gt:30')) == ['Ron', 'Leslie', 'Ann']
+    assert names(people.query('age=gte:30&weight=lt:140')) == ['Leslie', 'Ann']
+    assert names(people.query('age=lte:40&divorced=true')) == ['Tom']
+
+
+def test_should_apply_unindexed_clauses_to_candidates(people):
+    assert names(people.query('age=gte:40&name=neq:Ron')) == ['Leslie', 'Ann']
+    assert names(people.query('divorced=nin:true')) == ['Leslie', 'April', 'Ann']
+
+
+def test_should_apply_limit_and_offset(people):
+    assert names(people.query('limit=2')) == ['Ron', 'Leslie']
+    assert names(people.query('divorced=false&offset=1&limit=1')) == ['April']
+    assert names(people.query('age=gt:20&offset=2')) == ['Tom', 'Ann']
+
+
+def test_should_maintain_indexes_on_insert_and_delete(people):
+    row_id = people.insert({'name': 'Andy', 'age': 35, 'weight': 180.0, 'divorced': True})
+    assert names(people.query('age=gt:30&age=lt:40')) == ['Andy']
+
+    assert people.delete(row_id)['name'] == 'Andy'
+    people.delete(1)
+    assert names(people.query('age=gt:30')) == ['Ron', 'Ann']
+    assert names(people.query('name=Leslie')) == []
+    assert len(people) == 4
+
+
+def test_should_support_attribute_access():
+    people = FilteredCollection(PersonFilterSet(), [SimpleNamespace(**p) for p in PEOPLE],
+                                attribute=True)
+    assert [p.name for p in people.query('weight=gt:125&divorced=false')] == ['Ann']
+
+
+def test_sorted_index_should_select_ranges():
+    index = SortedIndex()
+
+    for row_id, value in enumerate([5, 1, None, 3, 3]):
+        index.add(value, row_id)
+
+    assert sorted(index.select(GREATER_THAN, 3)) == [0]
+    assert sorted(index.select(GREATER_THAN_OR_EQUAL, 3)) == [0, 3, 4]
+    assert sorted(index.select(LESS_THAN, 3)) == [1]
+    assert sorted(index.select(LESS_THAN_OR_EQUAL, 3)) == [1, 3, 4]
+
+    index.remove(3, 3)
+    assert sorted(index.select(LESS_THAN_OR_EQUAL, 3)) == [1, 4]
+
+
+def test_should_extend_with_many_records(people):
+    row_ids = people.extend([{'name': 'Andy', 'age': 35, 'weight': 180.0, 'divorced': True},
+                             {'name': 'Donna', 'age': 38, 'weight': 140.0, 'divorced': False}])
+    assert list(row_ids) == [5, 6]
+    assert names(people.query('age=gt:30&age=lt:40')) == ['Andy', 'Donna']
+
+
+def test_should_read_missing_fields_as_null_on_every_path(people):
+    people.insert({'name': 'Jerry', 'weight': 190.0})
+
+    assert names(people.query('age=null')) == ['April', 'Jerry']
+    assert names(people.query('name=neq:Ron&age=neq:40')) == ['April', 'Tom', 'Jerry']
+    assert names(people.query('name=neq:Ron&divorced=null')) == ['Jerry']
+
+
+@pytest.mark.parametrize('records', [
+    [{'name': 'Andy', 'age': 35}, {'name': 'Donna', 'age': 'thirty'}],
+    [{'name': 'Andy', 'age': 35}, {'name': ['Donna'], 'age': 38}],
+])
+def test_should_leave_collection_unchanged_if_records_cannot_be_indexed(people, records):
+    with pytest.raises(TypeError):
+        people.extend(records)
+
+    with pytest.raises(TypeError):
+        people.insert(records[1])
+
+    assert len(people) == 5
+    assert names(people.query('age=gt:30&age=lt:40')) == []
+    assert names(people.query('name=Andy')) == []
+    assert list(people.extend(records[:1])) == [5]
+
+
+def test_should_answer_datetime_ranges_from_sorted_index():
+    class EventFilterSet(PaginationFilterSet):
+        created = DateTimeFilter()
+
+    events = [{'created': datetime(2024, 1, day, tzinfo=timezone.utc)} for day in (5, 1, 20, 9)]
+    collection = FilteredCollection(EventFilterSet, events)
+
+    assert 'created' in collection._sorted
+    rows = collection.query('created=gte:2024-01-05T00:00:00Z&created=lt:1705276800')
+    assert [row['created'].day for row in rows] == [5, 9]
+
+
+class PersonCursorFilterSet(CursorPaginationFilterSet):
+    cursor_keys = ('age', 'name')
+    cursor_secret = 'not-so-secret'
+
+    weight = FloatFilter()
+
+
+def test_should_page_collection_by_cursors():
+    filter_set = PersonCursorFilterSet()
+    people = [person for person in PEOPLE if person['age'] is not None]
+    collection = FilteredCollection(filter_set, people)
+
+    first = list(collection.query('limit=2'))
+    assert names(first) == ['Tom', 'Ann']
+
+    second = list(collection.query(f'limit=2&after={filter_set.next_cursor(first)}'))
+    assert names(second) == ['Leslie', 'Ron']
+    assert list(collection.query(f'limit=2&after={filter_set.next_cursor(second)}')) == []
+
+    previous = f'limit=1&before={filter_set.previous_cursor(second)}'
+    assert names(collection.query(previous)) == ['Ann']
+    assert names(collection.query(f'weight__gt=125&{previous}')) == ['Ann']
@@ -0,0 +1,72 @@
+import pytest
+
+from filters import FloatFilter, IntegerFilter, StringFilter
+from filterset import PaginationFilterSet
+from operators import GREATER_THAN
+from results import ParsedFilter, ParseResult
+
+np = pytest.importorskip('numpy')
+
+from columnar import evaluate  # noqa: E402
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter()
+    age = IntegerFilter(allow_null=False)
+    weight = FloatFilter()
+
+
+filter_set = PersonFilterSet()
+
+TABLE = {
+    'name': np.array(['Ron', 'Leslie', None, 'Tom'], dtype=object),
+    'age': np.array([65, 40, 30, 30]),
+    'weight': np.array([200.5, np.nan, 110.0, 150.0]),
+}
+
+
+def rows(qs):
+    return np.flatnonzero(evaluate(filter_set.parse(qs), TABLE, filter_set)).tolist()
+
+
+def test_should_match_every_row_without_clauses():
+    assert rows('') == [0, 1, 2, 3]
+    assert rows('limit=1') == [0, 1, 2, 3]
+
+
+def test_should_apply_comparisons_and_combine_clauses():
+    assert rows('age=gt:30') == [0, 1]
+    assert rows('age=lte:40&weight=gte:120') == [3]
+    assert rows('age=30&name=neq:Tom') == [2]
+
+
+def test_should_map_in_and_not_in_to_isin():
+    assert rows('age=in:30,65') == [0, 2, 3]
+    assert rows('name=nin:Ron,Tom') == [1, 2]
+    assert rows('name=in:Ron,null') == [0, 2]
+
+
+def test_should_handle_nulls_in_float_and_object_columns():
+    assert rows('weight=null') == [1]
+    assert rows('weight=neq:null') == [0, 2, 3]
+    assert rows('name=null') == [2]
+    assert rows('weight=lt:null') == []
+
+
+def test_should_skip_nulls_when_ordering_object_columns():
+    parsed = ParseResult([ParsedFilter('name', GREATER_THAN, 'M')])
+    assert evaluate(parsed, TABLE).tolist() == [True, False, False, True]
+
+
+def test_should_skip_nulls_in_columns_of_non_nullable_filters():
+    # allow_null only keeps clients from sending null, the data may still hold it
+    table = {'age': np.array([1, None, 5], dtype=object)}
+    assert evaluate(filter_set.parse('age=gt:2'), table, filter_set).tolist() == [False, False,
+                                                                                  True]
+    assert evaluate(filter_set.parse('age=neq:1'), table, filter_set).tolist() == [False, True,
+                                                                                   True]
+
+
+def test_should_accept_plain_sequences_without_filter_set():
+    mask = evaluate(filter_set.parse('age=gte:40'), {'age': [65, 40, 30]})
+    assert mask.tolist() == [True, True, False]
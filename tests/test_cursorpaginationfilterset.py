@@ -0,0 +1,122 @@
+import sqlite3
+from datetime import date, datetime, timezone
+
+import pytest
+
+from cursors import decode_cursor, encode_cursor
+from exceptions import InvalidCursorException
+from filters import IntegerFilter
+from filterset import CursorPaginationFilterSet
+from operators import GREATER_THAN, LESS_THAN
+from sql import SQLCompiler
+
+
+class PersonCursorFilterSet(CursorPaginationFilterSet):
+    cursor_keys = ('age', 'id')
+    cursor_secret = 'not-so-secret'
+
+    age = IntegerFilter()
+
+
+cursor_filter_set = PersonCursorFilterSet(strict=True)
+
+PEOPLE = [{'id': i, 'age': 20 + i % 5, 'name': f'Person {i}'} for i in range(20)]
+ORDERED = sorted(PEOPLE, key=lambda row: (row['age'], row['id']))
+
+
+def test_should_round_trip_cursor_values():
+    token = encode_cursor((30, 'Bob'), b'key')
+    assert decode_cursor(token, b'key') == (30, 'Bob')
+    assert '=' not in token
+
+
+def test_should_round_trip_date_and_datetime_cursor_values():
+    values = (date(2020, 2, 29), datetime(2020, 2, 29, 12, 30, tzinfo=timezone.utc), 'Bob')
+    assert decode_cursor(encode_cursor(values, b'key'), b'key') == values
+
+    with pytest.raises(TypeError):
+        encode_cursor([object()], b'key')
+
+
+def test_should_reject_tampered_or_foreign_cursors():
+    token = encode_cursor((30, 7), b'key')
+    assert decode_cursor(token, b'other') is None
+    forged = token[:-2] + ('A' if token[-2] != 'A' else 'B') + token[-1]
+    assert decode_cursor(forged, b'key') is None
+    assert decode_cursor('!!!', b'key') is None
+
+
+def test_should_parse_cursors_into_key_values():
+    token = cursor_filter_set.cursor({'age': 21, 'id': 6})
+    parsed = cursor_filter_set.parse(f'after={token}&limit=5')
+    assert parsed.get('after').value == (21, 6)
+    assert parsed.get('limit').value == 5
+
+
+def test_should_raise_error_if_cursor_is_invalid():
+    with pytest.raises(InvalidCursorException):
+        cursor_filter_set.parse('after=forged')
+
+    with pytest.raises(InvalidCursorException):
+        cursor_filter_set.parse(f'before={encode_cursor([1], b"not-so-secret")}')
+
+
+def test_should_produce_next_and_previous_cursors():
+    page = ORDERED[5:10]
+    parsed = cursor_filter_set.parse(f'after={cursor_filter_set.next_cursor(page)}')
+    assert cursor_filter_set.keyset(parsed) == [(GREATER_THAN, (22, 7))]
+
+    parsed = cursor_filter_set.parse(f'before={cursor_filter_set.previous_cursor(page)}')
+    assert cursor_filter_set.keyset(parsed) == [(LESS_THAN, (21, 6))]
+    assert cursor_filter_set.next_cursor([]) is None
+
+
+def test_should_page_through_rows_with_keyset_predicate():
+    seen = []
+    token = None
+
+    while True:
+        qs = f'after={token}&limit=6' if token else 'limit=6'
+        parsed = cursor_filter_set.parse(qs)
+        predicate = cursor_filter_set.keyset_predicate(parsed)
+        page = [row for row in ORDERED if predicate(row)][:parsed.get('limit').value]
+
+        if not page:
+            break
+
+        seen.extend(page)
+        token = cursor_filter_set.next_cursor(page)
+
+    assert seen == ORDERED
+
+
+def test_should_compile_cursors_into_keyset_sql():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE people (id INTEGER, age INTEGER, name TEXT)')
+    connection.executemany('INSERT INTO people VALUES (:id, :age, :name)', PEOPLE)
+    compiler = SQLCompiler()
+
+    after = cursor_filter_set.cursor(ORDERED[4])
+    sql, params = compiler.compile(cursor_filter_set,
+                                   cursor_filter_set.parse(f'age=gte:21&after={after}&limit=3'))
+    assert sql == 'WHERE "age" >= ? AND ("age", "id") > (?, ?) ORDER BY "age", "id" LIMIT ?'
+    rows = connection.execute(f'SELECT id FROM people {sql}', params).fetchall()
+    assert [row for row, in rows] == [row['id'] for row in ORDERED[5:8]]
+
+    before = cursor_filter_set.cursor(ORDERED[10])
+    sql, params = compiler.compile(cursor_filter_set,
+                                   cursor_filter_set.parse(f'before={before}&limit=3'))
+    assert sql.endswith('ORDER BY "age" DESC, "id" DESC LIMIT ?')
+    rows = connection.execute(f'SELECT id FROM people {sql}', params).fetchall()
+    assert [row for row, in reversed(rows)] == [row['id'] for row in ORDERED[7:10]]
+
+
+def test_should_order_first_page_by_cursor_keys():
+    sql, params = SQLCompiler().compile(cursor_filter_set, cursor_filter_set.parse('limit=5'))
+    assert (sql, params) == ('ORDER BY "age", "id" LIMIT ?', [5])
+
+
+def test_should_require_cursor_secret():
+    with pytest.raises(ValueError, match='cursor_secret'):
+        class UnsignedFilterSet(CursorPaginationFilterSet):
+            age = IntegerFilter()
@@ -1,10 +1,18 @@
+import pickle
+from array import array
+from datetime import date, datetime, timezone
+
 import pytest
 
 from exceptions import (NullNotAllowedException, InvalidBooleanException, InvalidIntegerException,
-                        InvalidFloatException)
-from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter, DelimitedSetFilter
+                        InvalidFloatException, InvalidWholeNumberException, TooManyValuesException,
+                        InvalidChoiceException, InvalidDateException, InvalidDateTimeException,
+                        FrozenInstanceException)
+from filters import (BooleanFilter, FloatFilter, IntegerFilter, StringFilter, DelimitedSetFilter,
+                     WholeNumberFilter, DateFilter, DateTimeFilter)
 from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
                        LESS_THAN, LESS_THAN_OR_EQUAL)
+from utils import SortedValues
 
 
 # string filter tests
@@ -147,4 +155,215 @@ def test_boolean_filter_should_support_these_operators():
 def test_should_parse_valid_set():
     f = DelimitedSetFilter(filter_type=IntegerFilter)
     parsed = f.parse('1,2,3')
-    assert parsed == [1, 2, 3]
+    assert parsed == (1, 2, 3)
+
+
+def test_delimited_set_filter_should_reject_element_that_is_not_a_filter():
+    with pytest.raises(TypeError):
+        DelimitedSetFilter(filter_type='integer')
+
+    with pytest.raises(TypeError):
+        DelimitedSetFilter(filter_type=int)
+
+
+def test_delimited_set_filter_should_deduplicate_in_first_seen_order():
+    f = DelimitedSetFilter()
+    assert f.parse('b,a, b,c') == ('b', 'a', 'c')
+    assert f.parse('') == ()
+
+
+def test_delimited_set_filter_should_parse_and_allow_null_by_default():
+    assert DelimitedSetFilter().parse('null') is None
+
+    with pytest.raises(NullNotAllowedException):
+        DelimitedSetFilter(allow_null=False).parse('null')
+
+
+def test_delimited_set_filter_should_reuse_element_filter():
+    element = IntegerFilter(allow_null=False)
+    f = DelimitedSetFilter(filter_type=element)
+    assert f.element is element
+
+    with pytest.raises(NullNotAllowedException):
+        f.parse('1,null')
+
+
+def test_delimited_set_filter_should_enforce_max_values():
+    with pytest.raises(TooManyValuesException):
+        DelimitedSetFilter(max_values=2).parse('a,b,c')
+
+
+def test_delimited_set_filter_should_enforce_choices():
+    f = DelimitedSetFilter(choices=('id', 'name'))
+    assert f.parse('name,id') == ('name', 'id')
+
+    with pytest.raises(InvalidChoiceException):
+        f.parse('id,password')
+
+
+def test_delimited_set_filter_should_not_print(capsys):
+    DelimitedSetFilter().parse('a,b')
+    assert capsys.readouterr().out == ''
+
+
+# non-raising validation tests
+def test_validate_should_return_parsed_value_without_error():
+    assert IntegerFilter().validate('1') == (1, None)
+    assert FloatFilter().validate('1.5') == (1.5, None)
+    assert BooleanFilter().validate('no') == (False, None)
+    assert WholeNumberFilter().validate('null') == (None, None)
+
+
+def test_validate_should_return_exception_class_instead_of_raising():
+    assert IntegerFilter().validate('notanint') == (None, InvalidIntegerException)
+    assert FloatFilter().validate('notafloat') == (None, InvalidFloatException)
+    assert BooleanFilter().validate('maybe') == (None, InvalidBooleanException)
+    assert WholeNumberFilter().validate('-1') == (None, InvalidWholeNumberException)
+    assert StringFilter(allow_null=False).validate('null') == (None, NullNotAllowedException)
+
+
+# compiled converter tests
+def test_boolean_filter_should_resolve_literals_case_insensitively():
+    f = BooleanFilter()
+    assert f.parse(' TRUE ') is True
+    assert f.parse('No') is False
+    assert f.parse('NuLL') is None
+
+
+def test_integer_filter_should_reject_non_ascii_digits():
+    f = IntegerFilter()
+    assert f.parse(' -12 ') == -12
+
+    with pytest.raises(InvalidIntegerException):
+        f.parse('²')
+
+
+def test_filter_should_recompile_converter_when_unpickled():
+    f = pickle.loads(pickle.dumps(BooleanFilter(allow_null=False)))
+    assert f.parse('yes') is True
+
+    with pytest.raises(NullNotAllowedException):
+        f.parse('none')
+
+
+def test_filter_should_be_frozen_after_construction():
+    f = DelimitedSetFilter(operators=[EQUAL], choices=['a'])
+    assert f.operators == (EQUAL,)
+
+    with pytest.raises(FrozenInstanceException):
+        f.allow_null = False
+
+    with pytest.raises(FrozenInstanceException):
+        f.element.max_values = 3
+
+    with pytest.raises(FrozenInstanceException):
+        del f.choices
+
+    copy = pickle.loads(pickle.dumps(f))
+    assert copy.parse('a') == ('a',)
+
+    with pytest.raises(FrozenInstanceException):
+        copy.choices = None
+
+
+# multi-value tests
+def test_should_parse_in_values_into_deduplicated_frozenset():
+    f = StringFilter()
+    parsed = f.validate_many('a, b,a,null')
+    assert parsed == (frozenset(('a', 'b', None)), None)
+
+
+def test_should_support_in_operators_on_scalar_filters():
+    for f in (IntegerFilter(), FloatFilter(), BooleanFilter(), WholeNumberFilter()):
+        assert IN in f.operators
+        assert NOT_IN in f.operators
+
+
+def test_should_pack_numeric_in_values_into_sorted_arrays():
+    values, error = IntegerFilter(packed=True).validate_many('3,1,3,2')
+    assert error is None and values == SortedValues(array('q', [1, 2, 3]))
+    assert list(values) == [1, 2, 3] and values[0] == 1 and 2 in values
+    packed = SortedValues(array('d', [1.0, 2.5]))
+    assert FloatFilter(packed=True).validate_many('2.5,1') == (packed, None)
+
+
+def test_packed_in_values_should_reject_nulls_and_overflow():
+    assert IntegerFilter(packed=True).validate_many('1,null') == (None, InvalidIntegerException)
+    assert IntegerFilter(packed=True).validate_many(str(2 ** 64)) == (None, InvalidIntegerException)
+
+
+def test_should_enforce_max_values():
+    f = IntegerFilter(max_values=2)
+    assert f.validate_many('1,2') == (frozenset((1, 2)), None)
+    assert f.validate_many('1,2,3') == (None, TooManyValuesException)
+
+
+def test_bulk_in_conversion_should_fall_back_for_nulls_and_invalid_values():
+    assert IntegerFilter().validate_many('1, 2,null') == (frozenset((1, 2, None)), None)
+    assert WholeNumberFilter().validate_many('1,-2') == (None, InvalidWholeNumberException)
+    f = IntegerFilter(allow_null=False)
+    assert f.validate_many('1,none') == (None, NullNotAllowedException)
+
+
+def test_should_reject_integers_past_the_conversion_limit():
+    assert IntegerFilter().validate('9' * 10000) == (None, InvalidIntegerException)
+    assert WholeNumberFilter().validate('9' * 10000) == (None, InvalidWholeNumberException)
+
+
+# date and datetime filter tests
+NEW_YEAR = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('value', [
+    '2024-01-01T00:00:00Z',
+    '2024-01-01T00:00:00+00:00',
+    '2024-01-01t00:00:00z',
+    '2024-01-01T05:30:00+05:30',
+    '2023-12-31T19:00:00-05:00',
+    '2024-01-01',
+    '2024-01-01T00:00:00',
+    '1704067200',
+    '1704067200.0',
+    'Mon, 01 Jan 2024 00:00:00 GMT',
+])
+def test_datetime_filter_should_normalize_to_utc(value):
+    parsed = DateTimeFilter().parse(value)
+    assert parsed == NEW_YEAR
+    assert parsed.tzinfo is timezone.utc
+
+
+def test_datetime_filter_should_keep_fractions():
+    assert DateTimeFilter().parse('2024-01-01T00:00:00.25Z') == NEW_YEAR.replace(microsecond=250000)
+    assert DateTimeFilter().parse('2024-01-01T01:00:00,5 01:00') == \
+        NEW_YEAR.replace(microsecond=500000)
+    assert DateTimeFilter().parse('2024-01-01t00:00:00.1234567z') == \
+        NEW_YEAR.replace(microsecond=123456)
+    assert DateTimeFilter().parse('-1.5') == datetime(1969, 12, 31, 23, 59, 58, 500000,
+                                                      tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize('value', ['2024-13-01', 'yesterday', '2024-01-01T25:00:00Z', '9' * 400])
+def test_datetime_filter_should_raise_error_if_input_not_expected_datetime(value):
+    with pytest.raises(InvalidDateTimeException):
+        DateTimeFilter().parse(value)
+
+
+def test_date_filter_should_parse_dates_and_utc_dates_of_datetimes():
+    assert DateFilter().parse('2024-01-01') == date(2024, 1, 1)
+    assert DateFilter().parse('2024-01-01T23:00:00-05:00') == date(2024, 1, 2)
+    assert DateFilter().parse('1704067200') == date(2024, 1, 1)
+    assert DateFilter().parse('null') is None
+
+    with pytest.raises(InvalidDateException):
+        DateFilter().parse('2024-02-30')
+
+
+def test_temporal_filters_should_support_these_operators():
+    for f in (DateFilter(), DateTimeFilter()):
+        assert set(f.operators) == {EQUAL, NOT_EQUAL, GREATER_THAN, GREATER_THAN_OR_EQUAL,
+                                    LESS_THAN, LESS_THAN_OR_EQUAL, IN, NOT_IN}
+
+
+def test_temporal_filters_should_parse_in_values():
+    assert DateFilter().validate_many('2024-01-01,1704067200,2024-01-02') == (
+        frozenset((date(2024, 1, 1), date(2024, 1, 2))), None)
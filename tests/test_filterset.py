@@ -1,11 +1,20 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
 import pytest
 
 from exceptions import (NullNotAllowedException, InvalidBooleanException, InvalidIntegerException,
-                        InvalidFloatException)
-from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter
+                        InvalidFloatException, InvalidOperatorException, MultipleFilterException,
+                        NumberTooLongException, QueryTooLongException, TooManyClausesException,
+                        TooManyValuesException, FrozenInstanceException)
+from filters import (BooleanFilter, DateTimeFilter, DelimitedSetFilter, FloatFilter, IntegerFilter,
+                     StringFilter)
+import filterset
 from filterset import FilterSet
 from operators import (EQUAL, NOT_EQUAL, IN, NOT_IN, GREATER_THAN, GREATER_THAN_OR_EQUAL,
                        LESS_THAN, LESS_THAN_OR_EQUAL)
+from results import ParsedFilter
 
 
 class PersonFilterSet(FilterSet):
@@ -40,13 +49,13 @@ def test_should_parse_valid_string_filter_with_not_equal_operator():
 
 def test_should_parse_valid_string_filter_with_in_operator():
     parsed = passive_filter_set.parse(f'name={IN}:Ron Swanson')
-    assert any(f['field'] == 'name' and f['operator'] == IN and f['value'] == 'Ron Swanson'
+    assert any(f['field'] == 'name' and f['operator'] == IN and f['value'] == {'Ron Swanson'}
                for f in parsed)
 
 
 def test_should_parse_valid_string_filter_with_not_in_operator():
     parsed = passive_filter_set.parse(f'name={NOT_IN}:Ron Swanson')
-    assert any(f['field'] == 'name' and f['operator'] == NOT_IN and f['value'] == 'Ron Swanson'
+    assert any(f['field'] == 'name' and f['operator'] == NOT_IN and f['value'] == {'Ron Swanson'}
                for f in parsed)
 
 
@@ -99,6 +108,14 @@ def test_should_parse_valid_integer_filter_with_greater_than_operator():
     assert any(f['field'] == 'age' and f['operator'] == GREATER_THAN and f['value'] == 65 for f in parsed)
 
 
+def test_should_parse_operators_of_urlencoded_queries():
+    qs = urlencode({'age': f'{GREATER_THAN}:65', 'name': 'Ron'})
+
+    for parsed in (strict_filter_set.parse(qs), passive_filter_set.parse(qs.encode('ascii'))):
+        assert list(parsed) == [ParsedFilter('age', GREATER_THAN, 65),
+                                ParsedFilter('name', EQUAL, 'Ron')]
+
+
 def test_should_parse_valid_integer_filter_with_greater_than_or_equal_operator():
     parsed = passive_filter_set.parse(f'age={GREATER_THAN_OR_EQUAL}:65')
     assert any(f['field'] == 'age' and f['operator'] == GREATER_THAN_OR_EQUAL and f['value'] == 65 for f in parsed)
@@ -265,3 +282,420 @@ def test_should_parse_valid_filters():
                for f in parsed)
     assert any(f['field'] == 'divorced' and f['operator'] == EQUAL and f['value'] is True
                for f in parsed)
+
+
+# compiled schema tests
+class EmployeeFilterSet(PersonFilterSet):
+    salary = FloatFilter()
+    divorced = None
+
+
+def test_should_compile_declared_filters_once_per_class():
+    assert set(PersonFilterSet._filters) == {'name', 'age', 'weight', 'divorced'}
+    assert PersonFilterSet._operators['divorced'] == frozenset((EQUAL, NOT_EQUAL, IN, NOT_IN))
+
+
+def test_should_compile_inherited_filters_and_honour_shadowing():
+    assert set(EmployeeFilterSet._filters) == {'name', 'age', 'weight', 'salary'}
+    parsed = EmployeeFilterSet().parse('age=65&salary=gt:1.5&divorced=true')
+    assert [f['field'] for f in parsed] == ['age', 'salary']
+
+
+class UpperFilter(StringFilter):
+    def parse(self, value):
+        parsed = super().parse(value)
+
+        if parsed == 'bad':
+            raise InvalidOperatorException()
+
+        return parsed if parsed is None else parsed.upper()
+
+
+class CodeFilterSet(FilterSet):
+    code = UpperFilter()
+    codes = DelimitedSetFilter(filter_type=UpperFilter)
+
+
+CODES = 'code=abc&code=in:x,y&codes=a,b'
+
+
+@pytest.mark.parametrize('qs', [CODES, CODES.encode('ascii')])
+def test_should_honour_parse_overrides_of_custom_filters(qs):
+    filter_set = CodeFilterSet()
+    assert [f.value for f in filter_set.parse(qs)] == ['ABC', frozenset(('X', 'Y')), ('A', 'B')]
+    assert not filter_set.parse('code=bad')
+    assert [f.value for f in pickle.loads(pickle.dumps(filter_set)).parse('code=abc')] == ['ABC']
+
+    with pytest.raises(InvalidOperatorException):
+        CodeFilterSet(strict=True).parse('code=bad')
+
+
+def test_compiled_schema_should_be_read_only():
+    with pytest.raises(TypeError):
+        PersonFilterSet._filters['height'] = FloatFilter()
+
+
+# parse cache tests
+def test_should_not_cache_by_default():
+    assert passive_filter_set.cache_info() is None
+
+
+def test_should_return_cached_result_for_repeated_query():
+    filter_set = PersonFilterSet(cache_size=8)
+    parsed1 = filter_set.parse('age=gt:30')
+    parsed2 = filter_set.parse('age=gt:30')
+    assert parsed1 is parsed2
+    assert parsed1[0]['value'] == 30
+    assert filter_set.cache_info().hits == 1
+    assert filter_set.cache_info().misses == 1
+
+
+def test_cached_result_should_be_immutable():
+    filter_set = PersonFilterSet(cache_size=8)
+    parsed = filter_set.parse('age=gt:30')
+
+    with pytest.raises(TypeError):
+        parsed[0]['value'] = 40
+
+    with pytest.raises(AttributeError):
+        parsed.append({})
+
+    class PackedFilterSet(FilterSet):
+        ids = IntegerFilter(packed=True)
+
+    filter_set = PackedFilterSet(cache_size=8)
+    values = filter_set.parse(f'ids={IN}:3,1,2').get('ids').value
+
+    with pytest.raises(AttributeError):
+        values.append(99)
+
+    with pytest.raises(AttributeError):
+        values._values = None
+
+    assert list(filter_set.parse(f'ids={IN}:3,1,2').get('ids').value) == [1, 2, 3]
+
+
+def test_should_evict_least_recently_used_query():
+    filter_set = PersonFilterSet(cache_size=1)
+    filter_set.parse('age=1')
+    filter_set.parse('age=2')
+    assert filter_set.cache_info().evictions == 1
+    assert filter_set.cache_info().currsize == 1
+
+
+def test_should_cache_strict_mode_exceptions():
+    filter_set = PersonFilterSet(strict=True, cache_size=8)
+
+    for _ in range(2):
+        with pytest.raises(InvalidIntegerException):
+            filter_set.parse('age=notanint')
+
+    assert filter_set.cache_info().hits == 1
+
+
+def test_should_accept_values_containing_colons():
+    parsed = passive_filter_set.parse(f'name={EQUAL}:12:30')
+    assert parsed[0]['value'] == '12:30'
+
+
+def test_should_percent_decode_values():
+    parsed = passive_filter_set.parse('name=Ron+Swanson&weight=gt%3A1&age=12%3A30')
+    assert parsed[0]['value'] == 'Ron Swanson'
+    assert parsed[1] == ParsedFilter('weight', GREATER_THAN, 1.0)
+    # an encoded ':' after anything but an operator stays part of the value
+    assert not any(f['field'] == 'age' for f in parsed)
+
+
+def test_should_parse_raw_bytes_query_strings():
+    expected = passive_filter_set.parse('name=Ron+Swanson&age=gt:30')
+
+    for qs in (b'name=Ron+Swanson&age=gt:30', bytearray(b'name=Ron+Swanson&age=gt:30'),
+               memoryview(b'utm_source=newsletter&name=Ron+Swanson&age=gt:30')):
+        assert passive_filter_set.parse(qs) == expected
+
+
+def test_should_cache_raw_bytes_query_strings():
+    filter_set = PersonFilterSet(cache_size=8)
+    filter_set.parse(bytearray(b'age=1'))
+    filter_set.parse(memoryview(b'age=1'))
+    assert filter_set.cache_info().hits == 1
+
+
+def test_should_return_parsed_filter_records():
+    parsed = passive_filter_set.parse('age=gt:30&name=Bob')
+    assert parsed.get('age') == ParsedFilter('age', GREATER_THAN, 30)
+    assert parsed.as_dicts()[1] == {'field': 'name', 'operator': EQUAL, 'value': 'Bob'}
+
+
+def test_should_share_field_and_operator_strings_across_records():
+    parsed1 = passive_filter_set.parse('age=gt:30')
+    parsed2 = passive_filter_set.parse(b'age=gt:31')
+    assert parsed1[0].field is parsed2[0].field
+    assert parsed1[0].operator is parsed2[0].operator is GREATER_THAN
+
+
+# batch parse tests
+def test_should_parse_many_queries_in_order():
+    queries = ['age=1', b'age=2', 'weight=notafloat', 'age=3']
+    results = list(passive_filter_set.parse_many(queries))
+    assert [r.get('age').value if r else None for r in results] == [1, 2, None, 3]
+
+
+def test_should_report_strict_mode_errors_per_query():
+    results = list(strict_filter_set.parse_many(['age=1', 'age=notanint', 'age=3']))
+    assert results[0].get('age').value == 1
+    assert isinstance(results[1], InvalidIntegerException)
+    assert results[2].get('age').value == 3
+
+
+def test_should_parse_many_queries_across_worker_processes():
+    queries = [f'age={i}' if i % 5 else 'age=bad' for i in range(50)]
+    expected = list(strict_filter_set.parse_many(queries))
+    results = list(strict_filter_set.parse_many(iter(queries), workers=2, chunksize=8))
+    assert [type(r) for r in results] == [type(r) for r in expected]
+    assert [r for r in results if not isinstance(r, Exception)] == \
+        [r for r in expected if not isinstance(r, Exception)]
+
+
+# lazy parse tests
+def test_should_iterate_parsed_filters_lazily():
+    clauses = strict_filter_set.iter_parse('age=1&age=notanint')
+    assert next(clauses) == ParsedFilter('age', EQUAL, 1)
+
+    with pytest.raises(InvalidIntegerException):
+        next(clauses)
+
+
+def test_should_parse_only_requested_fields():
+    parsed = passive_filter_set.parse_fields('name=Bob&age=1&weight=2.5', {'age', 'weight', 'x'})
+    assert [f.field for f in parsed] == ['age', 'weight']
+
+
+def test_should_stop_scanning_once_requested_fields_are_found():
+    # the trailing clause would raise in strict mode if it were ever reached
+    parsed = strict_filter_set.parse_fields('age=1&name=Bob&age=notanint', {'age'})
+    assert parsed.get('age').value == 1
+
+    parsed = strict_filter_set.parse_fields(b'name=Bob&age=1&age=notanint', ['age'])
+    assert parsed.get('age').value == 1
+
+
+# error collection tests
+def test_should_collect_every_error_in_strict_mode():
+    filter_set = PersonFilterSet(strict=True, collect_errors=True)
+
+    with pytest.raises(MultipleFilterException) as info:
+        filter_set.parse(f'age=notanint&name=Bob&weight=notafloat&divorced={GREATER_THAN}:1')
+
+    errors = info.value.errors
+    assert [field for field, _ in errors] == ['age', 'weight', 'divorced']
+    assert [type(ex) for _, ex in errors] == [InvalidIntegerException, InvalidFloatException,
+                                              InvalidOperatorException]
+
+
+def test_should_not_raise_when_collecting_and_query_is_valid():
+    filter_set = PersonFilterSet(strict=True, collect_errors=True)
+    assert filter_set.parse('age=1&name=Bob').get('name').value == 'Bob'
+
+
+def test_should_ignore_collect_errors_in_passive_mode():
+    filter_set = PersonFilterSet(collect_errors=True)
+    assert [f.field for f in filter_set.parse('age=notanint&name=Bob')] == ['name']
+
+
+def test_should_cache_collected_errors():
+    filter_set = PersonFilterSet(strict=True, collect_errors=True, cache_size=8)
+
+    for _ in range(2):
+        with pytest.raises(MultipleFilterException) as info:
+            filter_set.parse('age=notanint&weight=notafloat')
+
+        assert len(info.value.errors) == 2
+        # callers own the errors they catch, altering them leaves the cached failure alone
+        info.value.errors.clear()
+
+    assert filter_set.cache_info().hits == 1
+
+
+# multi-value tests
+def test_should_parse_in_values_into_typed_frozensets():
+    qs = f'name={IN}:Ron,Tom,Ron&age={NOT_IN}:1,2,2&divorced={IN}:1,no'
+    parsed = passive_filter_set.parse(qs)
+    assert parsed.get('name').value == frozenset(('Ron', 'Tom'))
+    assert parsed.get('age').value == frozenset((1, 2))
+    assert parsed.get('divorced').value == frozenset((True, False))
+
+
+def test_should_reject_in_values_that_fail_conversion():
+    assert not passive_filter_set.parse(f'age={IN}:1,two,3')
+
+    with pytest.raises(InvalidIntegerException):
+        strict_filter_set.parse(f'age={IN}:1,two,3')
+
+
+# canonical query tests
+def test_should_canonicalize_equivalent_queries_identically():
+    canonical = passive_filter_set.canonicalize('age=gt:30&name=Bob')
+    assert canonical == 'age=gt:30&name=eq:Bob'
+    assert passive_filter_set.canonicalize('name=eq:Bob&utm_source=x&age=gt:30') == canonical
+    assert passive_filter_set.canonicalize(b'age=gt:30&age=gt:30&weight=bad&name=Bob') == canonical
+
+
+def test_should_sort_in_values_when_canonicalizing():
+    assert passive_filter_set.canonicalize('name=in:Tom,Ann+Perkins,Tom&divorced=null') == \
+        'divorced=eq:null&name=in:Ann%20Perkins,Tom'
+
+
+def test_should_canonicalize_datetimes_in_utc():
+    class EventFilterSet(FilterSet):
+        created = DateTimeFilter()
+
+    filter_set = EventFilterSet()
+    canonical = filter_set.canonicalize('created=gte:2024-01-01T05:00:00%2B05:00')
+    assert canonical == filter_set.canonicalize('created=gte:1704067200')
+    # an unescaped '+' decodes to a space but still reads as the offset
+    assert canonical == filter_set.canonicalize('created=gte:2024-01-01T05:00:00+05:00')
+    assert filter_set.parse(canonical).get('created').value == filter_set.parse(
+        'created=gte:2024-01-01T00:00:00Z').get('created').value
+
+
+def test_should_fingerprint_canonical_query():
+    fingerprint = passive_filter_set.fingerprint('age=gt:30&name=Bob')
+    assert fingerprint == passive_filter_set.fingerprint('name=Bob&age=gt:30')
+    assert fingerprint != passive_filter_set.fingerprint('name=Bob&age=gt:31')
+    assert len(fingerprint) == 32
+
+
+# input limit tests
+LIMITS = {'max_length': 4096, 'max_clauses': 32, 'max_field_clauses': 4, 'max_values': 100,
+          'max_number_length': 20}
+
+limited_filter_set = PersonFilterSet(**LIMITS)
+strict_limited_filter_set = PersonFilterSet(strict=True, **LIMITS)
+
+
+@pytest.mark.parametrize('qs', ['name=Bob&age=1', b'name=Bob&age=1'])
+def test_should_truncate_over_long_query_at_clause_boundary(qs):
+    filter_set = PersonFilterSet(max_length=12)
+    assert [f.field for f in filter_set.parse(qs)] == ['name']
+
+    with pytest.raises(QueryTooLongException):
+        PersonFilterSet(strict=True, max_length=12).parse(qs)
+
+
+@pytest.mark.parametrize('qs', ['age=1&age=2&name=Bob&weight=1', b'age=1&age=2&name=Bob&weight=1'])
+def test_should_drop_clauses_past_max_clauses(qs):
+    filter_set = PersonFilterSet(max_clauses=3)
+    assert [f.value for f in filter_set.parse(qs)] == [1, 2, 'Bob']
+
+    with pytest.raises(TooManyClausesException):
+        PersonFilterSet(strict=True, max_clauses=3).parse(qs)
+
+
+def test_should_keep_first_clauses_of_a_field():
+    filter_set = PersonFilterSet(max_field_clauses=2)
+    parsed = filter_set.parse('age=gt:1&age=lt:9&age=5&name=Bob')
+    assert [(f.field, f.value) for f in parsed] == [('age', 1), ('age', 9), ('name', 'Bob')]
+
+    with pytest.raises(TooManyClausesException):
+        PersonFilterSet(strict=True, max_field_clauses=2).parse('age=gt:1&age=lt:9&age=5')
+
+
+def test_should_reject_too_many_in_values():
+    filter_set = PersonFilterSet(max_values=3)
+    assert filter_set.parse(f'age={IN}:1,2,3').get('age').value == frozenset((1, 2, 3))
+    assert not filter_set.parse(f'age={IN}:1,2,3,4')
+
+    with pytest.raises(TooManyValuesException):
+        PersonFilterSet(strict=True, max_values=3).parse(f'name={NOT_IN}:a,b,c,d')
+
+
+def test_should_reject_too_long_numeric_literals():
+    filter_set = PersonFilterSet(max_number_length=5)
+    assert filter_set.parse('age=12345&name=123456').get('name').value == '123456'
+    assert not filter_set.parse('age=123456')
+    assert not filter_set.parse(f'age={IN}:1,123456')
+    assert filter_set.parse(f'age={IN}:1,2,3,4').get('age').value == frozenset((1, 2, 3, 4))
+
+    with pytest.raises(NumberTooLongException):
+        PersonFilterSet(strict=True, max_number_length=5).parse('weight=1' + '0' * 5000)
+
+
+def test_should_reject_too_long_numeric_literals_in_delimited_sets():
+    class IdsFilterSet(FilterSet):
+        ids = DelimitedSetFilter(filter_type=IntegerFilter)
+        tags = DelimitedSetFilter(filter_type=StringFilter)
+
+    filter_set = IdsFilterSet(max_number_length=5)
+    assert filter_set.parse('ids=1,2,12345').get('ids').value == (1, 2, 12345)
+    assert filter_set.parse('tags=123456').get('tags').value == ('123456',)
+    assert not filter_set.parse('ids=1,123456')
+
+    with pytest.raises(NumberTooLongException):
+        IdsFilterSet(strict=True, max_number_length=5).parse('ids=1,' + '9' * 5000)
+
+
+@pytest.mark.parametrize('qs', [
+    'age=1&' * 200000,
+    'x=' + 'a' * 1000000,
+    f'age={IN}:' + '1,' * 200000,
+    'age=' + '9' * 200000,
+    'name=' + '%41' * 300000,
+])
+def test_should_bound_work_on_pathological_queries(qs, monkeypatch):
+    scanned = []
+
+    def recording(scan):
+        return lambda qs, *args: scan(scanned.append(len(qs)) or qs, *args)
+
+    monkeypatch.setattr(filterset, 'scan', recording(filterset.scan))
+    monkeypatch.setattr(filterset, 'scan_bytes', recording(filterset.scan_bytes))
+
+    assert len(limited_filter_set.parse(qs)) <= LIMITS['max_clauses']
+    assert len(limited_filter_set.parse(qs.encode('ascii'))) <= LIMITS['max_clauses']
+    # only the part within the limits reaches the scanner
+    assert len(scanned) == 2 and max(scanned) <= LIMITS['max_length']
+
+    with pytest.raises((QueryTooLongException, TooManyClausesException)):
+        strict_limited_filter_set.parse(qs)
+
+    assert len(scanned) == 2
+
+
+def test_should_count_max_length_in_utf8_bytes():
+    qs = 'name=Ren\u00e9e&age=1'
+    assert len(qs) == 16 and len(qs.encode('utf-8')) == 17
+
+    assert PersonFilterSet(max_length=17).parse(qs).get('age').value == 1
+    assert [f.field for f in PersonFilterSet(max_length=16).parse(qs)] == ['name']
+
+    with pytest.raises(QueryTooLongException):
+        PersonFilterSet(strict=True, max_length=16).parse(qs)
+
+
+# thread safety tests
+def test_filter_set_should_be_frozen_after_construction():
+    filter_set = PersonFilterSet(cache_size=8)
+
+    with pytest.raises(FrozenInstanceException):
+        filter_set.strict = True
+
+    copy = pickle.loads(pickle.dumps(filter_set))
+    assert copy.parse('age=1').get('age').value == 1
+
+    with pytest.raises(FrozenInstanceException):
+        copy.max_length = 10
+
+
+def test_shared_filter_set_should_parse_consistently_from_threads():
+    filter_set = PersonFilterSet(cache_size=4096)
+    queries = [f'age=gt:{i % 300}&name=in:a,b,{i % 6}&weight=lt:{i % 600}.5' for i in range(6000)]
+    expected = [PersonFilterSet().parse(qs) for qs in queries]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(filter_set.parse, queries, chunksize=50))
+
+    assert results == expected
+    info = filter_set.cache_info()
+    assert info.hits + info.misses == len(queries)
+    assert info.currsize == len(set(queries))
@@ -0,0 +1,139 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from exceptions import InvalidIntegerException, QueryTooLongException
+from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter
+from filterset import FilterSet
+from instrumentation import OTHER_FIELDS, CallbackSink, Histogram, MemorySink
+from operators import GREATER_THAN
+
+
+class PersonFilterSet(FilterSet):
+    name = StringFilter(allow_null=False)
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+
+
+QUERY = f'age=30&name=Bob&age=old&divorced={GREATER_THAN}:1&utm_source=mail&weight=1.5'
+
+
+@pytest.mark.parametrize('qs', [QUERY, QUERY.encode('ascii')])
+def test_should_count_fields_filter_types_rejections_and_unknown_fields(qs):
+    sink = MemorySink()
+    parsed = PersonFilterSet(sink=sink).parse(qs)
+
+    assert [f.field for f in parsed] == ['age', 'name', 'weight']
+    assert sink.fields == {'age': 2, 'name': 1, 'divorced': 1, 'weight': 1}
+    assert sink.filter_types == {'IntegerFilter': 2, 'StringFilter': 1, 'BooleanFilter': 1,
+                                 'FloatFilter': 1}
+    assert sink.rejections == {'InvalidIntegerException': 1, 'InvalidOperatorException': 1}
+    assert sink.unknown_fields == {'utm_source': 1}
+    assert sink.durations.count == 1
+
+
+def test_should_record_strict_rejections_and_timing_before_raising():
+    sink = MemorySink()
+    filter_set = PersonFilterSet(strict=True, sink=sink)
+
+    with pytest.raises(InvalidIntegerException):
+        filter_set.parse('age=old')
+
+    assert sink.rejections == {'InvalidIntegerException': 1}
+    assert sink.durations.count == 1
+
+
+def test_should_report_query_level_rejections_without_field():
+    events = []
+    filter_set = PersonFilterSet(strict=True, max_length=8,
+                                 sink=CallbackSink(lambda *event: events.append(event)))
+
+    with pytest.raises(QueryTooLongException):
+        filter_set.parse('name=Leslie Knope')
+
+    assert events[0] == ('filterset.clauses', 1, {'field': None, 'filter': None,
+                                                  'outcome': 'rejected',
+                                                  'error': 'QueryTooLongException'})
+    assert events[1][0] == 'filterset.duration'
+
+
+def test_should_forward_events_to_callback():
+    events = []
+    sink = CallbackSink(lambda *event: events.append(event), prefix='people')
+    PersonFilterSet(sink=sink).parse('age=1&x=2')
+
+    assert events[:2] == [
+        ('people.clauses', 1, {'field': 'age', 'filter': 'IntegerFilter', 'outcome': 'accepted'}),
+        ('people.unknown_fields', 1, {}),
+    ]
+    assert events[2][0] == 'people.duration' and events[2][1] >= 0
+
+
+def test_should_report_cache_hits_instead_of_clauses():
+    sink = MemorySink()
+    filter_set = PersonFilterSet(cache_size=8, sink=sink)
+
+    for _ in range(3):
+        filter_set.parse('age=1')
+
+    assert sink.fields == {'age': 1}
+    assert sink.cache_hits == 2
+    assert sink.durations.count == 3
+
+    events = []
+    filter_set = PersonFilterSet(cache_size=8,
+                                 sink=CallbackSink(lambda *event: events.append(event)))
+    filter_set.parse('age=1')
+    filter_set.parse('age=1')
+    assert events[2] == ('filterset.cache_hits', 1, {})
+
+
+def test_should_bound_unknown_field_names():
+    sink = MemorySink(max_unknown_fields=2)
+    filter_set = PersonFilterSet(sink=sink)
+
+    for name in ('a', 'b', 'c', 'a', 'd'):
+        filter_set.parse(f'{name}=1')
+
+    assert sink.unknown_fields == {'a': 2, 'b': 1, OTHER_FIELDS: 2}
+
+
+def test_should_bucket_durations():
+    histogram = Histogram((1, 10))
+
+    for value in (0.5, 1, 5, 50):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.as_dict() == {'buckets': {'1': 2, '10': 1, '+Inf': 1}, 'count': 4,
+                                   'sum': 56.5}
+
+
+def test_should_snapshot_and_reset():
+    sink = MemorySink()
+    PersonFilterSet(sink=sink).parse('age=x')
+    assert sink.snapshot()['rejections'] == {'InvalidIntegerException': 1}
+
+    sink.reset()
+    assert sink.snapshot()['fields'] == {}
+
+
+def test_should_not_pickle_sink():
+    filter_set = pickle.loads(pickle.dumps(PersonFilterSet(sink=MemorySink())))
+    assert filter_set.sink is None
+    assert filter_set.parse('age=1').get('age').value == 1
+
+
+def test_memory_sink_should_count_exactly_from_threads():
+    sink = MemorySink()
+    filter_set = PersonFilterSet(sink=sink)
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(filter_set.parse, ['age=1&x=2&age=bad'] * 4000))
+
+    assert sink.fields == {'age': 8000}
+    assert sink.unknown_fields == {'x': 4000}
+    assert sink.rejections == {'InvalidIntegerException': 4000}
+    assert sink.durations.count == 4000
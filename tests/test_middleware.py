@@ -0,0 +1,155 @@
+import asyncio
+import json
+
+from filters import IntegerFilter, StringFilter
+from filterset import FilterSet, PaginationFilterSet
+from instrumentation import MemorySink
+from middleware import (ASGIMiddleware, FILTER_SET_KEY, PARSED_KEY, Router, WSGIMiddleware,
+                        get_parsed)
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter()
+    age = IntegerFilter()
+
+
+class TeamFilterSet(FilterSet):
+    name = StringFilter()
+
+
+def wsgi_app(calls):
+    def app(environ, start_response):
+        calls.append(environ)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    return app
+
+
+def call_wsgi(app, path, qs):
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    body = b''.join(app({'PATH_INFO': path, 'QUERY_STRING': qs}, start_response))
+    return response['status'], response['headers'], body
+
+
+def test_should_resolve_exact_routes_before_prefixes():
+    people, team, fallback = PersonFilterSet(), TeamFilterSet(), TeamFilterSet()
+    router = Router({'/people': people, '/teams/*': team, '/*': fallback})
+
+    assert router.resolve('/people') is people
+    assert router.resolve('/teams/7') is team
+    assert router.resolve('/other') is fallback
+    assert Router({'/people': PersonFilterSet}).resolve('/people').__class__ is PersonFilterSet
+    assert Router({}).resolve('/people') is None
+
+
+def test_should_parse_once_and_share_result_through_environ():
+    sink = MemorySink()
+    calls = []
+    filter_set = PersonFilterSet(sink=sink)
+    app = WSGIMiddleware(wsgi_app(calls), {'/people': filter_set})
+
+    status, _, body = call_wsgi(app, '/people', 'age=gt:30&name=Ren%C3%A9e&limit=5')
+
+    assert (status, body) == ('200 OK', b'ok')
+    parsed = get_parsed(calls[0])
+    assert parsed.get('age').value == 30
+    # percent escapes decode as utf-8 even though WSGI hands the query over as latin-1
+    assert parsed.get('name').value == 'Renée'
+    assert calls[0][FILTER_SET_KEY] is filter_set
+    assert sink.durations.count == 1
+
+
+def test_should_pass_unrouted_paths_through():
+    calls = []
+    app = WSGIMiddleware(wsgi_app(calls), {'/people': PersonFilterSet})
+
+    assert call_wsgi(app, '/teams', 'age=x')[0] == '200 OK'
+    assert PARSED_KEY not in calls[0]
+
+
+def test_should_answer_400_without_calling_app_in_strict_mode():
+    calls = []
+    app = WSGIMiddleware(wsgi_app(calls), {'/people': PersonFilterSet(strict=True)})
+
+    status, headers, body = call_wsgi(app, '/people', 'age=old')
+
+    assert status == '400 Bad Request'
+    assert headers['Content-Type'] == 'application/json'
+    assert headers['Content-Length'] == str(len(body))
+    assert json.loads(body) == {'error': 'InvalidIntegerException'}
+    assert calls == []
+
+
+def test_should_list_collected_errors_in_400_body():
+    filter_set = PersonFilterSet(strict=True, collect_errors=True)
+    app = WSGIMiddleware(wsgi_app([]), {'/people': filter_set})
+
+    _, _, body = call_wsgi(app, '/people', 'age=old&limit=-1')
+
+    assert json.loads(body) == {'error': 'MultipleFilterException', 'errors': [
+        {'field': 'age', 'error': 'InvalidIntegerException'},
+        {'field': 'limit', 'error': 'InvalidWholeNumberException'},
+    ]}
+
+
+def call_asgi(app, scope):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+def asgi_app(calls):
+    async def app(scope, receive, send):
+        calls.append(scope)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'ok'})
+
+    return app
+
+
+def test_should_share_result_through_copied_asgi_scope():
+    calls = []
+    app = ASGIMiddleware(asgi_app(calls), {'/people': PersonFilterSet})
+    scope = {'type': 'http', 'path': '/people', 'query_string': b'name=Ren%C3%A9e&limit=2'}
+
+    messages = call_asgi(app, scope)
+
+    assert messages[0]['status'] == 200
+    assert get_parsed(calls[0]).get('name').value == 'Renée'
+    assert PARSED_KEY not in scope
+
+
+def test_should_answer_400_to_invalid_asgi_query():
+    calls = []
+    app = ASGIMiddleware(asgi_app(calls), {'/people': PersonFilterSet(strict=True)})
+
+    start, body = call_asgi(app, {'type': 'http', 'path': '/people', 'query_string': b'age=x'})
+
+    assert start['status'] == 400
+    assert (b'content-type', b'application/json') in start['headers']
+    assert json.loads(body['body']) == {'error': 'InvalidIntegerException'}
+    assert calls == []
+
+
+def test_should_pass_other_asgi_scopes_through():
+    calls = []
+    app = ASGIMiddleware(asgi_app(calls), {'/*': PersonFilterSet(strict=True)})
+
+    call_asgi(app, {'type': 'websocket', 'path': '/people', 'query_string': b'age=x'})
+    call_asgi(app, {'type': 'http', 'path': '/people'})
+
+    assert PARSED_KEY not in calls[0]
+    assert get_parsed(calls[1]) == ()
@@ -1,7 +1,7 @@
 import pytest
 
 from exceptions import InvalidOperatorException
-from filterset import PaginationFilterSet
+from filterset import PaginationFilterSet, ProjectionFilterSet
 from operators import EQUAL, GREATER_THAN
 
 
@@ -31,4 +31,15 @@ def test_should_parse_valid_pagination_filters():
 def test_should_raise_error_if_invalid_operator_passed():
     with pytest.raises(InvalidOperatorException):
         pagination_filter_set.parse(f'offset={GREATER_THAN}:20&limit={GREATER_THAN}:10')
-    
+
+
+def test_should_compile_pagination_filters():
+    assert set(PaginationFilterSet._filters) == {'limit', 'offset'}
+
+
+def test_should_declare_pagination_control_fields():
+    class PagedProjectionFilterSet(PaginationFilterSet, ProjectionFilterSet):
+        pass
+
+    assert PaginationFilterSet.control_fields == {'limit', 'offset'}
+    assert PagedProjectionFilterSet.control_fields == {'limit', 'offset', 'fields'}
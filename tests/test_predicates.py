@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from filters import FloatFilter, IntegerFilter, StringFilter
+from filterset import PaginationFilterSet
+from predicates import cache_info, compile_predicate
+
+
+class PersonFilterSet(PaginationFilterSet):
+    name = StringFilter()
+    age = IntegerFilter()
+    weight = FloatFilter()
+
+
+filter_set = PersonFilterSet()
+
+ROWS = [
+    {'name': 'Ron', 'age': 65, 'weight': 200.5},
+    {'name': 'Leslie', 'age': 40, 'weight': 120.0},
+    {'name': 'April', 'age': None, 'weight': 110.0},
+    {'name': None, 'age': 30, 'weight': None},
+]
+
+
+def matching(qs, rows=ROWS, **kwargs):
+    predicate = compile_predicate(filter_set.parse(qs), **kwargs)
+    return [row['name'] if isinstance(row, dict) else row.name for row in rows if predicate(row)]
+
+
+def test_should_match_every_row_without_clauses():
+    assert matching('') == ['Ron', 'Leslie', 'April', None]
+
+
+def test_should_apply_comparison_operators():
+    assert matching('age=gt:30') == ['Ron', 'Leslie']
+    assert matching('age=lte:40&weight=gte:120') == ['Leslie']
+    assert matching('name=neq:Ron&age=gte:30') == ['Leslie', None]
+
+
+def test_should_apply_in_and_not_in_operators():
+    assert matching('name=in:Ron,April') == ['Ron', 'April']
+    assert matching('age=nin:65,30') == ['Leslie', 'April']
+
+
+def test_should_apply_packed_in_values_by_binary_search():
+    packed = IntegerFilter(packed=True)
+
+    class PackedFilterSet(PaginationFilterSet):
+        age = packed
+
+    predicate = compile_predicate(PackedFilterSet().parse('age=in:30,40'))
+    assert [row['age'] for row in ROWS if predicate(row)] == [40, 30]
+    predicate = compile_predicate(PackedFilterSet().parse('age=nin:30,40'))
+    assert [row['age'] for row in ROWS if predicate(row)] == [65, None]
+
+
+def test_should_handle_null_values():
+    assert matching('name=null') == [None]
+    assert matching('age=neq:null') == ['Ron', 'Leslie', None]
+    assert matching('age=gt:null') == []
+
+
+def test_should_support_attribute_access():
+    rows = [SimpleNamespace(**row) for row in ROWS]
+    assert matching('age=lt:50', rows, attribute=True) == ['Leslie', None]
+
+
+def test_should_read_keyword_and_non_identifier_fields_by_getattr():
+    keyword_filter_set = type('KeywordFilterSet', (PaginationFilterSet,),
+                              {'class': StringFilter(), 'first-name': StringFilter()})()
+    rows = [SimpleNamespace(**{'class': 'a', 'first-name': 'Ron'}),
+            SimpleNamespace(**{'class': 'b', 'first-name': 'Leslie'})]
+    predicate = compile_predicate(keyword_filter_set.parse('class=neq:b&first-name=Ron'),
+                                  attribute=True)
+    assert [predicate(row) for row in rows] == [True, False]
+
+
+def test_should_exclude_control_fields():
+    assert matching('age=gt:30&limit=1', exclude=('limit', 'offset')) == ['Ron', 'Leslie']
+
+
+def test_should_reuse_compiled_code_for_same_query_shape():
+    before = cache_info()
+    assert matching('age=gt:50&weight=lt:1000') == ['Ron']
+    assert matching('weight=lt:130&age=gt:20') == ['Leslie']
+    after = cache_info()
+    assert after.hits - before.hits >= 1
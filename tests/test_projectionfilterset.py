@@ -0,0 +1,53 @@
+import pytest
+
+from exceptions import InvalidChoiceException, InvalidOperatorException, NullNotAllowedException
+from filterset import ProjectionFilterSet
+from operators import EQUAL, NOT_EQUAL
+
+
+class PersonProjectionFilterSet(ProjectionFilterSet):
+    allowed_fields = ('id', 'name', 'age')
+
+
+projection_filter_set = PersonProjectionFilterSet(strict=True)
+
+
+def test_should_parse_valid_fields():
+    parsed = projection_filter_set.parse('fields=name,id')
+    assert any(f['field'] == 'fields' and f['operator'] == EQUAL and f['value'] == ('name', 'id')
+               for f in parsed)
+
+
+def test_should_raise_error_if_field_not_allowed():
+    with pytest.raises(InvalidChoiceException):
+        projection_filter_set.parse('fields=name,password')
+
+
+def test_should_raise_error_if_fields_is_null():
+    with pytest.raises(NullNotAllowedException):
+        projection_filter_set.parse('fields=null')
+
+
+def test_should_raise_error_if_invalid_operator_passed():
+    with pytest.raises(InvalidOperatorException):
+        projection_filter_set.parse(f'fields={NOT_EQUAL}:name')
+
+
+def test_should_reject_every_field_without_allowed_fields():
+    class UndeclaredProjectionFilterSet(ProjectionFilterSet):
+        pass
+
+    for cls in (ProjectionFilterSet, UndeclaredProjectionFilterSet):
+        filter_set = cls(strict=True)
+
+        with pytest.raises(InvalidChoiceException):
+            filter_set.parse('fields=password')
+
+        assert filter_set.selected_fields(filter_set.parse('')) == ()
+
+
+def test_should_select_requested_or_all_allowed_fields():
+    assert projection_filter_set.selected_fields(projection_filter_set.parse('fields=age')) == \
+        ('age',)
+    assert projection_filter_set.selected_fields(projection_filter_set.parse('')) == \
+        ('id', 'name', 'age')
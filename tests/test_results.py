@@ -0,0 +1,91 @@
+import json
+import pickle
+from collections.abc import Mapping
+
+import pytest
+
+from operators import EQUAL, GREATER_THAN
+from results import ParsedFilter, ParseResult
+
+
+def test_parsed_filter_should_read_like_a_dict():
+    parsed = ParsedFilter('age', GREATER_THAN, 30)
+    assert parsed['field'] == 'age'
+    assert parsed['operator'] == GREATER_THAN
+    assert parsed['value'] == 30
+    assert parsed.get('missing') is None
+    assert dict(parsed) == {'field': 'age', 'operator': GREATER_THAN, 'value': 30}
+
+
+def test_parsed_filter_should_be_a_mapping_like_legacy_dict():
+    parsed = ParsedFilter('age', GREATER_THAN, 30)
+    legacy = parsed.as_dict()
+    assert isinstance(parsed, Mapping)
+    assert 'field' in parsed and 'age' not in parsed
+    assert list(parsed) == list(legacy)
+    assert list(parsed.values()) == list(legacy.values())
+    assert list(parsed.items()) == list(legacy.items())
+    assert len(parsed) == len(legacy)
+
+
+def test_parsed_filter_should_expose_attributes_and_values():
+    parsed = ParsedFilter('age', GREATER_THAN, 30)
+    field, operator, value = parsed.values()
+    assert (parsed.field, parsed.operator, parsed.value) == (field, operator, value)
+    assert json.dumps(parsed.as_dict()) == '{"field": "age", "operator": "gt", "value": 30}'
+
+    with pytest.raises(KeyError):
+        parsed[0]
+
+
+def test_parsed_filter_should_compare_equal_to_legacy_dict():
+    assert ParsedFilter('age', EQUAL, 1) == {'field': 'age', 'operator': EQUAL, 'value': 1}
+    assert ParsedFilter('age', EQUAL, 1) != {'field': 'age', 'operator': EQUAL, 'value': 2}
+
+
+def test_parsed_filter_should_raise_key_error_for_unknown_key():
+    with pytest.raises(KeyError):
+        ParsedFilter('age', EQUAL, 1)['missing']
+
+
+def test_parsed_filter_should_be_immutable_and_picklable():
+    parsed = ParsedFilter('age', EQUAL, 1)
+
+    with pytest.raises(AttributeError):
+        parsed.value = 2
+
+    assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+
+def test_parse_result_should_look_up_by_field():
+    result = ParseResult([ParsedFilter('age', GREATER_THAN, 1), ParsedFilter('age', EQUAL, 2),
+                          ParsedFilter('limit', EQUAL, 10)])
+    assert result.get('limit').value == 10
+    assert result.get('age').operator == GREATER_THAN
+    assert result.get('offset') is None
+    assert len(result.get_all('age')) == 2
+    assert result.get_all('offset') == ()
+    assert result.fields() == {'age', 'limit'}
+
+
+def test_parse_result_should_convert_to_list_of_dicts():
+    result = ParseResult([ParsedFilter('limit', EQUAL, 10)])
+    assert result.as_dicts() == [{'field': 'limit', 'operator': EQUAL, 'value': 10}]
+
+
+def test_parse_result_should_compare_equal_to_list_of_dicts():
+    result = ParseResult([ParsedFilter('limit', EQUAL, 10)])
+    assert result == [{'field': 'limit', 'operator': EQUAL, 'value': 10}]
+    assert result != [{'field': 'limit', 'operator': EQUAL, 'value': 11}]
+    assert result != []
+    assert ParseResult() == []
+    assert result == ParseResult([ParsedFilter('limit', EQUAL, 10)])
+
+
+def test_parse_result_should_be_immutable():
+    result = ParseResult([ParsedFilter('limit', EQUAL, 10)])
+
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+    assert result.get('limit').value == 10
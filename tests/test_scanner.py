@@ -0,0 +1,73 @@
+from urllib.parse import urlencode
+
+from operators import EQUAL, GREATER_THAN_OR_EQUAL, NOT_EQUAL
+from scanner import decode, scan, scan_bytes, split_expression
+
+
+def test_should_scan_field_operator_and_value():
+    assert list(scan('age=gte:10&name=Bob')) == [
+        ('age', GREATER_THAN_OR_EQUAL, '10'),
+        ('name', EQUAL, 'Bob'),
+    ]
+
+
+def test_should_scan_bare_field_and_bare_operator():
+    assert list(scan(f'name&name={NOT_EQUAL}')) == [('name', EQUAL, ''), ('name', NOT_EQUAL, '')]
+
+
+def test_should_split_only_on_first_colon():
+    assert split_expression('eq:12:30') == (EQUAL, '12:30')
+
+
+def test_should_split_only_on_first_equals_sign():
+    assert list(scan('expr=a=b')) == [('expr', EQUAL, 'a=b')]
+
+
+def test_should_percent_decode_fields_and_values():
+    assert list(scan('first%5Fname=eq:Ron+Swanson%3A%26')) == [
+        ('first_name', EQUAL, 'Ron Swanson:&'),
+    ]
+
+
+def test_should_not_treat_encoded_separators_as_syntax():
+    assert split_expression('12%3A30') == (EQUAL, '12:30')
+
+
+def test_should_split_on_encoded_colon_after_known_operator():
+    qs = urlencode({'age': f'{GREATER_THAN_OR_EQUAL}:30', 'at': '12:30', 'name': 'ne:x'})
+
+    fields = {b'age': 'age', b'at': 'at', b'name': 'name'}
+
+    assert list(scan(qs)) == [('age', GREATER_THAN_OR_EQUAL, '30'), ('at', EQUAL, '12:30'),
+                              ('name', EQUAL, 'ne:x')]
+    assert list(scan_bytes(qs.encode('ascii'), fields)) == list(scan(qs))
+    assert split_expression('gte%3a30%3A00') == (GREATER_THAN_OR_EQUAL, '30:00')
+
+
+def test_should_skip_empty_parts():
+    assert list(scan('&&age=1&')) == [('age', EQUAL, '1')]
+    assert list(scan('')) == []
+
+
+def test_should_skip_undeclared_fields():
+    assert list(scan('utm_source=x:y:z&age=1', {'age'})) == [('age', EQUAL, '1')]
+
+
+def test_decode_should_return_plain_tokens_unchanged():
+    token = 'plain'
+    assert decode(token) is token
+
+
+def test_should_scan_bytes_and_decode_only_declared_clauses():
+    fields = {b'age': 'age', b'first_name': 'first_name'}
+    data = b'utm=%ZZ%FF&age=gte:10&first%5Fname=Ron+Swanson%E2%9C%93'
+    assert list(scan_bytes(data, fields)) == [
+        ('age', GREATER_THAN_OR_EQUAL, '10'),
+        ('first_name', EQUAL, 'Ron Swanson✓'),
+    ]
+
+
+def test_should_scan_bytearray_and_memoryview():
+    fields = {b'age': 'age'}
+    assert list(scan_bytes(bytearray(b'age=neq:1'), fields)) == [('age', NOT_EQUAL, '1')]
+    assert list(scan_bytes(memoryview(b'x=1&age'), fields)) == [('age', EQUAL, '')]
@@ -0,0 +1,188 @@
+import json
+
+import pytest
+
+from constants import DESCENDING
+from exceptions import (InvalidChoiceException, InvalidOperatorException, NullNotAllowedException,
+                        TooManyClausesException)
+from filters import DateFilter, IntegerFilter, SortFilter, StringFilter
+from filterset import PaginationFilterSet, SortFilterSet
+from operators import EQUAL, GREATER_THAN, LESS_THAN
+from schema import (Artifact, build, build_all, build_class, fingerprint, read_schemas,
+                    write_artifact)
+from sql import SQLCompiler
+
+
+PERSON = {
+    'name': 'PersonFilterSet',
+    'bases': ['sort', 'pagination'],
+    'sortable_fields': ['name', 'age'],
+    'strict': True,
+    'max_clauses': 5,
+    'fields': {
+        'name': {'type': 'string', 'allow_null': False},
+        'age': {'type': 'integer', 'operators': [EQUAL, GREATER_THAN, LESS_THAN]},
+        'born': {'type': 'date'},
+        'tags': {'type': 'delimited', 'element': 'integer', 'choices': [1, 2, 3]},
+    },
+}
+
+TEAM = {
+    'name': 'TeamFilterSet',
+    'columns': {'name': 'teams.name'},
+    'fields': {'name': {'type': 'string'}},
+}
+
+
+class PersonFilterSet(SortFilterSet, PaginationFilterSet):
+    sortable_fields = ('name', 'age')
+
+    name = StringFilter(allow_null=False)
+    age = IntegerFilter(operators=[EQUAL, GREATER_THAN, LESS_THAN])
+    born = DateFilter()
+
+
+QUERY = 'name=Ron&age=gt:30&born=1970-05-06&sort=-age&limit=10'
+
+
+def test_should_build_filter_set_like_class_definition():
+    filter_set = build(PERSON)
+
+    assert type(filter_set).__name__ == 'PersonFilterSet'
+    assert isinstance(filter_set, SortFilterSet) and isinstance(filter_set, PaginationFilterSet)
+    assert filter_set.strict and filter_set.max_clauses == 5
+    assert list(filter_set.parse(QUERY)) == list(PersonFilterSet().parse(QUERY))
+    assert filter_set.parse('tags=3,1').get('tags').value == (3, 1)
+    assert filter_set.ordering(filter_set.parse('sort=-age')) == (('age', DESCENDING),)
+
+
+def test_should_apply_declared_operators_nulls_and_limits():
+    filter_set = build(PERSON)
+
+    with pytest.raises(InvalidOperatorException):
+        filter_set.parse('age=gte:30')
+
+    with pytest.raises(NullNotAllowedException):
+        filter_set.parse('name=null')
+
+    with pytest.raises(InvalidChoiceException):
+        filter_set.parse('tags=4')
+
+    with pytest.raises(InvalidChoiceException):
+        filter_set.parse('sort=born')
+
+    with pytest.raises(TooManyClausesException):
+        filter_set.parse('&'.join(['age=1'] * 6))
+
+
+def test_should_set_class_options():
+    cls = build_class(TEAM)
+    filter_set = cls()
+
+    assert cls.columns == {'name': 'teams.name'}
+    assert SQLCompiler().compile(filter_set, filter_set.parse('name=Ron')) == \
+        ('WHERE teams.name = ?', ['Ron'])
+    assert isinstance(build_class(PERSON).sort, SortFilter)
+
+
+@pytest.mark.parametrize('schema, message', [
+    ({'fields': {}}, 'needs a name'),
+    (dict(TEAM, filters={}), 'unknown schema keys'),
+    (dict(TEAM, bases=['nope']), 'unknown base'),
+    (dict(TEAM, fields={'name': {'type': 'text'}}), 'unknown filter type'),
+    (dict(TEAM, fields={'name': {}}), 'unknown filter type'),
+    (dict(TEAM, fields={'name': {'type': 'string', 'packed': True}}), 'packed'),
+    (dict(TEAM, fields={'tags': {'type': 'delimited', 'element': 'text'}}), 'element type'),
+    (dict(TEAM, fields={'tags': {'type': 'delimited', 'filter_type': 'integer'}}), 'in element'),
+    (dict(TEAM, fields={'parse': {'type': 'string'}}), 'field name'),
+    (dict(TEAM, fields={'_cache': {'type': 'string'}}), 'field name'),
+    (dict(TEAM, fields={'class': {'type': 'string'}}), 'field name'),
+    (dict(TEAM, fields={'name': {'type': 'string', 'operators': ['bogus']}}), 'bogus'),
+    (dict(TEAM, fields={'name': {'type': 'string', 'operators': 'gt'}}), 'must be a list'),
+    (dict(TEAM, fields={'name': 'string'}), 'must be a mapping'),
+    (dict(TEAM, fields=[{'type': 'string'}]), 'fields must map'),
+])
+def test_should_reject_invalid_schemas(schema, message):
+    with pytest.raises(ValueError, match=message):
+        build(schema)
+
+
+def test_should_read_and_build_json_schemas(tmp_path):
+    path = tmp_path / 'schemas.json'
+    path.write_text(json.dumps([PERSON, TEAM]))
+
+    filter_sets = build_all(read_schemas(path))
+
+    assert sorted(filter_sets) == ['PersonFilterSet', 'TeamFilterSet']
+    assert filter_sets['TeamFilterSet'].parse('name=Ron').get('name').value == 'Ron'
+
+    with pytest.raises(ValueError, match='duplicate'):
+        build_all([TEAM, TEAM])
+
+
+def test_should_load_filter_sets_from_artifact(tmp_path):
+    path = tmp_path / 'schemas.bin'
+    write_artifact(path, [PERSON, TEAM])
+
+    with Artifact(path) as artifact:
+        assert len(artifact) == 2 and 'TeamFilterSet' in artifact
+        assert artifact.get('nope') is None
+
+        filter_set = artifact['PersonFilterSet']
+        assert artifact['PersonFilterSet'] is filter_set
+        assert sorted(artifact.load_all()) == ['PersonFilterSet', 'TeamFilterSet']
+
+    # usable after the file is unmapped
+    assert type(filter_set).__name__ == 'PersonFilterSet'
+    assert filter_set.strict and filter_set.max_clauses == 5
+    assert list(filter_set.parse(QUERY)) == list(build(PERSON).parse(QUERY))
+    assert filter_set.parse(QUERY.encode('ascii')) == filter_set.parse(QUERY)
+    assert type(filter_set).sort is filter_set._filters['sort']
+    # filters declared by the bases stay shared with them
+    assert filter_set._filters['limit'] is PaginationFilterSet.limit
+
+    with pytest.raises(InvalidChoiceException):
+        filter_set.parse('tags=4')
+
+    with pytest.raises(InvalidOperatorException):
+        filter_set.parse('age=gte:30')
+
+
+def test_should_reject_foreign_or_outdated_artifacts(tmp_path):
+    path = tmp_path / 'schemas.bin'
+    path.write_bytes(b'not an artifact at all')
+
+    with pytest.raises(ValueError, match='not a schema artifact'):
+        Artifact(path)
+
+    write_artifact(path, [TEAM])
+    data = bytearray(path.read_bytes())
+    data[8] += 1
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match='not a schema artifact'):
+        Artifact(path)
+
+
+@pytest.mark.parametrize('offset', [11, 12])
+def test_should_reject_artifacts_of_other_python_or_library_versions(tmp_path, offset):
+    path = tmp_path / 'schemas.bin'
+    write_artifact(path, [TEAM])
+    # the python minor version and the first byte of the library fingerprint
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 1
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match='rebuild it'):
+        Artifact(path)
+
+
+def test_fingerprint_should_follow_filter_classes(monkeypatch):
+    before = fingerprint()
+    fingerprint.cache_clear()
+    monkeypatch.setattr(IntegerFilter, 'convert', lambda self, text: (int(text), None))
+
+    try:
+        assert fingerprint() != before
+    finally:
+        fingerprint.cache_clear()
@@ -0,0 +1,108 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from collection import FilteredCollection
+from constants import ASCENDING, DESCENDING
+from exceptions import InvalidChoiceException, InvalidOperatorException, NullNotAllowedException
+from filters import IntegerFilter, StringFilter
+from filterset import PaginationFilterSet, SortFilterSet
+from operators import NOT_EQUAL
+from sorting import execute, sort_rows
+
+
+class PersonSortFilterSet(SortFilterSet, PaginationFilterSet):
+    sortable_fields = ('name', 'age')
+
+    name = StringFilter()
+    age = IntegerFilter()
+
+
+sort_filter_set = PersonSortFilterSet(strict=True)
+
+rng = random.Random(0)
+PEOPLE = [{'id': i, 'name': f'Person {rng.randint(1, 20)}', 'age': rng.randint(18, 30)}
+          for i in range(200)]
+
+
+def test_should_parse_sort_into_field_direction_pairs():
+    parsed = sort_filter_set.parse('sort=-age,name')
+    assert sort_filter_set.ordering(parsed) == (('age', DESCENDING), ('name', ASCENDING))
+
+
+def test_should_strip_whitespace_around_sort_items():
+    parsed = sort_filter_set.parse('sort=-age, name')
+    assert sort_filter_set.ordering(parsed) == (('age', DESCENDING), ('name', ASCENDING))
+
+
+def test_should_keep_first_direction_of_repeated_field():
+    parsed = sort_filter_set.parse('sort=age,-age')
+    assert sort_filter_set.ordering(parsed) == (('age', ASCENDING),)
+
+
+def test_should_raise_error_if_field_is_not_sortable():
+    with pytest.raises(InvalidChoiceException):
+        sort_filter_set.parse('sort=-password')
+
+    with pytest.raises(InvalidChoiceException):
+        sort_filter_set.parse('sort=age,-')
+
+
+def test_should_reject_every_field_without_sortable_fields():
+    class UnlistedSortFilterSet(SortFilterSet):
+        age = IntegerFilter()
+
+    with pytest.raises(InvalidChoiceException):
+        UnlistedSortFilterSet(strict=True).parse('sort=age')
+
+
+def test_should_raise_error_if_sort_is_null_or_operator_invalid():
+    with pytest.raises(NullNotAllowedException):
+        sort_filter_set.parse('sort=null')
+
+    with pytest.raises(InvalidOperatorException):
+        sort_filter_set.parse(f'sort={NOT_EQUAL}:age')
+
+
+def test_should_return_empty_ordering_without_sort():
+    assert sort_filter_set.ordering(sort_filter_set.parse('age=20')) == ()
+
+
+def test_should_canonicalize_sort_in_query_form():
+    assert sort_filter_set.canonicalize('sort=-age,name') == 'sort=eq:-age,name'
+
+
+@pytest.mark.parametrize('qs, expected', [
+    ('sort=age&limit=5', sorted(PEOPLE, key=lambda p: p['age'])[:5]),
+    ('sort=-age&limit=5&offset=3', sorted(PEOPLE, key=lambda p: p['age'], reverse=True)[3:8]),
+    ('sort=-age,name&limit=7',
+     sorted(sorted(PEOPLE, key=lambda p: p['name']), key=lambda p: p['age'], reverse=True)[:7]),
+    ('sort=name,-age', sorted(sorted(PEOPLE, key=lambda p: p['age'], reverse=True),
+                              key=lambda p: p['name'])),
+    ('limit=4&offset=2', PEOPLE[2:6]),
+    ('sort=-age,name&limit=0', []),
+])
+def test_should_match_full_sort_and_slice(qs, expected):
+    assert execute(sort_filter_set.parse(qs), PEOPLE) == expected
+
+
+def test_should_sort_nulls_after_values():
+    rows = [{'age': 3}, {'age': None}, {'age': 1}]
+    assert sort_rows(rows, (('age', ASCENDING),)) == [{'age': 1}, {'age': 3}, {'age': None}]
+    assert sort_rows(rows, (('age', DESCENDING),), limit=1) == [{'age': None}]
+
+
+def test_should_sort_objects_by_attribute():
+    rows = [SimpleNamespace(**p) for p in PEOPLE]
+    ordered = sort_rows(rows, (('age', DESCENDING), ('id', ASCENDING)), limit=3, attribute=True)
+    expected = sorted(PEOPLE, key=lambda p: (-p['age'], p['id']))[:3]
+    assert [row.id for row in ordered] == [p['id'] for p in expected]
+
+
+def test_should_sort_collection_queries_before_limiting():
+    collection = FilteredCollection(sort_filter_set, PEOPLE)
+    rows = collection.query('age=gte:25&sort=-age,name&limit=5')
+    matches = [p for p in PEOPLE if p['age'] >= 25]
+    assert rows == sorted(sorted(matches, key=lambda p: p['name']),
+                          key=lambda p: p['age'], reverse=True)[:5]
@@ -0,0 +1,139 @@
+import sqlite3
+
+import pytest
+
+from filters import BooleanFilter, FloatFilter, IntegerFilter, StringFilter
+from filterset import FilterSet, PaginationFilterSet, SortFilterSet
+from sql import UNLIMITED, SQLCompiler, arity_bucket, compile_sql
+
+
+class PersonFilterSet(PaginationFilterSet):
+    columns = {'name': 'person_name', 'age': 'age', 'weight': 'weight', 'divorced': 'divorced'}
+
+    name = StringFilter()
+    age = IntegerFilter()
+    weight = FloatFilter()
+    divorced = BooleanFilter()
+
+
+class PersonSortFilterSet(SortFilterSet, PersonFilterSet):
+    sortable_fields = ('name', 'age')
+
+
+class UnmappedFilterSet(FilterSet):
+    name = StringFilter()
+    age = IntegerFilter()
+
+
+filter_set = PersonFilterSet()
+
+PEOPLE = [
+    ('Ron', 65, 200.5, True),
+    ('Leslie', 40, 120.0, False),
+    ('April', None, 110.0, False),
+    ('Tom', 30, 150.0, True),
+    ('Ann', 40, 130.0, None),
+]
+
+
+@pytest.fixture(scope='module')
+def connection():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE people (person_name TEXT, age INTEGER, weight REAL, '
+                       'divorced BOOLEAN)')
+    connection.executemany('INSERT INTO people VALUES (?, ?, ?, ?)', PEOPLE)
+    yield connection
+    connection.close()
+
+
+def names(connection, qs):
+    sql, params = SQLCompiler().compile(filter_set, filter_set.parse(qs))
+    cursor = connection.execute(f'SELECT person_name FROM people {sql}', params)
+    return [name for name, in cursor]
+
+
+def test_should_compile_where_clause_with_mapped_columns():
+    sql, params = compile_sql(filter_set, filter_set.parse('name=Ron&age=gte:30'))
+    assert sql == 'WHERE age >= ? AND person_name = ?'
+    assert params == [30, 'Ron']
+
+
+def test_should_quote_field_names_without_columns_mapping():
+    unmapped = UnmappedFilterSet()
+    sql, params = compile_sql(unmapped, unmapped.parse('age=lt:3'))
+    assert sql == 'WHERE "age" < ?'
+    assert params == [3]
+
+
+def test_should_compile_empty_query_to_empty_fragment():
+    assert compile_sql(filter_set, filter_set.parse('')) == ('', [])
+
+
+def test_should_reject_fields_without_mapped_column():
+    class PartialFilterSet(FilterSet):
+        columns = {'age': 'age'}
+        name = StringFilter()
+
+    partial = PartialFilterSet()
+
+    with pytest.raises(ValueError):
+        compile_sql(partial, partial.parse('name=Ron'))
+
+
+def test_should_select_matching_rows(connection):
+    assert names(connection, 'age=gt:30') == ['Ron', 'Leslie', 'Ann']
+    assert names(connection, 'age=40&weight=lt:125') == ['Leslie']
+    assert names(connection, 'divorced=true') == ['Ron', 'Tom']
+
+
+def test_should_translate_nulls(connection):
+    assert names(connection, 'age=null') == ['April']
+    assert names(connection, 'divorced=neq:null') == ['Ron', 'Leslie', 'April', 'Tom']
+    assert names(connection, 'age=gt:null') == []
+
+
+def test_should_translate_in_and_not_in(connection):
+    assert names(connection, 'name=in:Ron,Tom,Ann') == ['Ron', 'Tom', 'Ann']
+    assert names(connection, 'age=in:30,null') == ['April', 'Tom']
+    assert names(connection, 'age=nin:40,null') == ['Ron', 'Tom']
+
+
+def test_should_translate_limit_and_offset(connection):
+    assert names(connection, 'limit=2') == ['Ron', 'Leslie']
+    assert names(connection, 'limit=2&offset=1') == ['Leslie', 'April']
+    assert names(connection, 'offset=3') == ['Tom', 'Ann']
+
+
+@pytest.mark.parametrize('unlimited, expected', [
+    (UNLIMITED['mysql'], 'LIMIT 18446744073709551615 OFFSET %s'),
+    (UNLIMITED['postgresql'], 'LIMIT ALL OFFSET %s'),
+    (None, 'OFFSET %s'),
+])
+def test_should_render_offset_only_queries_per_dialect(unlimited, expected):
+    compiler = SQLCompiler(paramstyle='format', unlimited=unlimited)
+    assert compiler.compile(filter_set, filter_set.parse('offset=3')) == (expected, [3])
+
+
+def test_should_pad_in_lists_to_arity_bucket():
+    sql, params = compile_sql(filter_set, filter_set.parse('age=in:1,2,3'))
+    assert sql == 'WHERE age IN (?, ?, ?, ?)'
+    assert len(params) == 4
+    assert set(params) == {1, 2, 3}
+    assert [arity_bucket(n) for n in (1, 2, 3, 5, 8, 9)] == [1, 2, 4, 8, 8, 16]
+
+
+def test_should_reuse_statement_text_for_same_shape():
+    compiler = SQLCompiler(paramstyle='format')
+    sql1, _ = compiler.compile(filter_set, filter_set.parse('age=gt:1&name=in:a,b,c&limit=5'))
+    sql2, _ = compiler.compile(filter_set, filter_set.parse('limit=9&name=in:x,y,z,w&age=gt:7'))
+    assert sql1 is sql2
+    assert sql1 == 'WHERE age > %s AND person_name IN (%s, %s, %s, %s) LIMIT %s'
+    assert compiler.cache_info().hits == 1
+
+
+def test_should_order_by_sort_through_columns_mapping(connection):
+    sort_filter_set = PersonSortFilterSet()
+    sql, params = compile_sql(sort_filter_set, sort_filter_set.parse('sort=-age,name&limit=3'))
+    assert sql == 'ORDER BY age DESC, person_name LIMIT ?'
+    cursor = connection.execute(f'SELECT person_name FROM people {sql}', params)
+    assert [name for name, in cursor] == ['Ron', 'Ann', 'Leslie']
@@ -1,5 +1,7 @@
+from array import array
+
 from constants import EMPTY_VALUES
-from utils import coalesce
+from utils import SortedValues, coalesce, contains, format_value
 
 
 def test_coalesce_should_return_first_non_empty_value():
@@ -10,3 +12,23 @@ def test_coalesce_should_return_first_non_empty_value():
 def test_coalesce_should_return_none_if_no_non_empty_values():
     result = coalesce(*EMPTY_VALUES)
     assert result is None
+
+
+def test_format_value_should_render_parsed_values_in_query_form():
+    assert format_value(None) == 'null'
+    assert format_value(True) == 'true'
+    assert format_value(12) == '12'
+    assert format_value(1.5) == '1.5'
+    assert format_value('Ron Swanson, Jr.') == 'Ron%20Swanson%2C%20Jr.'
+    assert format_value(frozenset(('b', 'a', None))) == 'a,b,null'
+    assert format_value(('name', 'id')) == 'name,id'
+
+
+def test_contains_should_binary_search_packed_arrays():
+    values = array('q', [1, 3, 5, 7])
+    assert [contains(values, v) for v in (0, 1, 4, 7, 8, 3.0)] == [False, True, False, True,
+                                                                   False, True]
+    assert not contains(values, None) and not contains(values, 'a')
+    assert not contains(array('d'), 1.0)
+    assert contains(frozenset(('a',)), 'a')
+    assert 5 in SortedValues(values) and 6 not in SortedValues(values)